@@ -0,0 +1,180 @@
+"""
+Cachés en memoria del proceso y caché de lectura con coalescencia de misses
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+# Distingue "no está en caché" de un valor guardado que sea None
+MISSING = object()
+
+
+class TTLCache:
+    """Caché LRU acotada por tamaño con expiración por entrada"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def discard_where(self, predicate) -> int:
+        """Elimina las entradas cuyo valor cumple el predicado"""
+        with self._lock:
+            keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def discard_keys(self, predicate) -> int:
+        """Elimina las entradas cuya clave cumple el predicado"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheBackend:
+    """Almacén de una caché de lectura; las entradas se agrupan (por estudiante) para invalidarlas juntas
+
+    Un backend fuera del proceso (Redis, memcached) implementa los mismos métodos;
+    `invalidate` y `clear` no deben bloquear el event loop.
+    """
+
+    def __init__(self):
+        # Cambia en cada invalidación: una carga iniciada antes no guarda su resultado
+        self.generation = 0
+
+    async def get(self, group: str, key):
+        return MISSING
+
+    async def set(self, group: str, key, value, ttl: float):
+        pass
+
+    def invalidate(self, groups):
+        self.generation += 1
+
+    def clear(self):
+        self.generation += 1
+
+    def __len__(self):
+        return 0
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Backend en memoria del worker sobre TTLCache (LRU acotada por tamaño)"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__()
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, group: str, key):
+        return self._cache.get((group, key), MISSING)
+
+    async def set(self, group: str, key, value, ttl: float):
+        self._cache.set((group, key), value, ttl=ttl)
+
+    def invalidate(self, groups):
+        super().invalidate(groups)
+        groups = set(groups)
+        self._cache.discard_keys(lambda key: key[0] in groups)
+
+    def clear(self):
+        super().clear()
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class ReadThroughCache:
+    """Caché de lectura con TTL: los misses simultáneos de una clave comparten una sola carga"""
+
+    def __init__(self, name: str, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight = {}
+
+    async def get_or_load(self, group: str, key, loader):
+        """Valor de (group, key); en un miss espera `loader()` (o la carga ya en curso de otra solicitud)"""
+        if not self.enabled:
+            return await loader()
+        key = (self.name, key)
+        value = await self.backend.get(group, key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+
+        while (pending := self._inflight.get((group, key))) is not None:
+            try:
+                value = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Si se canceló quien cargaba (el cliente cerró la conexión) se vuelve a intentar
+                if not pending.cancelled():
+                    raise
+                continue
+            self.coalesced += 1
+            return value
+
+        self.misses += 1
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[(group, key)] = pending
+        generation = self.backend.generation
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except BaseException as exc:
+            pending.set_exception(exc)
+            pending.exception()  # ya se propaga a quien cargaba: no avisar "never retrieved"
+            raise
+        finally:
+            del self._inflight[(group, key)]
+        pending.set_result(value)
+        # Una invalidación durante la carga puede haber llegado después de leer la base
+        if value is not None and generation == self.backend.generation:
+            await self.backend.set(group, key, value, self.ttl)
+        return value
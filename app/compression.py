@@ -0,0 +1,196 @@
+"""
+Compresión negociada (br / gzip) de las respuestas
+
+Middleware ASGI: elige la codificación según Accept-Encoding, deja sin
+comprimir los cuerpos menores a COMPRESSION_MIN_SIZE y los tipos que no se
+benefician, y comprime los streams (NDJSON, .ics) bloque por bloque. Los
+cuerpos con ETag se guardan ya comprimidos por ruta, ETag y codificación:
+la misma versión de un horario no se vuelve a comprimir en cada solicitud.
+"""
+import os
+import time
+import zlib
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+
+from app import metrics
+from app.cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+load_dotenv()
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+# Por debajo de este tamaño la cabecera gzip y la CPU no compensan (p. ej. /health o login)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", "2048"))
+COMPRESSION_CACHE_TTL = float(os.getenv("COMPRESSION_CACHE_TTL", "300"))
+# Cuerpos más grandes se comprimen igual pero no se guardan
+COMPRESSION_CACHE_MAX_BODY = int(os.getenv("COMPRESSION_CACHE_MAX_BODY", str(256 * 1024)))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+compressed_cache = TTLCache(maxsize=COMPRESSION_CACHE_SIZE, ttl=COMPRESSION_CACHE_TTL)
+
+compression_bytes = metrics.registry.register(metrics.Counter(
+    "senati_compression_bytes_total", "Bytes antes (in) y después (out) de comprimir", ("direction", "encoding")
+))
+compression_seconds = metrics.registry.register(metrics.Counter(
+    "senati_compression_seconds_total", "Tiempo de CPU comprimiendo respuestas", ("encoding",)
+))
+compression_cache_lookups = metrics.registry.register(metrics.Counter(
+    "senati_compression_cache_total", "Búsquedas en la caché de cuerpos comprimidos", ("result",)
+))
+
+
+class GzipEncoder:
+    def __init__(self, level: int = COMPRESSION_GZIP_LEVEL):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: formato gzip
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        # Sync flush: el cliente puede descomprimir cada bloque del stream al recibirlo
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int = COMPRESSION_BROTLI_QUALITY):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+ENCODERS = {"br": BrotliEncoder, "gzip": GzipEncoder} if brotli is not None else {"gzip": GzipEncoder}
+
+
+def negotiate(accept_encoding: str):
+    """Codificación de mayor q aceptada por el cliente; en empate, br antes que gzip"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for coding in ENCODERS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    started = time.process_time()
+    encoder = ENCODERS[encoding]()
+    body = encoder.compress(data) + encoder.finish()
+    compression_seconds.inc(encoding, amount=time.process_time() - started)
+    compression_bytes.inc("in", encoding, amount=len(data))
+    compression_bytes.inc("out", encoding, amount=len(body))
+    return body
+
+
+def _compressible(headers: Headers) -> bool:
+    return "content-encoding" not in headers and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Comprime las respuestas según Accept-Encoding; reutiliza los cuerpos ya comprimidos por ETag"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, enabled: bool = COMPRESSION_ENABLED):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        state = {"start": None, "encoder": None, "passthrough": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if message["status"] < 200 or message["status"] in (204, 304) or not _compressible(headers):
+                    state["passthrough"] = True
+                    await send(message)
+                else:
+                    # La respuesta depende de Accept-Encoding aunque esta vez no se comprima
+                    MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                    state["start"] = message
+                return
+
+            if state["passthrough"] or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start, body, more_body = state["start"], message.get("body", b""), message.get("more_body", False)
+            if start is not None:
+                state["start"] = None
+                if encoding is None or (not more_body and len(body) < self.minimum_size):
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                if not more_body:
+                    # El ETag identifica la versión de los datos (conditional.make_etag), no los
+                    # bytes: se conserva en todas las codificaciones y sirve de clave de caché
+                    body = self._compressed(scope, headers.get("etag"), body, encoding)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                state["encoder"] = ENCODERS[encoding]()
+                await send(start)
+
+            encoder = state["encoder"]
+            started = time.process_time()
+            chunk = encoder.compress(body) + (encoder.flush() if more_body else encoder.finish())
+            compression_seconds.inc(encoding, amount=time.process_time() - started)
+            compression_bytes.inc("in", encoding, amount=len(body))
+            compression_bytes.inc("out", encoding, amount=len(chunk))
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _compressed(self, scope, etag, body: bytes, encoding: str) -> bytes:
+        if etag is None or len(body) > COMPRESSION_CACHE_MAX_BODY:
+            return compress(body, encoding)
+        # El largo es una defensa extra ante un cuerpo distinto con el mismo ETag
+        key = (scope["path"], scope.get("query_string", b""), etag, len(body), encoding)
+        cached = compressed_cache.get(key)
+        if cached is not None:
+            compression_cache_lookups.inc("hit")
+            return cached
+        compression_cache_lookups.inc("miss")
+        cached = compress(body, encoding)
+        compressed_cache.set(key, cached)
+        return cached
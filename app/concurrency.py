@@ -0,0 +1,121 @@
+"""
+Límite de solicitudes simultáneas por worker
+
+Cuando PostgreSQL se pone lento las solicitudes se acumulan en el worker hasta
+agotar el pool de conexiones y la memoria, y todas terminan tarde. Con este
+middleware ASGI atienden a lo sumo CONCURRENCY_LIMIT a la vez; las siguientes
+esperan en una cola de CONCURRENCY_QUEUE_LIMIT durante CONCURRENCY_QUEUE_TIMEOUT
+segundos como máximo. Con la cola llena o la espera vencida se responde 503
+con Retry-After sin tocar la base, para que el cliente o el balanceador
+reintenten en otro worker. /health y /metrics no pasan por el límite.
+"""
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+from app import metrics
+from app.serialization import dumps
+
+load_dotenv()
+
+CONCURRENCY_LIMIT = int(os.getenv("CONCURRENCY_LIMIT", "100"))  # 0: sin límite
+CONCURRENCY_QUEUE_LIMIT = int(os.getenv("CONCURRENCY_QUEUE_LIMIT", "100"))
+CONCURRENCY_QUEUE_TIMEOUT = float(os.getenv("CONCURRENCY_QUEUE_TIMEOUT", "10"))
+CONCURRENCY_RETRY_AFTER = int(os.getenv("CONCURRENCY_RETRY_AFTER", "1"))
+
+EXEMPT_PATHS = ("/health", "/metrics")
+
+
+class ConcurrencyLimiter:
+    """Semáforo con cola acotada y espera máxima"""
+
+    def __init__(self, limit: int, queue_limit: int, timeout: float):
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self.active = 0
+        self.queued = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+        self._semaphore = asyncio.Semaphore(limit) if limit > 0 else None
+
+    @property
+    def saturated(self) -> bool:
+        return self._semaphore is not None and self.queued >= self.queue_limit
+
+    async def acquire(self) -> bool:
+        """True si la solicitud puede atenderse; False si debe rechazarse"""
+        if self._semaphore.locked():
+            if self.queued >= self.queue_limit:
+                self.rejected["queue_full"] += 1
+                return False
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                self.rejected["timeout"] += 1
+                return False
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_limit": self.queue_limit,
+            "active": self.active,
+            "queued": self.queued,
+            "rejected": dict(self.rejected),
+        }
+
+
+limiter = ConcurrencyLimiter(CONCURRENCY_LIMIT, CONCURRENCY_QUEUE_LIMIT, CONCURRENCY_QUEUE_TIMEOUT)
+
+_OVERLOADED_BODY = dumps({"detail": "Servidor saturado, intenta nuevamente en unos segundos"})
+
+
+class ConcurrencyLimitMiddleware:
+    """Middleware ASGI: una solicitud ocupa su lugar hasta terminar de enviar la respuesta (incluidos los streams)"""
+
+    def __init__(self, app, limiter: ConcurrencyLimiter = limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.limiter.limit <= 0 or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.limiter.acquire():
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_OVERLOADED_BODY)).encode("latin-1")),
+                    (b"retry-after", str(CONCURRENCY_RETRY_AFTER).encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _OVERLOADED_BODY})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release()
+
+
+metrics.registry.register(metrics.Gauge(
+    "senati_http_requests_queued", "Solicitudes esperando lugar bajo el límite de concurrencia", (),
+    lambda: [((), limiter.queued)]
+))
+metrics.registry.register(metrics.Counter(
+    "senati_http_requests_rejected_total", "Solicitudes rechazadas con 503 por el límite de concurrencia",
+    ("reason",), lambda: [((reason,), count) for reason, count in limiter.rejected.items()]
+))
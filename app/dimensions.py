@@ -0,0 +1,91 @@
+"""
+Caché en proceso de las tablas de dimensión del horario (cursos, instructores y aulas)
+
+Son tablas pequeñas que casi no cambian: cada worker guarda id -> nombre y las
+respuestas de horario se arman sin JOIN. La caché se recarga completa, en una
+sola consulta, cuando llega una fila con un id desconocido o vence el TTL.
+`version` resume el contenido cargado: entra en los ETag de las respuestas que
+muestran nombres, así que un curso renombrado cambia el ETag del horario.
+"""
+import hashlib
+import os
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import literal, select, union_all
+
+from app.cache import CacheBackend, ReadThroughCache
+from app.models import Course, Instructor, Location
+
+load_dotenv()
+
+DIMENSION_CACHE_TTL = float(os.getenv("DIMENSION_CACHE_TTL", "300"))
+
+MODELS = (Course, Instructor, Location)
+
+
+def all_names():
+    """(dimensión, id, nombre) de las tres tablas en un solo SELECT"""
+    return union_all(*(
+        select(literal(index).label("dimension"), model.id, model.name) for index, model in enumerate(MODELS)
+    ))
+
+
+class DimensionCache:
+    """Nombres por id de cada dimensión; se reemplazan completos al recargar"""
+
+    def __init__(self, ttl: float = DIMENSION_CACHE_TTL):
+        self.ttl = ttl
+        self.loads = 0
+        self._names = tuple({} for _ in MODELS)
+        self._version = None
+        self._loaded_at = None
+        # Sin almacenamiento propio: solo hace que las recargas simultáneas compartan una consulta
+        self._reloads = ReadThroughCache("dimensions", CacheBackend(), ttl=0)
+
+    @property
+    def tables(self) -> tuple:
+        """(cursos, instructores, aulas) como diccionarios id -> nombre"""
+        return self._names
+
+    @property
+    def version(self):
+        """Resumen del contenido cargado; igual en todos los workers que ven los mismos nombres"""
+        return self._version
+
+    def _fresh(self, ids) -> bool:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            return False
+        return all(keys <= names.keys() for names, keys in zip(self._names, ids))
+
+    def store(self, rows):
+        names = tuple({} for _ in MODELS)
+        for dimension, key, name in rows:
+            names[dimension][key] = name
+        digest = hashlib.blake2b(digest_size=8)
+        for table in names:
+            digest.update(repr(sorted(table.items())).encode("utf-8"))
+        # Reemplazo atómico: una respuesta en curso nunca ve una caché a medio cargar
+        self._names = names
+        self._version = digest.hexdigest()
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+
+    async def ensure(self, db, ids):
+        """Recarga si falta algún id de `ids`: (course_ids, instructor_ids, location_ids) como conjuntos"""
+        async def reload():
+            self.store((await db.execute(all_names())).all())
+
+        # Un segundo intento cubre ids creados después de que empezó la recarga compartida
+        for _ in range(2):
+            if self._fresh(ids):
+                return
+            await self._reloads.get_or_load("", (), reload)
+
+    def clear(self):
+        self._names = tuple({} for _ in MODELS)
+        self._version = None
+        self._loaded_at = None
+
+
+dimension_cache = DimensionCache()
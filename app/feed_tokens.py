@@ -0,0 +1,52 @@
+"""
+Tokens de suscripción al calendario: aleatorios, guardados como hash y revocables
+"""
+import hashlib
+import os
+import secrets
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from app.cache import TTLCache
+from app.database import AsyncSessionLocal
+from app.models import FeedToken
+
+load_dotenv()
+
+FEED_TOKEN_CACHE_SIZE = int(os.getenv("FEED_TOKEN_CACHE_SIZE", "10000"))
+# Una revocación tarda a lo sumo este tiempo en llegar a los demás workers
+FEED_TOKEN_CACHE_TTL = float(os.getenv("FEED_TOKEN_CACHE_TTL", "60"))
+
+# Clave: hash del token; valor: student_id
+token_cache = TTLCache(maxsize=FEED_TOKEN_CACHE_SIZE, ttl=FEED_TOKEN_CACHE_TTL)
+
+
+def new_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def resolve(token: str) -> Optional[str]:
+    """student_id del token vigente; sin consultar la base mientras esté en caché"""
+    key = token_hash(token)
+    student_id = token_cache.get(key)
+    if student_id is not None:
+        return student_id
+    # En la primaria: un token recién creado puede no haber llegado aún a las réplicas
+    async with AsyncSessionLocal() as db:
+        student_id = await db.scalar(
+            select(FeedToken.student_id).where(FeedToken.token_hash == key, FeedToken.revoked_at.is_(None))
+        )
+    if student_id is not None:
+        token_cache.set(key, student_id)
+    return student_id
+
+
+def forget_student(student_id: str):
+    """Quita de la caché local los tokens del estudiante tras revocarlos"""
+    token_cache.discard_where(lambda cached: cached == student_id)
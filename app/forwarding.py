@@ -0,0 +1,98 @@
+"""
+Dirección real del cliente detrás de proxies de confianza
+
+En producción las solicitudes llegan por el router de la plataforma o un
+balanceador: la IP del socket es la del proxy y la del cliente viaja en
+X-Forwarded-For. Este middleware ASGI reemplaza scope["client"] (y el esquema
+con X-Forwarded-Proto) solo cuando la conexión viene de una dirección de
+FORWARDED_ALLOW_IPS, tomando de derecha a izquierda el primer salto que no es
+un proxy de confianza: lo que escribe el cliente a la izquierda no se usa.
+
+FORWARDED_ALLOW_IPS admite IPs y redes separadas por comas, "*" (cualquier
+conexión viene de un único proxy: el cliente es el último salto agregado) o
+"none" (sin proxy: la IP del socket ya es la del cliente). Sin definir no se
+sabe quién es el cliente y el límite de login por IP queda desactivado.
+"""
+import ipaddress
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# La misma variable que lee uvicorn para --forwarded-allow-ips
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "")
+
+
+class TrustedProxies:
+    """Proxies cuyos encabezados X-Forwarded-* se aceptan"""
+
+    def __init__(self, value: str = FORWARDED_ALLOW_IPS):
+        value = value.strip()
+        self.configured = bool(value)
+        self.any = value == "*"
+        self.networks = []
+        self.literals = set()
+        if not self.configured or self.any or value.lower() == "none":
+            return
+        for item in (part.strip() for part in value.split(",")):
+            if not item:
+                continue
+            try:
+                self.networks.append(ipaddress.ip_network(item, strict=False))
+            except ValueError:
+                # Sockets unix u otros nombres (p. ej. "testclient" del cliente de pruebas)
+                self.literals.add(item)
+
+    def __contains__(self, host) -> bool:
+        if not host:
+            return False
+        if self.any:
+            return True
+        if host in self.literals:
+            return True
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.networks)
+
+    def client(self, peer, forwarded_for: str):
+        """IP del cliente: el salto más a la derecha que no es un proxy de confianza"""
+        if peer not in self:
+            return peer
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if self.any:
+            return hops[-1] if hops else peer
+        for hop in reversed(hops):
+            if hop not in self:
+                return hop
+        # Todos los saltos son proxies: el más lejano es lo más cercano al cliente que se conoce
+        return hops[0] if hops else peer
+
+
+trusted_proxies = TrustedProxies()
+
+
+class ForwardedClientMiddleware:
+    """Middleware ASGI: scope["client"] pasa a ser el cliente real para el límite de login, logs y métricas"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Se consulta en cada solicitud: las pruebas reemplazan la configuración
+        proxies = trusted_proxies
+        if scope["type"] in ("http", "websocket") and scope.get("client") and scope["client"][0] in proxies:
+            forwarded_for, proto = [], None
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    forwarded_for.append(value.decode("latin-1"))
+                elif name == b"x-forwarded-proto":
+                    proto = value.decode("latin-1").strip().lower()
+            host = proxies.client(scope["client"][0], ",".join(forwarded_for))
+            if host != scope["client"][0]:
+                scope["client"] = (host, 0)
+            if proto in ("http", "https"):
+                scope["scheme"] = proto if scope["type"] == "http" else proto.replace("http", "ws")
+        await self.app(scope, receive, send)
@@ -0,0 +1,99 @@
+"""
+Formato iCalendar (RFC 5545) para el horario, generado línea por línea
+"""
+import os
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Las fechas y horas de schedule_entries son hora local de la sede
+ICS_TIMEZONE = os.getenv("ICS_TIMEZONE", "America/Lima")
+# Ventana del calendario alrededor de hoy
+ICS_PAST_DAYS = int(os.getenv("ICS_PAST_DAYS", "30"))
+ICS_FUTURE_DAYS = int(os.getenv("ICS_FUTURE_DAYS", "200"))
+PRODID = "-//SENATI//senati-api//ES"
+
+
+def escape_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> bytes:
+    """Corta la línea en bloques de 75 octetos sin partir caracteres UTF-8"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return encoded + b"\r\n"
+    parts, current, size = [], [], 0
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        # La primera línea admite 75 octetos; las de continuación, 74 más el espacio inicial
+        if size + char_size > (75 if not parts else 74):
+            parts.append("".join(current))
+            current, size = [], 0
+        current.append(char)
+        size += char_size
+    parts.append("".join(current))
+    return "\r\n ".join(parts).encode("utf-8") + b"\r\n"
+
+
+def _utc_stamp(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _offset(tz: ZoneInfo) -> str:
+    seconds = int(datetime.now(tz).utcoffset().total_seconds())
+    sign = "+" if seconds >= 0 else "-"
+    hours, minutes = divmod(abs(seconds) // 60, 60)
+    return f"{sign}{hours:02d}{minutes:02d}"
+
+
+def calendar_header(name: str) -> bytes:
+    # VTIMEZONE de desfase fijo: suficiente para zonas sin horario de verano (America/Lima)
+    offset = _offset(ZoneInfo(ICS_TIMEZONE))
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+        f"X-WR-TIMEZONE:{ICS_TIMEZONE}",
+        "BEGIN:VTIMEZONE",
+        f"TZID:{ICS_TIMEZONE}",
+        "BEGIN:STANDARD",
+        "DTSTART:19700101T000000",
+        f"TZOFFSETFROM:{offset}",
+        f"TZOFFSETTO:{offset}",
+        "END:STANDARD",
+        "END:VTIMEZONE",
+    ]
+    return b"".join(fold(line) for line in lines)
+
+
+def event(entry: dict, updated_at: datetime) -> bytes:
+    """VEVENT de una clase con el formato de schedule_data.entry_payload"""
+    day = entry["date"]
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:schedule-entry-{entry['id']}@senati-api",
+        f"DTSTAMP:{_utc_stamp(updated_at)}",
+        f"LAST-MODIFIED:{_utc_stamp(updated_at)}",
+        f"DTSTART;TZID={ICS_TIMEZONE}:{day:%Y%m%d}T{entry['start_time']:%H%M%S}",
+        f"DTEND;TZID={ICS_TIMEZONE}:{day:%Y%m%d}T{entry['end_time']:%H%M%S}",
+        f"SUMMARY:{escape_text(entry['course_name'])}",
+        f"LOCATION:{escape_text(entry['location'])}",
+        f"DESCRIPTION:{escape_text('Instructor: ' + entry['instructor_name'])}",
+        "END:VEVENT",
+    ]
+    return b"".join(fold(line) for line in lines)
+
+
+CALENDAR_FOOTER = b"END:VCALENDAR\r\n"
@@ -0,0 +1,333 @@
+"""
+Importador masivo de estudiantes y horarios desde CSV o NDJSON
+
+Lee la entrada en bloques (memoria acotada) y escribe con COPY en PostgreSQL
+o con executemany en SQLite. Volver a importar el mismo archivo deja la base
+en el mismo estado: los estudiantes se actualizan por ID y el horario de cada
+estudiante dentro del periodo se reemplaza por el del archivo. Solo se tocan
+las filas que cambiaron, con una única versión de sincronización por import.
+Los cursos, instructores y aulas se guardan una sola vez en sus tablas de
+dimensión y el horario los referencia por id.
+
+Uso:
+    python -m app.importer students alumnos.csv
+    python -m app.importer schedule horarios.ndjson --term-start 2024-03-04 --term-end 2024-07-19
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from datetime import date, time as dtime
+from itertools import islice
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import (
+    BigInteger, Column, Date, DateTime, Index, Integer, MetaData, String, Table, Time,
+    and_, delete, exists, func, insert, literal, or_, select, update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.database import engine
+from app.models import (
+    CareerData, Course, Instructor, Location, PersonalData, ScheduleEntry, Student, SyncTombstone,
+    next_version, utcnow,
+)
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+STUDENT_FIELDS = ("id", "first_name", "last_name", "dni")
+PERSONAL_FIELDS = ("email", "phone", "address")
+CAREER_FIELDS = ("level", "program", "school", "campus")
+SCHEDULE_FIELDS = (
+    "student_id", "date", "start_time", "end_time", "course_name", "instructor_name", "location",
+    "location_campus",
+)
+# (tabla de dimensión, columna con el nombre en el archivo, columna con el id en schedule_entries)
+DIMENSIONS = (
+    (Course, "course_name", "course_id"),
+    (Instructor, "instructor_name", "instructor_id"),
+    (Location, "location", "location_id"),
+)
+ENTRY_FIELDS = ("student_id", "date", "start_time", "end_time", "course_id", "instructor_id", "location_id")
+
+
+class InvalidRecord(ValueError):
+    """Registro de entrada inválido"""
+
+
+def read_records(path: str, fmt: str = None):
+    """Genera diccionarios desde un CSV o NDJSON sin cargar el archivo completo"""
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(stream)
+        else:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _required(record, field, line):
+    value = record.get(field)
+    if value in (None, ""):
+        raise InvalidRecord(f"Registro {line}: falta el campo '{field}'")
+    return value
+
+
+def _optional(record, field):
+    value = record.get(field)
+    return None if value == "" else value
+
+
+def _upsert(conn, model, rows, conflict_column, update_columns):
+    """INSERT ... ON CONFLICT que solo actualiza (updated_at y version incluidos) si algún dato cambió"""
+    dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+    table = model.__table__
+    stmt = dialect.insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[conflict_column],
+        set_={column: stmt.excluded[column] for column in update_columns + ("updated_at", "version")},
+        where=or_(*(table.c[column].is_distinct_from(stmt.excluded[column]) for column in update_columns)),
+    )
+    conn.execute(stmt, rows)
+
+
+def import_students(conn, records, chunk_size=DEFAULT_CHUNK_SIZE, report=print):
+    """Upsert por lotes de students, personal_data y career_data"""
+    total = 0
+    version = None
+    started = time.perf_counter()
+    for chunk in chunked(records, chunk_size):
+        now = utcnow()
+        version = version or next_version(conn)
+        students, personal, career = [], [], []
+        for offset, record in enumerate(chunk, start=total + 1):
+            student_id = _required(record, "id", offset)
+            students.append({
+                **{field: _required(record, field, offset) for field in STUDENT_FIELDS},
+                # Solo se usan al insertar: una reimportación no pisa contraseñas ni roles
+                # cambiados (esos cambios pasan por el ORM, que invalida los tokens emitidos)
+                "password_hash": _required(record, "password_hash", offset),
+                "role": _optional(record, "role") or "student",
+                "updated_at": now,
+                "version": version,
+            })
+            if record.get("email"):
+                personal.append({
+                    "student_id": student_id,
+                    **{field: _optional(record, field) for field in PERSONAL_FIELDS},
+                    "updated_at": now,
+                    "version": version,
+                })
+            if record.get("level"):
+                career.append({
+                    "student_id": student_id,
+                    **{field: _required(record, field, offset) for field in CAREER_FIELDS},
+                    "updated_at": now,
+                    "version": version,
+                })
+
+        _upsert(conn, Student, students, "id", STUDENT_FIELDS[1:])
+        if personal:
+            _upsert(conn, PersonalData, personal, "student_id", PERSONAL_FIELDS)
+        if career:
+            _upsert(conn, CareerData, career, "student_id", CAREER_FIELDS)
+
+        total += len(chunk)
+        report(f"  {total} estudiantes ({total / (time.perf_counter() - started):,.0f} filas/s)")
+    return total
+
+
+def _staging_table():
+    metadata = MetaData()
+    return Table(
+        "schedule_staging",
+        metadata,
+        Column("student_id", String, nullable=False),
+        Column("date", Date, nullable=False),
+        Column("start_time", Time, nullable=False),
+        Column("end_time", Time, nullable=False),
+        Column("course_name", String, nullable=False),
+        Column("instructor_name", String, nullable=False),
+        Column("location", String, nullable=False),
+        Column("location_campus", String),
+        Column("course_id", Integer),
+        Column("instructor_id", Integer),
+        Column("location_id", Integer),
+        Index("ix_schedule_staging_key", "student_id", "date", "start_time"),
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
+
+
+def _parse_schedule(record, line):
+    try:
+        return (
+            _required(record, "student_id", line),
+            date.fromisoformat(_required(record, "date", line)),
+            dtime.fromisoformat(_required(record, "start_time", line)),
+            dtime.fromisoformat(_required(record, "end_time", line)),
+            _required(record, "course_name", line),
+            _required(record, "instructor_name", line),
+            _required(record, "location", line),
+            _optional(record, "location_campus"),
+        )
+    except ValueError as exc:
+        if isinstance(exc, InvalidRecord):
+            raise
+        raise InvalidRecord(f"Registro {line}: {exc}") from exc
+
+
+def _copy_rows(conn, table, rows):
+    """COPY ... FROM STDIN con el cursor de psycopg2 de la misma transacción"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(SCHEDULE_FIELDS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _resolve_dimensions(conn, staging):
+    """Agrega los nombres nuevos a cada tabla de dimensión y completa sus ids en staging"""
+    dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+    for model, name_column, id_column in DIMENSIONS:
+        table = model.__table__
+        names = staging.c[name_column]
+        conn.execute(
+            dialect.insert(table)
+            .from_select(["name"], select(names).distinct().where(~exists().where(table.c.name == names)))
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        conn.execute(update(staging).values({id_column: table.c.id}).where(table.c.name == names))
+
+    # Sede de cada aula: la del archivo, si la trae, reemplaza la guardada
+    locations = Location.__table__
+    given = and_(staging.c.location == locations.c.name, staging.c.location_campus.is_not(None))
+    conn.execute(
+        update(locations)
+        .values(campus=select(staging.c.location_campus).where(given).limit(1).scalar_subquery())
+        .where(exists().where(given, staging.c.location_campus.is_distinct_from(locations.c.campus)))
+    )
+
+
+def import_schedule(conn, records, chunk_size=DEFAULT_CHUNK_SIZE, term_start=None, term_end=None,
+                    report=print):
+    """Reemplaza el horario del periodo para los estudiantes presentes en la entrada"""
+    staging = _staging_table()
+    use_copy = conn.dialect.name == "postgresql"
+    if not use_copy:
+        # En SQLite la tabla temporal vive lo que la conexión del pool, no la transacción
+        staging.drop(conn, checkfirst=True)
+    staging.create(conn)
+
+    total = 0
+    started = time.perf_counter()
+    for chunk in chunked(records, chunk_size):
+        rows = [_parse_schedule(record, line) for line, record in enumerate(chunk, start=total + 1)]
+        if use_copy:
+            _copy_rows(conn, staging, rows)
+        else:
+            conn.execute(insert(staging), [dict(zip(SCHEDULE_FIELDS, row)) for row in rows])
+        total += len(rows)
+        report(f"  {total} filas en staging ({total / (time.perf_counter() - started):,.0f} filas/s)")
+
+    if total == 0:
+        return 0, 0
+
+    _resolve_dimensions(conn, staging)
+
+    if term_start is None or term_end is None:
+        first, last = conn.execute(select(func.min(staging.c.date), func.max(staging.c.date))).one()
+        term_start = term_start or first
+        term_end = term_end or last
+
+    # Diferencia contra lo ya cargado: las clases idénticas se conservan (misma id y versión),
+    # las que no están en el archivo se borran con tombstone y solo se insertan las nuevas
+    entries = ScheduleEntry.__table__
+    version = next_version(conn)
+    same_entry = and_(*(staging.c[field] == entries.c[field] for field in ENTRY_FIELDS))
+    removed = and_(
+        entries.c.student_id.in_(select(staging.c.student_id).distinct()),
+        entries.c.date >= term_start,
+        entries.c.date <= term_end,
+        ~exists().where(same_entry),
+    )
+    conn.execute(
+        insert(SyncTombstone.__table__).from_select(
+            ["student_id", "entity", "entity_id", "version", "date"],
+            select(
+                entries.c.student_id, literal(entries.name), entries.c.id, literal(version, BigInteger),
+                entries.c.date,
+            ).where(removed),
+        )
+    )
+    deleted = conn.execute(delete(entries).where(removed)).rowcount
+
+    columns = [staging.c[field] for field in ENTRY_FIELDS]
+    conn.execute(
+        insert(entries).from_select(
+            list(ENTRY_FIELDS) + ["updated_at", "version"],
+            select(*columns, literal(utcnow(), DateTime), literal(version, BigInteger)).where(
+                staging.c.date >= term_start,
+                staging.c.date <= term_end,
+                ~exists().where(same_entry),
+            ),
+        )
+    )
+    if not use_copy:
+        staging.drop(conn)
+    return total, deleted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importador masivo de estudiantes y horarios")
+    parser.add_argument("kind", choices=["students", "schedule"])
+    parser.add_argument("path", help="archivo CSV/NDJSON o '-' para stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--term-start", type=date.fromisoformat, default=None)
+    parser.add_argument("--term-end", type=date.fromisoformat, default=None)
+    args = parser.parse_args(argv)
+
+    records = read_records(args.path, args.format)
+    started = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            if args.kind == "students":
+                total = import_students(conn, records, args.chunk_size)
+                summary = f"{total} estudiantes importados"
+            else:
+                total, deleted = import_schedule(
+                    conn, records, args.chunk_size, args.term_start, args.term_end
+                )
+                summary = f"{total} clases importadas ({deleted} eliminadas)"
+    except InvalidRecord as exc:
+        print(f"Error de importación: {exc}")
+        return 1
+    elapsed = time.perf_counter() - started
+    print(f"{summary} en {elapsed:.1f} s ({total / elapsed if elapsed else 0:,.0f} filas/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
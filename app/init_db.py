@@ -8,13 +8,14 @@ root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 
 from app.database import SessionLocal, engine
-from app.models import Base, Student, PersonalData, CareerData, ScheduleEntry
-import bcrypt
+from app.models import Student, PersonalData, CareerData, ScheduleEntry, Course, Instructor, Location
+from app import migrations
+from app.passwords import hash_password_blocking
 from datetime import date, time
 
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
     
     db = SessionLocal()
     
@@ -24,7 +25,7 @@ def init_db():
             return
         
         password = "password123"
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        password_hash = hash_password_blocking(password)
         student = Student(
             id="001234567",
             password_hash=password_hash,
@@ -52,42 +53,50 @@ def init_db():
         )
         db.add(career_data)
         
+        # Un objeto por nombre: cada curso, instructor y aula se inserta una sola vez
+        courses = {name: Course(name=name) for name in ("SEMINARIO COMPLEMENT PRÁCT I", "DESARROLLO HUMANO")}
+        instructors = {
+            name: Instructor(name=name)
+            for name in ("GARCIA FORTUNA, MOISES EDUARDO", "OLAZA GARIBAY, JENNY ROSARIO")
+        }
+        locations = {name: Location(name=name) for name in ("IND - TORRE B 60TB - 200", "IND - TORRE C 60TC - 504")}
+
         schedule_entries = [
             ScheduleEntry(
                 student_id=student.id,
                 date=date(2024, 1, 28),  
                 start_time=time(7, 0),
                 end_time=time(10, 0),
-                course_name="SEMINARIO COMPLEMENT PRÁCT I",
-                instructor_name="GARCIA FORTUNA, MOISES EDUARDO",
-                location="IND - TORRE B 60TB - 200"
+                course=courses["SEMINARIO COMPLEMENT PRÁCT I"],
+                instructor=instructors["GARCIA FORTUNA, MOISES EDUARDO"],
+                location=locations["IND - TORRE B 60TB - 200"]
             ),
             ScheduleEntry(
                 student_id=student.id,
                 date=date(2024, 1, 28),
                 start_time=time(10, 15),
                 end_time=time(13, 15),
-                course_name="SEMINARIO COMPLEMENT PRÁCT I",
-                instructor_name="GARCIA FORTUNA, MOISES EDUARDO",
-                location="IND - TORRE B 60TB - 200"
+                course=courses["SEMINARIO COMPLEMENT PRÁCT I"],
+                instructor=instructors["GARCIA FORTUNA, MOISES EDUARDO"],
+                location=locations["IND - TORRE B 60TB - 200"]
             ),
             ScheduleEntry(
                 student_id=student.id,
                 date=date(2024, 1, 28),
                 start_time=time(14, 0),
                 end_time=time(15, 30),
-                course_name="DESARROLLO HUMANO",
-                instructor_name="OLAZA GARIBAY, JENNY ROSARIO",
-                location="IND - TORRE C 60TC - 504"
+                course=courses["DESARROLLO HUMANO"],
+                instructor=instructors["OLAZA GARIBAY, JENNY ROSARIO"],
+                location=locations["IND - TORRE C 60TC - 504"]
             ),
             ScheduleEntry(
                 student_id=student.id,
                 date=date(2024, 1, 28),
                 start_time=time(15, 45),
                 end_time=time(17, 15),
-                course_name="DESARROLLO HUMANO",
-                instructor_name="OLAZA GARIBAY, JENNY ROSARIO",
-                location="IND - TORRE C 60TC - 504"
+                course=courses["DESARROLLO HUMANO"],
+                instructor=instructors["OLAZA GARIBAY, JENNY ROSARIO"],
+                location=locations["IND - TORRE C 60TC - 504"]
             ),
         ]
         
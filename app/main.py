@@ -1,16 +1,43 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, students, schedule
-from app.database import engine, Base
+from app.routers import auth, students, schedule, sync, occupancy, diagnostics
+from app import (
+    compression, concurrency, database, forwarding, metrics, passwords, read_cache, snapshots, sync_data,
+)
+from app.occupancy import OCCUPANCY_REFRESH_SECONDS, run_refresher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Tareas de fondo del worker mientras atiende solicitudes"""
+    tasks = [asyncio.create_task(sync_data.run_clock(database.async_engine))]
+    if read_cache.READ_CACHE_POLL_SECONDS > 0:
+        tasks.append(asyncio.create_task(read_cache.run_watcher()))
+    if OCCUPANCY_REFRESH_SECONDS > 0:
+        tasks.append(asyncio.create_task(run_refresher()))
+    if snapshots.SNAPSHOT_ENABLED:
+        tasks.append(asyncio.create_task(snapshots.run_scheduler()))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
 
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="SENATI Backend API",
     description="API backend para la aplicación móvil SENATI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+# El más interno: un 503 por saturación sale igual con CORS, comprimido y medido
+app.add_middleware(concurrency.ConcurrencyLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], 
@@ -19,9 +46,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(compression.CompressionMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+# El más externo: todo lo demás ve la IP del cliente, no la del proxy
+app.add_middleware(forwarding.ForwardedClientMiddleware)
+
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(students.router, prefix="/api/students", tags=["Students"])
 app.include_router(schedule.router, prefix="/api/schedule", tags=["Schedule"])
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
+app.include_router(occupancy.router, prefix="/api/occupancy", tags=["Occupancy"])
+app.include_router(diagnostics.router, prefix="/api/diagnostics", tags=["Diagnostics"])
 
 @app.get("/")
 async def root():
@@ -30,5 +65,27 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    """Estado del worker; 503 si sus pools están saturados para que el balanceador lo drene"""
+    await database.refresh_replicas()
+    password_pool = passwords.pool.stats()
+    primary = database.pool_stats(database.async_engine)
+    saturated = (
+        primary.get("saturated", False)
+        or password_pool["queue_depth"] >= password_pool["queue_limit"]
+        or concurrency.limiter.saturated
+    )
+    content = {
+        "status": "saturated" if saturated else "healthy",
+        "requests": concurrency.limiter.stats(),
+        "password_pool": password_pool,
+        "database": {
+            "primary": primary,
+            "replicas": [replica.stats() for replica in database.replicas],
+        },
+    }
+    return JSONResponse(content, status_code=503 if saturated else 200)
+
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,306 @@
+"""
+Métricas en formato de texto de Prometheus: latencia por ruta, solicitudes
+en curso, códigos de estado y uso de la base de datos por solicitud
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+
+from app import passwords
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_request_db = contextvars.ContextVar("request_db", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.collect = collect
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        values = self.collect() if self.collect else list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Gauge:
+    """Gauge con valor propio o calculado al momento de exportar"""
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.collect = collect
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount=1.0):
+        self.inc(*labels, amount=-amount)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        values = self.collect() if self.collect else list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "senati_http_requests_total", "Solicitudes HTTP atendidas", ("method", "route", "status")
+))
+http_latency = registry.register(Histogram(
+    "senati_http_request_duration_seconds", "Latencia de las solicitudes HTTP", ("method", "route")
+))
+http_in_flight = registry.register(Gauge(
+    "senati_http_requests_in_flight", "Solicitudes HTTP en curso"
+))
+db_statements = registry.register(Counter(
+    "senati_db_statements_total", "Sentencias SQL ejecutadas", ("engine",)
+))
+db_statement_latency = registry.register(Histogram(
+    "senati_db_statement_duration_seconds", "Duración de cada sentencia SQL", ("engine",), DB_BUCKETS
+))
+db_time_per_request = registry.register(Histogram(
+    "senati_db_time_per_request_seconds", "Tiempo total en la base de datos por solicitud", ("route",),
+    DB_BUCKETS
+))
+db_statements_per_request = registry.register(Histogram(
+    "senati_db_statements_per_request", "Sentencias SQL por solicitud", ("route",), COUNT_BUCKETS
+))
+db_checkout_wait = registry.register(Histogram(
+    "senati_db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool", ("engine",),
+    DB_BUCKETS
+))
+
+_pools = {}  # nombre -> motor; el pool se lee en cada recolección porque dispose() lo reemplaza
+
+
+def _collect_pool(attribute):
+    def collect():
+        values = []
+        for name, engine in _pools.items():
+            getter = getattr(engine.pool, attribute, None)
+            if callable(getter):
+                values.append(((name,), getter()))
+        return values
+    return collect
+
+
+registry.register(Gauge("senati_db_pool_size", "Tamaño configurado del pool", ("engine",), _collect_pool("size")))
+registry.register(Gauge(
+    "senati_db_pool_checked_out", "Conexiones en uso", ("engine",), _collect_pool("checkedout")
+))
+registry.register(Gauge(
+    "senati_db_pool_overflow", "Conexiones por encima del tamaño del pool", ("engine",), _collect_pool("overflow")
+))
+
+
+def _collect_password_pool(key):
+    return lambda: [((), passwords.pool.stats()[key])]
+
+
+registry.register(Gauge(
+    "senati_password_pool_queue_depth", "Trabajos de bcrypt esperando un worker", (),
+    _collect_password_pool("queue_depth")
+))
+registry.register(Gauge(
+    "senati_password_pool_in_flight", "Trabajos de bcrypt en cola o en ejecución", (),
+    _collect_password_pool("in_flight")
+))
+registry.register(Counter(
+    "senati_password_pool_rejected_total", "Trabajos de bcrypt rechazados por cola llena", (),
+    _collect_password_pool("rejected")
+))
+registry.register(Counter(
+    "senati_password_pool_hash_seconds_total", "Tiempo acumulado de hashing y verificación", (),
+    _collect_password_pool("hash_seconds_total")
+))
+
+
+def instrument_engine(engine, name: str):
+    """Registra hooks de SQLAlchemy para contar sentencias y tiempos
+
+    La espera del pool la mide la clase de timed_pool_class(), que se pasa como
+    poolclass al crear el motor.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        db_statements.inc(name)
+        db_statement_latency.observe(elapsed, name)
+        usage = _request_db.get()
+        if usage is not None:
+            usage[0] += 1
+            usage[1] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("metrics_started") if context.connection else None
+        if started:
+            started.pop()
+
+    _pools[name] = engine
+
+
+def timed_pool_class(base, name: str):
+    """Subclase de `base` que mide la espera de connect(), la entrada pública del pool
+
+    Se pasa como poolclass a create_engine: recreate() (p. ej. en engine.dispose())
+    conserva la clase y la medición.
+    """
+
+    class TimedPool(base):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            finally:
+                db_checkout_wait.observe(time.perf_counter() - start, name)
+
+    # /health y los reportes siguen mostrando la clase original (QueuePool, ...)
+    TimedPool.__name__ = TimedPool.__qualname__ = base.__name__
+    return TimedPool
+
+
+def route_label(scope) -> str:
+    """Plantilla de la ruta (/api/schedule/{student_id}) para no crear una serie por URL"""
+    template = getattr(scope.get("route"), "path_format", None)
+    if template is None:
+        return "unmatched"
+    path = scope.get("path", "")
+    try:
+        rendered = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    # Según la versión de FastAPI la plantilla puede no incluir el prefijo del router
+    if rendered != path and path.endswith(rendered):
+        return path[: len(path) - len(rendered)] + template
+    return template
+
+
+def current_request():
+    """Scope ASGI de la solicitud en curso (para diagnósticos); None fuera de una solicitud"""
+    usage = _request_db.get()
+    return usage[2] if usage is not None else None
+
+
+class MetricsMiddleware:
+    """Middleware ASGI de bajo costo: una medición de tiempo y unos contadores por solicitud"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        usage = [0, 0.0, scope]
+        token = _request_db.set(usage)
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec()
+            _request_db.reset(token)
+            route_name = route_label(scope)
+            method = scope["method"]
+            http_requests.inc(method, route_name, str(status_holder[0]))
+            http_latency.observe(elapsed, method, route_name)
+            db_time_per_request.observe(usage[1], route_name)
+            db_statements_per_request.observe(usage[0], route_name)
@@ -0,0 +1,37 @@
+"""
+Aplica las migraciones pendientes del esquema
+
+Uso:
+    python -m app.migrate            # migrar a la última versión
+    python -m app.migrate --status   # listar migraciones aplicadas y pendientes
+"""
+import argparse
+import sys
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app import migrations
+from app.database import engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migraciones del esquema de la base de datos")
+    parser.add_argument("--status", action="store_true", help="solo mostrar el estado")
+    parser.add_argument("--target", type=int, default=None, help="versión máxima a aplicar")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        for version, name, applied in migrations.status(engine):
+            print(f"{version:04d} {name:<40} {'aplicada' if applied else 'pendiente'}")
+        return 0
+
+    applied = migrations.upgrade(engine, target=args.target)
+    if not applied:
+        print("El esquema ya está actualizado.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Migraciones versionadas del esquema
+
+Cada módulo `vNNNN_descripcion.py` de este paquete define `upgrade(conn)`.
+Se aplican en orden, cada una en su propia transacción, y quedan registradas
+en la tabla schema_migrations. La aplicación web no ejecuta DDL al arrancar:
+se migra con `python -m app.migrate` antes de iniciar los workers.
+"""
+import importlib
+import pkgutil
+import re
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, insert, select, text
+
+from app.models import utcnow
+
+_MODULE_PATTERN = re.compile(r"^v(\d{4})_(\w+)$")
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def discover():
+    """[(versión, nombre, módulo)] ordenadas por versión"""
+    found = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_PATTERN.match(module_info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{module_info.name}")
+            found.append((int(match.group(1)), match.group(2), module))
+    return sorted(found, key=lambda item: item[0])
+
+
+def applied_versions(conn) -> set:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.scalars(select(schema_migrations.c.version)))
+
+
+def status(engine):
+    """[(versión, nombre, aplicada)] de todas las migraciones conocidas"""
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    return [(version, name, version in applied) for version, name, _ in discover()]
+
+
+def upgrade(engine, target: int = None, report=print):
+    """Aplica las migraciones pendientes hasta `target` (por defecto, todas)"""
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        applied = applied_versions(conn)
+
+    done = []
+    for version, name, module in discover():
+        if version in applied or (target is not None and version > target):
+            continue
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(insert(schema_migrations).values(version=version, name=name, applied_at=utcnow()))
+        report(f"Migración {version:04d} aplicada: {name}")
+        done.append(version)
+    return done
+
+
+# Utilidades para que las migraciones sean idempotentes sobre bases creadas
+# antes del control de versiones (con Base.metadata.create_all)
+
+def has_table(conn, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def has_column(conn, table: str, column: str) -> bool:
+    return any(info["name"] == column for info in inspect(conn).get_columns(table))
+
+
+def has_index(conn, table: str, index: str) -> bool:
+    return any(info["name"] == index for info in inspect(conn).get_indexes(table))
+
+
+def add_timestamp_column(conn, table: str, column: str):
+    """Agrega una columna TIMESTAMP NOT NULL inicializada con la hora actual"""
+    # SQLite no acepta CURRENT_TIMESTAMP como DEFAULT en ADD COLUMN: se usa una constante
+    column_type = DateTime().compile(dialect=conn.dialect)
+    conn.execute(text(
+        f"ALTER TABLE {table} ADD COLUMN {column} {column_type} NOT NULL DEFAULT '1970-01-01 00:00:00'"
+    ))
+    conn.execute(text(f"UPDATE {table} SET {column} = :now"), {"now": utcnow()})
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT"))
@@ -0,0 +1,50 @@
+"""
+Esquema inicial: students, personal_data, career_data y schedule_entries
+"""
+from sqlalchemy import Column, Date, ForeignKey, Integer, MetaData, String, Table, Time
+
+
+def upgrade(conn):
+    metadata = MetaData()
+    Table(
+        "students",
+        metadata,
+        Column("id", String, primary_key=True, index=True),
+        Column("password_hash", String, nullable=False),
+        Column("first_name", String, nullable=False),
+        Column("last_name", String, nullable=False),
+        Column("dni", String, unique=True, nullable=False),
+    )
+    Table(
+        "personal_data",
+        metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("student_id", String, ForeignKey("students.id"), unique=True, nullable=False),
+        Column("email", String, nullable=False),
+        Column("phone", String, nullable=True),
+        Column("address", String, nullable=True),
+    )
+    Table(
+        "career_data",
+        metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("student_id", String, ForeignKey("students.id"), unique=True, nullable=False),
+        Column("level", String, nullable=False),
+        Column("program", String, nullable=False),
+        Column("school", String, nullable=False),
+        Column("campus", String, nullable=False),
+    )
+    Table(
+        "schedule_entries",
+        metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("student_id", String, ForeignKey("students.id"), nullable=False),
+        Column("date", Date, nullable=False),
+        Column("start_time", Time, nullable=False),
+        Column("end_time", Time, nullable=False),
+        Column("course_name", String, nullable=False),
+        Column("instructor_name", String, nullable=False),
+        Column("location", String, nullable=False),
+    )
+    # checkfirst: las bases creadas antes con create_all adoptan esta versión sin cambios
+    metadata.create_all(conn, checkfirst=True)
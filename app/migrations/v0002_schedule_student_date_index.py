@@ -0,0 +1,13 @@
+"""
+Índice compuesto (student_id, date, start_time) para consultas por día y por rango
+"""
+from sqlalchemy import text
+
+from app.migrations import has_index
+
+INDEX = "ix_schedule_entries_student_date_start"
+
+
+def upgrade(conn):
+    if not has_index(conn, "schedule_entries", INDEX):
+        conn.execute(text(f"CREATE INDEX {INDEX} ON schedule_entries (student_id, date, start_time)"))
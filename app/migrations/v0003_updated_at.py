@@ -0,0 +1,12 @@
+"""
+Columna updated_at para los validadores ETag / Last-Modified
+"""
+from app.migrations import add_timestamp_column, has_column
+
+TABLES = ("students", "personal_data", "career_data", "schedule_entries")
+
+
+def upgrade(conn):
+    for table in TABLES:
+        if not has_column(conn, table, "updated_at"):
+            add_timestamp_column(conn, table, "updated_at")
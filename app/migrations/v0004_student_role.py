@@ -0,0 +1,11 @@
+"""
+Rol del usuario (student, instructor, admin) para las consultas masivas de horario
+"""
+from sqlalchemy import text
+
+from app.migrations import has_column
+
+
+def upgrade(conn):
+    if not has_column(conn, "students", "role"):
+        conn.execute(text("ALTER TABLE students ADD COLUMN role VARCHAR NOT NULL DEFAULT 'student'"))
@@ -0,0 +1,17 @@
+"""
+Índices (course_name, date) y (location, date) para la consulta masiva de horarios
+"""
+from sqlalchemy import text
+
+from app.migrations import has_index
+
+INDEXES = {
+    "ix_schedule_entries_course_date": "course_name, date",
+    "ix_schedule_entries_location_date": "location, date",
+}
+
+
+def upgrade(conn):
+    for index, columns in INDEXES.items():
+        if not has_index(conn, "schedule_entries", index):
+            conn.execute(text(f"CREATE INDEX {index} ON schedule_entries ({columns})"))
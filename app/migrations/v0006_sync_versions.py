@@ -0,0 +1,45 @@
+"""
+Seguimiento de cambios para la sincronización incremental: reloj global,
+columna version, tombstones e índices (student_id, version)
+"""
+from sqlalchemy import BigInteger, Column, Index, Integer, MetaData, String, Table, text
+
+from app.migrations import has_column, has_index
+
+TABLES = ("students", "personal_data", "career_data", "schedule_entries")
+
+
+def upgrade(conn):
+    metadata = MetaData()
+    clock = Table(
+        "sync_clock",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("version", BigInteger, nullable=False),
+    )
+    tombstones = Table(
+        "sync_tombstones",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("student_id", String, nullable=False),
+        Column("entity", String, nullable=False),
+        Column("entity_id", Integer, nullable=False),
+        Column("version", BigInteger, nullable=False),
+        Index("ix_sync_tombstones_student_version", "student_id", "version"),
+    )
+    metadata.create_all(conn, tables=[clock, tombstones], checkfirst=True)
+
+    # Las filas existentes quedan en la versión 1, la misma que el reloj
+    if conn.execute(text("SELECT COUNT(*) FROM sync_clock")).scalar() == 0:
+        conn.execute(text("INSERT INTO sync_clock (id, version) VALUES (1, 1)"))
+
+    version_type = BigInteger().compile(dialect=conn.dialect)
+    for table in TABLES:
+        if not has_column(conn, table, "version"):
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN version {version_type} NOT NULL DEFAULT 1"))
+            if conn.dialect.name == "postgresql":
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN version DROP DEFAULT"))
+        index = f"ix_{table}_student_version"
+        # students se consulta por clave primaria: no necesita índice de versión
+        if table != "students" and not has_index(conn, table, index):
+            conn.execute(text(f"CREATE INDEX {index} ON {table} (student_id, version)"))
@@ -0,0 +1,19 @@
+"""
+Tokens revocables para el calendario .ics
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+
+def upgrade(conn):
+    metadata = MetaData()
+    Table("students", metadata, Column("id", String, primary_key=True))
+    feed_tokens = Table(
+        "feed_tokens",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("student_id", String, ForeignKey("students.id"), nullable=False, index=True),
+        Column("token_hash", String, unique=True, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("revoked_at", DateTime, nullable=True),
+    )
+    feed_tokens.create(conn, checkfirst=True)
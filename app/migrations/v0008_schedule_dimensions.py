@@ -0,0 +1,112 @@
+"""
+Tablas courses, instructors y locations: schedule_entries guarda ids enteros
+en lugar de repetir los nombres en cada fila
+
+Los nombres existentes se copian sin duplicados a las tablas de dimensión. Las
+filas conservan id, updated_at y version: la respuesta no cambia, así que los
+clientes no tienen que volver a sincronizar.
+"""
+from sqlalchemy import (
+    BigInteger, Column, Date, DateTime, ForeignKey, Integer, MetaData, String, Table, Time, text,
+)
+
+from app.migrations import has_column
+
+# (tabla de dimensión, columna de nombre en schedule_entries, columna de id)
+DIMENSIONS = (
+    ("courses", "course_name", "course_id"),
+    ("instructors", "instructor_name", "instructor_id"),
+    ("locations", "location", "location_id"),
+)
+INDEXES = {
+    "ix_schedule_entries_course_date": "course_id, date",
+    "ix_schedule_entries_location_date": "location_id, date",
+}
+
+
+def _schedule_table(metadata, name):
+    return Table(
+        name,
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("student_id", String, ForeignKey("students.id"), nullable=False),
+        Column("date", Date, nullable=False),
+        Column("start_time", Time, nullable=False),
+        Column("end_time", Time, nullable=False),
+        Column("course_id", Integer, ForeignKey("courses.id"), nullable=False),
+        Column("instructor_id", Integer, ForeignKey("instructors.id"), nullable=False),
+        Column("location_id", Integer, ForeignKey("locations.id"), nullable=False),
+        Column("updated_at", DateTime, nullable=False),
+        Column("version", BigInteger, nullable=False),
+    )
+
+
+def _rebuild_sqlite(conn, metadata):
+    """SQLite no puede agregar NOT NULL ni FOREIGN KEY a una tabla existente: se reconstruye"""
+    rebuilt = _schedule_table(metadata, "schedule_entries_new")
+    rebuilt.create(conn)
+    joins = " ".join(
+        f"JOIN {table} ON {table}.name = schedule_entries.{name_column}"
+        for table, name_column, _ in DIMENSIONS
+    )
+    conn.execute(text(
+        "INSERT INTO schedule_entries_new "
+        "(id, student_id, date, start_time, end_time, course_id, instructor_id, location_id, updated_at, version) "
+        "SELECT schedule_entries.id, student_id, date, start_time, end_time, "
+        "courses.id, instructors.id, locations.id, updated_at, version "
+        f"FROM schedule_entries {joins}"
+    ))
+    conn.execute(text("DROP TABLE schedule_entries"))
+    conn.execute(text("ALTER TABLE schedule_entries_new RENAME TO schedule_entries"))
+    # DROP TABLE eliminó los índices de la tabla anterior
+    conn.execute(text("CREATE INDEX ix_schedule_entries_id ON schedule_entries (id)"))
+    conn.execute(text(
+        "CREATE INDEX ix_schedule_entries_student_date_start ON schedule_entries (student_id, date, start_time)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX ix_schedule_entries_student_version ON schedule_entries (student_id, version)"
+    ))
+
+
+def _alter_postgresql(conn):
+    for table, name_column, id_column in DIMENSIONS:
+        conn.execute(text(f"ALTER TABLE schedule_entries ADD COLUMN {id_column} INTEGER REFERENCES {table} (id)"))
+        conn.execute(text(
+            f"UPDATE schedule_entries SET {id_column} = {table}.id "
+            f"FROM {table} WHERE {table}.name = schedule_entries.{name_column}"
+        ))
+        conn.execute(text(f"ALTER TABLE schedule_entries ALTER COLUMN {id_column} SET NOT NULL"))
+        # Elimina también el índice (course_name, date) o (location, date) de la migración 0005
+        conn.execute(text(f"ALTER TABLE schedule_entries DROP COLUMN {name_column}"))
+
+
+def upgrade(conn):
+    metadata = MetaData()
+    Table("students", metadata, Column("id", String, primary_key=True))
+    dimensions = [
+        Table(
+            table,
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("name", String, unique=True, nullable=False),
+        )
+        for table, _, _ in DIMENSIONS
+    ]
+    metadata.create_all(conn, tables=dimensions, checkfirst=True)
+
+    if not has_column(conn, "schedule_entries", "course_name"):
+        return
+
+    for table, name_column, _ in DIMENSIONS:
+        conn.execute(text(
+            f"INSERT INTO {table} (name) SELECT DISTINCT {name_column} FROM schedule_entries "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {table}.name = schedule_entries.{name_column})"
+        ))
+
+    if conn.dialect.name == "sqlite":
+        _rebuild_sqlite(conn, metadata)
+    else:
+        _alter_postgresql(conn)
+
+    for index, columns in INDEXES.items():
+        conn.execute(text(f"CREATE INDEX {index} ON schedule_entries ({columns})"))
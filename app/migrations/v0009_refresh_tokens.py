@@ -0,0 +1,32 @@
+"""
+Tokens de renovación rotativos y revocaciones de tokens de acceso
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+
+def upgrade(conn):
+    metadata = MetaData()
+    Table("students", metadata, Column("id", String, primary_key=True))
+    refresh_tokens = Table(
+        "refresh_tokens",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("student_id", String, ForeignKey("students.id"), nullable=False, index=True),
+        Column("family_id", String, nullable=False, index=True),
+        Column("token_hash", String, unique=True, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("expires_at", DateTime, nullable=False),
+        Column("used_at", DateTime, nullable=True),
+        Column("revoked_at", DateTime, nullable=True),
+    )
+    token_revocations = Table(
+        "token_revocations",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("jti", String, nullable=True),
+        Column("student_id", String, nullable=True),
+        Column("revoked_at", DateTime, nullable=False, index=True),
+        Column("expires_at", DateTime, nullable=False),
+    )
+    refresh_tokens.create(conn, checkfirst=True)
+    token_revocations.create(conn, checkfirst=True)
@@ -0,0 +1,20 @@
+"""
+Versiones de sincronización desde una secuencia en PostgreSQL
+
+Con el reloj de una fila cada escritura bloqueaba esa fila hasta su commit y
+todas las transacciones con escrituras quedaban en fila. La secuencia arranca
+en el valor actual del reloj; sync_clock pasa a guardar la versión publicada.
+SQLite sigue con el reloj de una fila.
+"""
+from sqlalchemy import text
+
+from app.models import SYNC_VERSION_SEQUENCE
+
+
+def upgrade(conn):
+    if conn.dialect.name != "postgresql":
+        return
+    conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {SYNC_VERSION_SEQUENCE} AS BIGINT"))
+    conn.execute(text(
+        f"SELECT setval('{SYNC_VERSION_SEQUENCE}', GREATEST(COALESCE((SELECT version FROM sync_clock WHERE id = 1), 1), 1))"
+    ))
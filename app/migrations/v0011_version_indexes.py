@@ -0,0 +1,22 @@
+"""
+Índices por version para "qué cambió desde la versión X" en todos los estudiantes
+
+Los workers revisan el reloj de sincronización y, cuando avanza, buscan las
+filas nuevas para invalidar sus cachés; sin estos índices cada revisión
+recorrería las tablas completas.
+"""
+from sqlalchemy import text
+
+from app.migrations import has_index
+
+INDEXES = {
+    "ix_schedule_entries_version": "schedule_entries",
+    "ix_career_data_version": "career_data",
+    "ix_sync_tombstones_version": "sync_tombstones",
+}
+
+
+def upgrade(conn):
+    for index, table in INDEXES.items():
+        if not has_index(conn, table, index):
+            conn.execute(text(f"CREATE INDEX {index} ON {table} (version)"))
@@ -0,0 +1,28 @@
+"""
+Datos para mantener el índice de ocupación por cambios: sede de cada aula,
+fecha de las clases borradas (tombstones) e índice por fecha de schedule_entries
+
+La sede de las aulas existentes se completa con el prefijo de su nombre, que
+era como se deducía hasta ahora; desde aquí la trae el archivo del importador.
+"""
+from sqlalchemy import Date, text
+
+from app.migrations import has_column, has_index
+
+
+def upgrade(conn):
+    if not has_column(conn, "locations", "campus"):
+        conn.execute(text("ALTER TABLE locations ADD COLUMN campus VARCHAR"))
+        rooms = conn.execute(text("SELECT id, name FROM locations")).all()
+        if rooms:
+            conn.execute(
+                text("UPDATE locations SET campus = :campus WHERE id = :id"),
+                [{"id": key, "campus": name.split(" - ", 1)[0].strip()} for key, name in rooms],
+            )
+
+    if not has_column(conn, "sync_tombstones", "date"):
+        # Solo las de schedule_entries; las anteriores quedan en NULL
+        conn.execute(text(f"ALTER TABLE sync_tombstones ADD COLUMN date {Date().compile(dialect=conn.dialect)}"))
+
+    if not has_index(conn, "schedule_entries", "ix_schedule_entries_date"):
+        conn.execute(text("CREATE INDEX ix_schedule_entries_date ON schedule_entries (date)"))
@@ -1,7 +1,66 @@
-from sqlalchemy import Column, Integer, String, Date, Time, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    BigInteger, Column, Integer, String, Date, DateTime, Time, ForeignKey, Text, Index,
+    event, insert, select, text, update,
+)
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session, object_session, relationship
 from app.database import Base
-import bcrypt
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Solo PostgreSQL: la creó la migración 0010 a partir del valor de sync_clock
+SYNC_VERSION_SEQUENCE = "sync_version_seq"
+
+
+def next_version(connection) -> int:
+    """Siguiente versión de sincronización, en la transacción de `connection`"""
+    if connection.dialect.name == "postgresql":
+        return sequence_next_version(connection)
+    return clock_next_version(connection)
+
+
+def sequence_next_version(connection) -> int:
+    """Versión tomada de una secuencia: los escritores no se esperan entre sí
+
+    Una secuencia no confirma en orden: el reloj publicado lo avanza
+    sync_data.ClockAdvancer cuando terminan las transacciones que tomaron
+    números menores. El WHERE asigna el id de transacción antes de nextval,
+    para que esta transacción figure en el snapshot que revisa el avance.
+    """
+    return connection.execute(text(
+        f"SELECT nextval('{SYNC_VERSION_SEQUENCE}') WHERE pg_current_xact_id() IS NOT NULL"
+    )).scalar_one()
+
+
+def clock_next_version(connection) -> int:
+    """Versión tomada del reloj de una fila (SQLite, que ya serializa a los escritores)"""
+    # El UPDATE bloquea la fila del reloj hasta el commit: las versiones se confirman
+    # en orden creciente y un cursor de sincronización nunca salta un cambio
+    clock = SyncClock.__table__
+    bump = update(clock).where(clock.c.id == 1).values(version=clock.c.version + 1)
+    if connection.dialect.update_returning:
+        # Un solo viaje a la base (SQLite >= 3.35)
+        version = connection.execute(bump.returning(clock.c.version)).scalar_one_or_none()
+        if version is not None:
+            return version
+    elif connection.execute(bump).rowcount:
+        return connection.execute(select(clock.c.version).where(clock.c.id == 1)).scalar_one()
+    connection.execute(insert(clock).values(id=1, version=1))
+    return 1
+
+
+def _next_version(context):
+    """Default de las sentencias fuera del flush (Core, update() masivos): una versión por sentencia
+
+    En un executemany el contexto es el mismo para todas las filas.
+    """
+    version = getattr(context, "sync_version", None)
+    if version is None:
+        version = context.sync_version = next_version(context.connection)
+    return version
 
 
 class Student(Base):
@@ -12,30 +71,42 @@ class Student(Base):
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     dni = Column(String, unique=True, nullable=False)
+    role = Column(String, nullable=False, default="student", server_default="student")  # student | instructor | admin
+    updated_at = Column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    version = Column(BigInteger, nullable=False, default=_next_version, onupdate=_next_version)
     
 
     personal_data = relationship("PersonalData", back_populates="student", uselist=False)
     career_data = relationship("CareerData", back_populates="student", uselist=False)
-    schedule_entries = relationship("ScheduleEntry", back_populates="student")
-
-    def verify_password(self, password: str) -> bool:
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+    schedule_entries = relationship(
+        "ScheduleEntry",
+        back_populates="student",
+        order_by="[ScheduleEntry.date, ScheduleEntry.start_time]",
+    )
 
 
 class PersonalData(Base):
     __tablename__ = "personal_data"
+    __table_args__ = (Index("ix_personal_data_student_version", "student_id", "version"),)
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(String, ForeignKey("students.id"), unique=True, nullable=False)
     email = Column(String, nullable=False)
     phone = Column(String, nullable=True)
     address = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    version = Column(BigInteger, nullable=False, default=_next_version, onupdate=_next_version)
     
     student = relationship("Student", back_populates="personal_data")
 
 
 class CareerData(Base):
     __tablename__ = "career_data"
+    __table_args__ = (
+        Index("ix_career_data_student_version", "student_id", "version"),
+        # Cambios de todos los estudiantes desde una versión (invalidación entre procesos)
+        Index("ix_career_data_version", "version"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(String, ForeignKey("students.id"), unique=True, nullable=False)
@@ -43,22 +114,172 @@ class CareerData(Base):
     program = Column(String, nullable=False) 
     school = Column(String, nullable=False) 
     campus = Column(String, nullable=False) 
+    updated_at = Column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    version = Column(BigInteger, nullable=False, default=_next_version, onupdate=_next_version)
     
   
     student = relationship("Student", back_populates="career_data")
 
 
+class Course(Base):
+    __tablename__ = "courses"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class Instructor(Base):
+    __tablename__ = "instructors"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class Location(Base):
+    __tablename__ = "locations"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    campus = Column(String)  # sede del aula (p. ej. "IND"), para buscar aulas libres por sede
+
+
 class ScheduleEntry(Base):
     __tablename__ = "schedule_entries"
+    __table_args__ = (
+        # Cubre la consulta por estudiante y rango de fechas ya ordenada por día y hora
+        Index("ix_schedule_entries_student_date_start", "student_id", "date", "start_time"),
+        # Consultas masivas por curso o por aula en un rango de fechas
+        Index("ix_schedule_entries_course_date", "course_id", "date"),
+        Index("ix_schedule_entries_location_date", "location_id", "date"),
+        # "Cambios desde la versión X del estudiante Y": recorrido de rango para la sincronización
+        Index("ix_schedule_entries_student_version", "student_id", "version"),
+        Index("ix_schedule_entries_version", "version"),
+        # Sesiones de los días que cambiaron (índice de ocupación)
+        Index("ix_schedule_entries_date", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(String, ForeignKey("students.id"), nullable=False)
     date = Column(Date, nullable=False)
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
-    course_name = Column(String, nullable=False)
-    instructor_name = Column(String, nullable=False)
-    location = Column(String, nullable=False) 
+    # Los nombres se repiten en cada fila de una sección: se guardan una vez en tablas de dimensión
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    instructor_id = Column(Integer, ForeignKey("instructors.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    version = Column(BigInteger, nullable=False, default=_next_version, onupdate=_next_version)
     
     student = relationship("Student", back_populates="schedule_entries")
+    course = relationship("Course")
+    instructor = relationship("Instructor")
+    location = relationship("Location")
+
+
+class FeedToken(Base):
+    """Token revocable para suscribirse al horario en formato .ics sin JWT"""
+    __tablename__ = "feed_tokens"
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(String, ForeignKey("students.id"), nullable=False, index=True)
+    token_hash = Column(String, unique=True, nullable=False)  # SHA-256: el token no se guarda
+    created_at = Column(DateTime, nullable=False, default=utcnow)
+    revoked_at = Column(DateTime, nullable=True)
+
+
+class RefreshToken(Base):
+    """Token de renovación opaco: se guarda como hash y se reemplaza en cada uso"""
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(String, ForeignKey("students.id"), nullable=False, index=True)
+    # Todas las rotaciones que descienden de un mismo login; el cierre de sesión revoca la familia
+    family_id = Column(String, nullable=False, index=True)
+    token_hash = Column(String, unique=True, nullable=False)  # SHA-256: el token no se guarda
+    created_at = Column(DateTime, nullable=False, default=utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+
+
+class TokenRevocation(Base):
+    """Token de acceso revocado (jti) o corte por estudiante: sus tokens emitidos hasta revoked_at"""
+    __tablename__ = "token_revocations"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String, nullable=True)
+    student_id = Column(String, nullable=True)
+    revoked_at = Column(DateTime, nullable=False, default=utcnow, index=True)
+    # Pasada esta fecha ningún token afectado sigue vigente y la fila se puede borrar
+    expires_at = Column(DateTime, nullable=False)
+
+
+class SyncClock(Base):
+    """Mayor versión confirmada (una sola fila): hasta ahí llegan los cursores de sincronización
+
+    En SQLite cada escritura la incrementa; en PostgreSQL las versiones salen de
+    una secuencia y la fila solo la avanza sync_data.ClockAdvancer.
+    """
+    __tablename__ = "sync_clock"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+
+
+class SyncTombstone(Base):
+    """Registro de una fila eliminada, para que los clientes la borren al sincronizar"""
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        Index("ix_sync_tombstones_student_version", "student_id", "version"),
+        Index("ix_sync_tombstones_version", "version"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(String, nullable=False)
+    entity = Column(String, nullable=False)  # schedule_entries | personal_data | career_data
+    entity_id = Column(Integer, nullable=False)
+    version = Column(BigInteger, nullable=False)
+    date = Column(Date)  # fecha de la clase borrada (solo schedule_entries)
+
+
+# Una versión por flush: todas las filas escritas o borradas en él la comparten, así
+# que un flush de N filas toma un solo nextval (o una sola subida del reloj en SQLite)
+_FLUSH_VERSION = "sync_version"
+_VERSIONED_MODELS = (Student, PersonalData, CareerData, ScheduleEntry)
+_TOMBSTONE_MODELS = (PersonalData, CareerData, ScheduleEntry)
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_flush_version(session, flush_context, instances):
+    written = [instance for instance in session.new if isinstance(instance, _VERSIONED_MODELS)]
+    written += [
+        instance for instance in session.dirty
+        if isinstance(instance, _VERSIONED_MODELS) and session.is_modified(instance, include_collections=False)
+    ]
+    if not written and not any(isinstance(instance, _TOMBSTONE_MODELS) for instance in session.deleted):
+        return
+    version = next_version(session.connection())
+    session.info[_FLUSH_VERSION] = version
+    for instance in written:
+        instance.version = version
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _clear_flush_version(session, flush_context):
+    session.info.pop(_FLUSH_VERSION, None)
+
+
+def _record_tombstone(mapper, connection, target):
+    session = object_session(target)
+    version = session.info.get(_FLUSH_VERSION) if session is not None else None
+    connection.execute(insert(SyncTombstone.__table__).values(
+        student_id=target.student_id,
+        entity=target.__tablename__,
+        entity_id=target.id,
+        version=version or next_version(connection),
+        date=getattr(target, "date", None),
+    ))
+
 
+for _model in _TOMBSTONE_MODELS:
+    event.listen(_model, "after_delete", _record_tombstone)
@@ -0,0 +1,281 @@
+"""
+Índice en memoria de la ocupación de aulas e instructores
+
+Una clase de una sección se repite en schedule_entries una vez por estudiante:
+el índice guarda cada sesión (horario, aula, instructor, curso) una sola vez,
+agrupada por día y, dentro del día, por aula y por instructor, ordenada por
+hora de inicio y con el mayor fin acumulado de cada prefijo. "Qué aulas están
+libres" y "qué clases se cruzan" se responden con búsqueda binaria, sin
+recorrer la tabla.
+
+Una tarea del lifespan revisa el reloj de sincronización cada
+OCCUPANCY_REFRESH_SECONDS y, si avanzó, rearma solo los días de las filas y
+tombstones con versión posterior a la del índice. Las solicitudes leen el
+índice vigente; solo la primera de un worker sin índice lo arma completo.
+"""
+import asyncio
+import logging
+import os
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from itertools import accumulate
+
+from dotenv import load_dotenv
+from sqlalchemy import select, union
+
+from app import metrics
+from app.cache import CacheBackend, ReadThroughCache
+from app.database import read_session
+from app.dimensions import dimension_cache
+from app.models import Location, ScheduleEntry, SyncClock, SyncTombstone
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 0 desactiva la tarea: el índice se arma con la primera solicitud y no se actualiza
+OCCUPANCY_REFRESH_SECONDS = float(os.getenv("OCCUPANCY_REFRESH_SECONDS", "60"))
+
+# Sesión: (start_time, end_time, location_id, instructor_id, course_id)
+START, END, LOCATION_ID, INSTRUCTOR_ID, COURSE_ID = range(5)
+
+
+def session_rows(days=None):
+    """Sesiones distintas del horario, o solo de `days`: (date, start_time, end_time, location_id, instructor_id, course_id)"""
+    statement = select(
+        ScheduleEntry.date,
+        ScheduleEntry.start_time,
+        ScheduleEntry.end_time,
+        ScheduleEntry.location_id,
+        ScheduleEntry.instructor_id,
+        ScheduleEntry.course_id,
+    ).distinct()
+    if days is not None:
+        statement = statement.where(ScheduleEntry.date.in_(days))
+    return statement
+
+
+def changed_days(since: int):
+    """Días con clases insertadas, modificadas o borradas después de la versión `since`
+
+    Un tombstone anterior a la migración 0012 no tiene fecha: aparece como None.
+    """
+    return union(
+        select(ScheduleEntry.date).where(ScheduleEntry.version > since),
+        select(SyncTombstone.date).where(
+            SyncTombstone.entity == ScheduleEntry.__tablename__, SyncTombstone.version > since
+        ),
+    )
+
+
+class Timeline:
+    """Sesiones de un aula o de un instructor en un día"""
+    __slots__ = ("sessions", "starts", "reach")
+
+    def __init__(self, sessions):
+        sessions.sort()
+        self.sessions = sessions
+        self.starts = [session[START] for session in sessions]
+        # reach[i]: mayor hora de fin entre las sesiones 0..i
+        self.reach = list(accumulate((session[END] for session in sessions), max))
+
+    def is_free(self, start, end) -> bool:
+        before = bisect_left(self.starts, end)
+        return before == 0 or self.reach[before - 1] <= start
+
+    def overlapping(self, start, end):
+        """Sesiones que se cruzan con [start, end)"""
+        index = bisect_left(self.starts, end)
+        found = []
+        # Hacia atrás solo mientras alguna sesión anterior termine después de `start`
+        while index > 0 and self.reach[index - 1] > start:
+            index -= 1
+            if self.sessions[index][END] > start:
+                found.append(self.sessions[index])
+        found.reverse()
+        return found
+
+    def conflicts(self):
+        """Pares de sesiones distintas que se cruzan, en orden de inicio"""
+        pairs = []
+        for index, session in enumerate(self.sessions):
+            for other in self.sessions[index + 1:]:
+                if other[START] >= session[END]:
+                    break
+                pairs.append((session, other))
+        return pairs
+
+
+class DayOccupancy:
+    """Sesiones de un día por aula y por instructor"""
+    __slots__ = ("by_location", "by_instructor", "sessions")
+
+    def __init__(self, sessions):
+        by_location, by_instructor = defaultdict(list), defaultdict(list)
+        for session in sessions:
+            by_location[session[LOCATION_ID]].append(session)
+            by_instructor[session[INSTRUCTOR_ID]].append(session)
+        self.by_location = {key: Timeline(found) for key, found in by_location.items()}
+        self.by_instructor = {key: Timeline(found) for key, found in by_instructor.items()}
+        self.sessions = len(sessions)
+
+
+def index_days(rows) -> dict:
+    """Filas de session_rows() -> {día: DayOccupancy}"""
+    by_day = defaultdict(list)
+    for day, *session in rows:
+        by_day[day].append(tuple(session))
+    return {day: DayOccupancy(sessions) for day, sessions in by_day.items()}
+
+
+class OccupancySnapshot:
+    """Índice inmutable de una versión del horario; una actualización arma otro que comparte los días sin cambios"""
+
+    def __init__(self, days, version, campuses):
+        self.days = days
+        self.version = version
+        self.sessions = sum(occupancy.sessions for occupancy in days.values())
+
+        _, instructors, locations = dimension_cache.tables
+        self.location_ids = {name: key for key, name in locations.items()}
+        self.instructor_ids = {name: key for key, name in instructors.items()}
+        self.campus_locations = defaultdict(list)
+        for key in sorted(campuses, key=lambda key: locations[key]):
+            self.campus_locations[campuses[key]].append(key)
+
+    def replace_days(self, changed, rows, version, campuses) -> "OccupancySnapshot":
+        """Otro snapshot con los días `changed` rearmados desde `rows` (un día sin filas desaparece)"""
+        days = {day: occupancy for day, occupancy in self.days.items() if day not in changed}
+        days.update(index_days(rows))
+        return OccupancySnapshot(days, version, campuses)
+
+    def free_locations(self, day, start, end, campus=None):
+        """Ids de las aulas (de la sede, si se indica) sin ninguna sesión que se cruce con [start, end)"""
+        if campus is None:
+            candidates = [key for keys in self.campus_locations.values() for key in keys]
+        else:
+            candidates = self.campus_locations.get(campus, ())
+        occupancy = self.days.get(day)
+        timelines = occupancy.by_location if occupancy is not None else {}
+        free = []
+        for key in candidates:
+            timeline = timelines.get(key)
+            if timeline is None or timeline.is_free(start, end):
+                free.append(key)
+        return free
+
+    def instructor_sessions(self, instructor_id, day, start, end):
+        """Sesiones del instructor que se cruzan con [start, end)"""
+        occupancy = self.days.get(day)
+        timeline = occupancy.by_instructor.get(instructor_id) if occupancy is not None else None
+        return timeline.overlapping(start, end) if timeline is not None else []
+
+    def conflicts(self, start_date, end_date, instructor_id=None, location_id=None, limit=None):
+        """(tipo, id, día, sesión, sesión) de cada cruce de un instructor o de un aula en el rango
+
+        Con `limit` se detiene apenas reúne esa cantidad, en el mismo orden (día, hora de inicio, tipo).
+        """
+        scopes = []
+        if instructor_id is not None or location_id is None:
+            scopes.append(("instructor", "by_instructor", instructor_id))
+        if location_id is not None or instructor_id is None:
+            scopes.append(("location", "by_location", location_id))
+
+        found = []
+        for offset in range((end_date - start_date).days + 1):
+            day = start_date + timedelta(days=offset)
+            occupancy = self.days.get(day)
+            if occupancy is None:
+                continue
+            day_found = []
+            for kind, attribute, key in scopes:
+                timelines = getattr(occupancy, attribute)
+                selected = timelines.items() if key is None else [(key, timelines.get(key))]
+                for key, timeline in selected:
+                    if timeline is not None:
+                        day_found += [(kind, key, day, first, second) for first, second in timeline.conflicts()]
+            day_found.sort(key=lambda conflict: (conflict[3][START], conflict[0]))
+            found += day_found
+            if limit is not None and len(found) >= limit:
+                return found[:limit]
+        return found
+
+
+class OccupancyIndex:
+    """Snapshot vigente del índice; las actualizaciones simultáneas comparten una pasada"""
+
+    def __init__(self):
+        self.builds = 0
+        self.updates = 0
+        self._snapshot = None
+        self._refreshes = ReadThroughCache("occupancy", CacheBackend(), ttl=0)
+
+    @property
+    def sessions(self) -> int:
+        return self._snapshot.sessions if self._snapshot is not None else 0
+
+    async def current(self, db) -> OccupancySnapshot:
+        if self._snapshot is None:
+            await self.refresh(db)
+        return self._snapshot
+
+    async def refresh(self, db):
+        await self._refreshes.get_or_load("", (), lambda: self._refresh(db))
+
+    async def _refresh(self, db):
+        # Toda escritura del horario (ORM o importador) avanza el reloj de sincronización.
+        # Se lee antes que las filas: un cambio intermedio vuelve a aplicarse en la próxima pasada
+        version = (await db.execute(select(SyncClock.version))).scalar() or 0
+        snapshot = self._snapshot
+        if snapshot is not None and version == snapshot.version:
+            return
+        changed = None
+        if snapshot is not None:
+            changed = set((await db.execute(changed_days(snapshot.version))).scalars())
+            if None in changed:
+                changed = None
+        # El reloj también avanza por cambios que no son del horario (datos de carrera, por ejemplo)
+        rows = (await db.execute(session_rows(changed))).all() if changed != set() else []
+        campuses = dict((await db.execute(select(Location.id, Location.campus))).all())
+        await dimension_cache.ensure(db, (
+            {row[5] for row in rows}, {row[4] for row in rows}, {row[3] for row in rows} | campuses.keys(),
+        ))
+        if changed is None:
+            self._snapshot = OccupancySnapshot(index_days(rows), version, campuses)
+            self.builds += 1
+        else:
+            self._snapshot = snapshot.replace_days(changed, rows, version, campuses)
+            self.updates += 1
+
+    def clear(self):
+        self._snapshot = None
+
+
+occupancy_index = OccupancyIndex()
+
+
+async def run_refresher(index: OccupancyIndex = occupancy_index):
+    """Bucle del lifespan: una revisión cada OCCUPANCY_REFRESH_SECONDS hasta que se cancela"""
+    while True:
+        try:
+            async with read_session() as db:
+                await index.refresh(db)
+        except Exception:
+            # Las solicitudes siguen respondiendo con el último índice armado
+            logger.exception("Fallo al actualizar el índice de ocupación")
+        await asyncio.sleep(OCCUPANCY_REFRESH_SECONDS)
+
+
+metrics.registry.register(metrics.Counter(
+    "senati_occupancy_builds_total", "Construcciones completas del índice de ocupación", (),
+    lambda: [((), occupancy_index.builds)]
+))
+metrics.registry.register(metrics.Counter(
+    "senati_occupancy_updates_total", "Actualizaciones del índice de ocupación con solo los días que cambiaron", (),
+    lambda: [((), occupancy_index.updates)]
+))
+metrics.registry.register(metrics.Gauge(
+    "senati_occupancy_sessions", "Sesiones distintas en el índice de ocupación", (),
+    lambda: [((), occupancy_index.sessions)]
+))
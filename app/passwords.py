@@ -0,0 +1,132 @@
+"""
+Hashing y verificación de contraseñas en un pool acotado fuera del event loop
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PASSWORD_POOL_KIND = os.getenv("PASSWORD_POOL_KIND", "thread")  # thread | process
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_POOL_QUEUE_LIMIT = int(os.getenv("PASSWORD_POOL_QUEUE_LIMIT", "64"))
+PASSWORD_POOL_RETRY_AFTER = int(os.getenv("PASSWORD_POOL_RETRY_AFTER", "1"))
+
+
+class PasswordPoolSaturated(Exception):
+    """La cola del pool de contraseñas alcanzó su límite"""
+
+
+def _timed(fn, *args):
+    # Se ejecuta en el worker: mide solo el tiempo de CPU de bcrypt, no la espera en cola
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+# bcrypt se importa en el worker: no suma al tiempo de arranque de la aplicación
+def _hash(password: str) -> str:
+    import bcrypt
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def _check(password: str, password_hash: str) -> bool:
+    import bcrypt
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+class PasswordPool:
+    """Pool de workers con un límite de trabajos pendientes (backpressure)"""
+
+    def __init__(self, kind: str, workers: int, queue_limit: int):
+        self.kind = kind
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.operations = 0
+        self.rejected = 0
+        self.hash_seconds = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    executor_class = ProcessPoolExecutor if self.kind == "process" else ThreadPoolExecutor
+                    self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    def _reserve(self):
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise PasswordPoolSaturated()
+            self._in_flight += 1
+
+    def _release(self, elapsed: float):
+        with self._lock:
+            self._in_flight -= 1
+            self.operations += 1
+            self.hash_seconds += elapsed
+
+    def submit(self, fn, *args):
+        """Encola un trabajo; lanza PasswordPoolSaturated si la cola está llena"""
+        self._reserve()
+        try:
+            future = self._get_executor().submit(_timed, fn, *args)
+        except BaseException:
+            self._release(0.0)
+            raise
+
+        def _done(f):
+            self._release(0.0 if f.exception() else f.result()[1])
+
+        future.add_done_callback(_done)
+        return future
+
+    async def run(self, fn, *args):
+        result, _ = await asyncio.wrap_future(self.submit(fn, *args))
+        return result
+
+    def run_blocking(self, fn, *args):
+        result, _ = self.submit(fn, *args).result()
+        return result
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.workers)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "operations": self.operations,
+            "rejected": self.rejected,
+            "hash_seconds_total": round(self.hash_seconds, 6),
+        }
+
+
+pool = PasswordPool(PASSWORD_POOL_KIND, PASSWORD_POOL_WORKERS, PASSWORD_POOL_QUEUE_LIMIT)
+
+
+async def hash_password(password: str) -> str:
+    """Genera el hash bcrypt de una contraseña en el pool"""
+    return await pool.run(_hash, password)
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    """Verifica una contraseña contra su hash bcrypt en el pool"""
+    return await pool.run(_check, password, password_hash)
+
+
+def hash_password_blocking(password: str) -> str:
+    """Variante bloqueante para scripts fuera del event loop (init_db)"""
+    return pool.run_blocking(_hash, password)
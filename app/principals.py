@@ -0,0 +1,123 @@
+"""
+Identidad del estudiante autenticado y caché de tokens ya validados
+"""
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import object_session
+
+from app import revocations
+from app.cache import TTLCache
+from app.models import RefreshToken, Student, utcnow
+
+load_dotenv()
+
+# stateless: el token trae los claims necesarios; database: se consulta students
+AUTH_MODE = os.getenv("AUTH_MODE", "stateless")
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: str
+    name: str
+    role: str = "student"
+    campus: Optional[str] = None
+    # Del token con que se autenticó (no de la identidad): para revocarlo sin decodificarlo de nuevo
+    jti: Optional[str] = field(default=None, compare=False)
+    expires_at: Optional[float] = field(default=None, compare=False)
+
+    @classmethod
+    def from_student(cls, student: Student, campus: Optional[str] = None) -> "Principal":
+        return cls(
+            id=student.id,
+            name=f"{student.first_name} {student.last_name}",
+            role=student.role or "student",
+            campus=campus,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> Optional["Principal"]:
+        if payload.get("name") is None:
+            return None
+        return cls(
+            id=payload["sub"],
+            name=payload["name"],
+            role=payload.get("role", "student"),
+            campus=payload.get("campus"),
+        )
+
+    def claims(self) -> dict:
+        """Claims del token con los que se reconstruye el principal sin consultar la base"""
+        claims = {"sub": self.id, "name": self.name, "role": self.role}
+        if self.campus is not None:
+            claims["campus"] = self.campus
+        return claims
+
+
+@dataclass(frozen=True)
+class _CachedPrincipal:
+    principal: Principal
+    issued_at: float
+    jti: Optional[str] = None
+
+
+# Clave: la firma HMAC del token, que lo identifica de forma única sin decodificarlo
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+def token_key(token: str) -> str:
+    return token.rsplit(".", 1)[-1]
+
+
+def is_revoked(student_id: str, issued_at: float, jti: Optional[str] = None) -> bool:
+    return revocations.revocation_list.is_revoked(student_id, issued_at, jti)
+
+
+def lookup(token: str) -> Optional[Principal]:
+    """Devuelve el principal cacheado para el token, sin decodificarlo de nuevo"""
+    key = token_key(token)
+    cached = principal_cache.get(key)
+    if cached is None:
+        return None
+    if is_revoked(cached.principal.id, cached.issued_at, cached.jti):
+        principal_cache.pop(key)
+        return None
+    return cached.principal
+
+
+def remember(payload: dict, token: str, principal: Principal):
+    """Guarda el principal validado hasta el TTL o la expiración del token"""
+    ttl = min(PRINCIPAL_CACHE_TTL, payload["exp"] - time.time())
+    if ttl > 0:
+        principal_cache.set(
+            token_key(token), _CachedPrincipal(principal, payload.get("iat", 0), payload.get("jti")), ttl=ttl
+        )
+
+
+def invalidate_student(session, connection, student_id: str):
+    """Invalida los tokens emitidos hasta ahora para el estudiante, en todos los workers"""
+    revocations.revoke_student(session, connection, student_id)
+    connection.execute(
+        update(RefreshToken.__table__)
+        .where(RefreshToken.student_id == student_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=utcnow())
+    )
+    principal_cache.discard_where(lambda cached: cached.principal.id == student_id)
+
+
+@event.listens_for(Student, "after_delete")
+def _student_deleted(mapper, connection, target):
+    invalidate_student(object_session(target), connection, target.id)
+
+
+@event.listens_for(Student, "after_update")
+def _student_updated(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if attrs.password_hash.history.has_changes() or attrs.role.history.has_changes():
+        invalidate_student(object_session(target), connection, target.id)
@@ -0,0 +1,165 @@
+"""
+Caché de lectura del horario y de los datos de carrera
+
+Al inicio de cada bloque de clases los mismos estudiantes refrescan el horario
+varias veces en pocos segundos: las lecturas repetidas salen de la caché y los
+misses simultáneos de una clave se resuelven con una sola consulta. Las
+escrituras del ORM de este proceso invalidan al confirmarse; las de otros
+procesos (otro worker, el importador por CLI) las detecta ChangeWatcher, que
+sigue el reloj de sincronización y busca las filas con versión nueva.
+"""
+import asyncio
+import logging
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import event, select, union
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.cache import MemoryCacheBackend, ReadThroughCache
+from app.database import read_session
+from app.models import CareerData, PersonalData, ScheduleEntry, Student, SyncClock, SyncTombstone
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+READ_CACHE_ENABLED = os.getenv("READ_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "30"))
+READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", "20000"))
+# Cada cuánto se revisa el reloj de sincronización (0 desactiva la revisión)
+READ_CACHE_POLL_SECONDS = float(os.getenv("READ_CACHE_POLL_SECONDS", "2"))
+
+# Las entradas se agrupan por student_id: una escritura invalida todas las del estudiante
+backend = MemoryCacheBackend(maxsize=READ_CACHE_SIZE, ttl=READ_CACHE_TTL)
+
+# Clave: (fecha inicial, fecha final); valor: filas de schedule_data.ENTRY_COLUMNS
+schedule_cache = ReadThroughCache("schedule", backend, READ_CACHE_TTL, READ_CACHE_ENABLED)
+# Clave: (); valor: (level, program, school, campus, updated_at)
+career_cache = ReadThroughCache("career", backend, READ_CACHE_TTL, READ_CACHE_ENABLED)
+
+CACHES = (schedule_cache, career_cache)
+
+# Otras vistas derivadas del horario (app.snapshots) reciben las mismas invalidaciones;
+# None significa "todos los estudiantes"
+_listeners = []
+
+
+def on_invalidate(listener):
+    _listeners.append(listener)
+    return listener
+
+
+def invalidate_students(student_ids):
+    backend.invalidate(student_ids)
+    for listener in _listeners:
+        listener(student_ids)
+
+
+def invalidate_all():
+    backend.clear()
+    for listener in _listeners:
+        listener(None)
+
+
+class ChangeWatcher:
+    """Invalida los estudiantes que otros procesos cambiaron desde la última revisión
+
+    Mientras el reloj no se mueve cada revisión es una lectura de una fila; al
+    moverse, una consulta por los índices de version trae solo los estudiantes
+    con filas nuevas, modificadas o borradas.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.invalidated = 0
+
+    @staticmethod
+    def changed_since(since: int):
+        return union(
+            select(ScheduleEntry.student_id).where(ScheduleEntry.version > since),
+            select(CareerData.student_id).where(CareerData.version > since),
+            select(SyncTombstone.student_id).where(
+                SyncTombstone.entity.in_((ScheduleEntry.__tablename__, CareerData.__tablename__)),
+                SyncTombstone.version > since,
+            ),
+        )
+
+    async def tick(self):
+        changed = set()
+        async with read_session() as db:
+            version = (await db.execute(select(SyncClock.version))).scalar() or 0
+            if self.version is not None and version != self.version:
+                changed = set((await db.execute(self.changed_since(self.version))).scalars())
+        self.version = version
+        if changed:
+            self.invalidated += len(changed)
+            invalidate_students(changed)
+        return changed
+
+
+change_watcher = ChangeWatcher()
+
+
+async def run_watcher(watcher: ChangeWatcher = change_watcher):
+    """Bucle del lifespan: una revisión cada READ_CACHE_POLL_SECONDS hasta que se cancela"""
+    while True:
+        try:
+            await watcher.tick()
+        except Exception:
+            # Sin revisión las entradas igual vencen al cumplirse READ_CACHE_TTL
+            logger.exception("Fallo al revisar cambios para la caché de lectura")
+        await asyncio.sleep(READ_CACHE_POLL_SECONDS)
+
+
+def _collect(attribute):
+    return lambda: [((cache.name,), getattr(cache, attribute)) for cache in CACHES]
+
+
+metrics.registry.register(metrics.Counter(
+    "senati_read_cache_hits_total", "Lecturas servidas desde la caché", ("cache",), _collect("hits")
+))
+metrics.registry.register(metrics.Counter(
+    "senati_read_cache_misses_total", "Lecturas que consultaron la base", ("cache",), _collect("misses")
+))
+metrics.registry.register(metrics.Counter(
+    "senati_read_cache_coalesced_total", "Misses que esperaron la consulta ya en curso de otra solicitud",
+    ("cache",), _collect("coalesced")
+))
+metrics.registry.register(metrics.Counter(
+    "senati_read_cache_clock_invalidations_total", "Estudiantes invalidados al avanzar el reloj de sincronización",
+    (), lambda: [((), change_watcher.invalidated)]
+))
+metrics.registry.register(metrics.Gauge(
+    "senati_read_cache_entries", "Entradas en la caché de lectura", (), lambda: [((), len(backend))]
+))
+
+
+# Invalidación por escrituras del ORM: se anotan los estudiantes en el flush y se
+# invalidan recién después del commit, para que una lectura concurrente no vuelva
+# a cachear los datos anteriores
+_PENDING = "read_cache_students"
+_STUDENT_MODELS = (ScheduleEntry, CareerData, PersonalData)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    changed = session.info.setdefault(_PENDING, set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, _STUDENT_MODELS):
+            changed.add(instance.student_id)
+        elif isinstance(instance, Student):
+            changed.add(instance.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    changed = session.info.pop(_PENDING, None)
+    if changed:
+        invalidate_students(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
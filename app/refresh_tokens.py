@@ -0,0 +1,76 @@
+"""
+Tokens de renovación rotativos
+
+Cada login abre una familia de tokens. Al renovar, el token usado se marca y
+se entrega otro de la misma familia; si alguien presenta un token ya usado (lo
+copiaron y el cliente legítimo ya lo rotó, o al revés) se revocan todos los
+tokens de renovación y de acceso del estudiante.
+"""
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import select, update
+
+from app import principals
+from app.feed_tokens import new_token, token_hash
+from app.models import RefreshToken, utcnow
+from app.revocations import REFRESH_TOKEN_EXPIRE_DAYS
+
+
+def issue(db, student_id: str, family_id: str = None) -> str:
+    """Nuevo token de renovación (de una familia nueva si no se indica); el commit queda a cargo de quien llama"""
+    token = new_token()
+    db.add(RefreshToken(
+        student_id=student_id,
+        family_id=family_id or uuid.uuid4().hex,
+        token_hash=token_hash(token),
+        expires_at=utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+async def revoke_family(db, family_id: str):
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=utcnow())
+    )
+
+
+async def rotate(db, token: str) -> Optional[tuple]:
+    """(student_id, nuevo token) si `token` es vigente; None si no. Confirma la transacción"""
+    now = utcnow()
+    key = token_hash(token)
+    # Marcar y leer en una sola sentencia: dos renovaciones simultáneas no obtienen ambas un token
+    row = (await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == key,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(used_at=now)
+        .returning(RefreshToken.student_id, RefreshToken.family_id)
+    )).first()
+    if row is None:
+        reused_by = await db.scalar(
+            select(RefreshToken.student_id).where(RefreshToken.token_hash == key, RefreshToken.used_at.is_not(None))
+        )
+        if reused_by is not None:
+            # Token robado o copiado: se cierran todas las sesiones del estudiante
+            await db.run_sync(lambda session: principals.invalidate_student(session, session.connection(), reused_by))
+            await db.commit()
+        return None
+
+    new = issue(db, row.student_id, row.family_id)
+    await db.commit()
+    return row.student_id, new
+
+
+async def revoke(db, token: str):
+    """Revoca la familia del token (cierre de sesión); el commit queda a cargo de quien llama"""
+    family_id = await db.scalar(select(RefreshToken.family_id).where(RefreshToken.token_hash == token_hash(token)))
+    if family_id is not None:
+        await revoke_family(db, family_id)
@@ -0,0 +1,219 @@
+"""
+Revocación de tokens de acceso sin consultar la base en cada solicitud
+
+Las revocaciones se guardan en token_revocations: un jti (cierre de sesión) o
+un corte por estudiante (cambio de contraseña o de rol, reutilización de un
+token de renovación). Cada worker mantiene en memoria un filtro de Bloom y el
+conjunto exacto de jti revocados, más los cortes por estudiante, y los
+sincroniza en segundo plano cada REVOCATION_SYNC_SECONDS. La validación de un
+token queda en CPU: el filtro descarta casi todos los jti no revocados y el
+conjunto exacto elimina sus falsos positivos.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.database import AsyncSessionLocal
+from app.models import TokenRevocation, utcnow
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = 0.01
+# Cada sincronización relee este margen: cubre transacciones que confirman tarde y relojes desfasados
+SYNC_OVERLAP = timedelta(seconds=60)
+PRUNE_INTERVAL = 3600
+# Vida de los tokens de acceso y de renovación (app.routers.auth y app.refresh_tokens las usan)
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# Un corte por estudiante dura lo que un token de renovación emitido justo antes del corte
+# más el token de acceso que se obtenga con él: después ya no queda ninguno que revocar
+STUDENT_REVOCATION_TTL = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS, minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+def epoch(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class BloomFilter:
+    """Conjunto aproximado de tamaño fijo: sin falsos negativos y con `error_rate` de falsos positivos"""
+
+    def __init__(self, capacity: int, error_rate: float = REVOCATION_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Doble hashing (Kirsch-Mitzenmacher): k posiciones a partir de un solo digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """Revocaciones vigentes de este worker"""
+
+    def __init__(self, capacity: int = REVOCATION_BLOOM_CAPACITY):
+        self.bloom = BloomFilter(capacity)
+        self.syncs = 0
+        self._jtis = {}  # jti -> expiración (epoch)
+        self._students = {}  # student_id -> (corte, expiración) en epoch
+        self._cursor = None  # mayor revoked_at leído de la tabla
+        self._synced_at = None
+        self._pruned_at = time.monotonic()
+        self._sync_task = None
+
+    def __len__(self):
+        return len(self._jtis) + len(self._students)
+
+    def is_revoked(self, student_id: str, issued_at: float, jti: str = None) -> bool:
+        cutoff = self._students.get(student_id)
+        if cutoff is not None and issued_at <= cutoff[0]:
+            return True
+        return jti is not None and jti in self.bloom and jti in self._jtis
+
+    def add_jti(self, jti: str, expires_at: float):
+        if jti in self._jtis:
+            return
+        self._jtis[jti] = expires_at
+        if len(self._jtis) > self.bloom.capacity:
+            # Pasada la capacidad crecen los falsos positivos: se reconstruye con el doble
+            self._rebuild(self.bloom.capacity * 2)
+        else:
+            self.bloom.add(jti)
+
+    def add_student(self, student_id: str, revoked_at: float, expires_at: float):
+        current = self._students.get(student_id)
+        if current is None or revoked_at > current[0]:
+            self._students[student_id] = (revoked_at, expires_at)
+
+    def _rebuild(self, capacity: int):
+        bloom = BloomFilter(capacity)
+        for jti in self._jtis:
+            bloom.add(jti)
+        self.bloom = bloom
+
+    def prune(self, now: float):
+        """Olvida las revocaciones de tokens que ya expiraron"""
+        expired = [jti for jti, expires_at in self._jtis.items() if expires_at <= now]
+        for jti in expired:
+            del self._jtis[jti]
+        self._students = {key: value for key, value in self._students.items() if value[1] > now}
+        if expired:
+            # Un filtro de Bloom no admite borrados: se rearma con los jti que siguen vigentes
+            self._rebuild(max(REVOCATION_BLOOM_CAPACITY, len(self._jtis)))
+
+    def apply(self, rows):
+        for jti, student_id, revoked_at, expires_at in rows:
+            if jti is not None:
+                self.add_jti(jti, epoch(expires_at))
+            elif student_id is not None:
+                self.add_student(student_id, epoch(revoked_at), epoch(expires_at))
+            if self._cursor is None or revoked_at > self._cursor:
+                self._cursor = revoked_at
+
+    async def sync(self):
+        """Lee de la primaria las revocaciones nuevas (y, cada hora, borra las expiradas)"""
+        now = utcnow()
+        statement = select(
+            TokenRevocation.jti, TokenRevocation.student_id, TokenRevocation.revoked_at, TokenRevocation.expires_at
+        ).where(TokenRevocation.expires_at > now)
+        if self._cursor is not None:
+            statement = statement.where(TokenRevocation.revoked_at >= self._cursor - SYNC_OVERLAP)
+        prune = time.monotonic() - self._pruned_at >= PRUNE_INTERVAL
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(statement)).all()
+                if prune:
+                    await db.execute(delete(TokenRevocation).where(TokenRevocation.expires_at <= now))
+                    await db.commit()
+        except (SQLAlchemyError, OSError):
+            # Se conserva lo ya sincronizado y se reintenta en el próximo intervalo
+            logger.exception("Fallo al sincronizar las revocaciones de tokens")
+        else:
+            self.apply(rows)
+            if prune:
+                # Un jti expirado que sigue en memoria no hace daño: se limpia junto con la tabla
+                self.prune(time.time())
+                self._pruned_at = time.monotonic()
+            self.syncs += 1
+        self._synced_at = time.monotonic()
+
+    async def refresh(self):
+        """Espera solo la primera carga; después sincroniza en segundo plano sin bloquear la solicitud"""
+        if self._synced_at is None:
+            await self.sync()
+        elif time.monotonic() - self._synced_at >= REVOCATION_SYNC_SECONDS and (
+            self._sync_task is None or self._sync_task.done()
+        ):
+            self._sync_task = asyncio.get_running_loop().create_task(self.sync())
+
+
+revocation_list = RevocationList()
+
+metrics.registry.register(metrics.Gauge(
+    "senati_token_revocations", "Revocaciones vigentes en memoria (jti y cortes por estudiante)", (),
+    lambda: [((), len(revocation_list))]
+))
+
+
+def revoke_student(session: Session, connection, student_id: str):
+    """Revoca los tokens de acceso emitidos hasta ahora al estudiante, en la transacción de `connection`"""
+    now = utcnow()
+    expires_at = now + STUDENT_REVOCATION_TTL
+    connection.execute(insert(TokenRevocation.__table__).values(
+        student_id=student_id, revoked_at=now, expires_at=expires_at
+    ))
+    _on_commit(session, lambda: revocation_list.add_student(student_id, epoch(now), epoch(expires_at)))
+
+
+def revoke_token(db, jti: str, expires_at: float):
+    """Revoca un token de acceso por su jti hasta que expire; el commit queda a cargo de quien llama"""
+    db.add(TokenRevocation(
+        jti=jti, revoked_at=utcnow(),
+        expires_at=datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None),
+    ))
+    _on_commit(db.sync_session, lambda: revocation_list.add_jti(jti, expires_at))
+
+
+# Este worker aplica una revocación recién cuando su transacción se confirma (si se
+# deshace, nunca existió); los demás la leen en su próxima sincronización
+_PENDING = "revocations_pending"
+
+
+def _on_commit(session: Session, apply):
+    session.info.setdefault(_PENDING, []).append(apply)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session):
+    for apply in session.info.pop(_PENDING, ()):
+        apply()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import dataclasses
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from app.database import get_db
-from app.models import Student
-from app.schemas import LoginRequest, LoginResponse
+from app.models import CareerData, Student
+from app.schemas import LoginRequest, LoginResponse, LogoutRequest, RefreshRequest
+from app.passwords import PASSWORD_POOL_RETRY_AFTER, PasswordPoolSaturated, verify_password
+from app import principals, refresh_tokens, revocations
+from app.throttle import login_throttle
+from app.principals import Principal
+from app.revocations import ACCESS_TOKEN_EXPIRE_MINUTES
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,62 +24,173 @@ router = APIRouter()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60  
+# ACCESS_TOKEN_EXPIRE_MINUTES es corta: la sesión larga la sostiene el token de renovación
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
+    # python-jose (y cryptography) se cargan con el primer token, no al importar la app
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def get_current_student(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+async def _student_with_campus(db: AsyncSession, student_id: str):
+    """Estudiante y su sede en una sola consulta; (None, None) si no existe"""
+    row = (await db.execute(
+        select(Student, CareerData.campus)
+        .outerjoin(CareerData, CareerData.student_id == Student.id)
+        .where(Student.id == student_id)
+    )).first()
+    return (row[0], row[1]) if row is not None else (None, None)
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode(token: str) -> dict:
+    """Claims de un token de acceso con firma y expiración válidas"""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        student_id: str = payload.get("sub")
-        if student_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if student is None:
-        raise credentials_exception
-    return student
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
 
 
-@router.post("/login", response_model=LoginResponse)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    """Endpoint de login con ID de estudiante y contraseña"""
-    student = db.query(Student).filter(Student.id == login_data.student_id).first()
-    
-    if not student or not student.verify_password(login_data.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="ID de estudiante o contraseña incorrectos",
-        )
-    
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+def _token_response(student: Student, campus, refresh_token: str) -> dict:
     access_token = create_access_token(
-        data={"sub": student.id}, expires_delta=access_token_expires
+        data=Principal.from_student(student, campus).claims(),
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    
     return {
         "access_token": access_token,
         "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
         "student_id": student.id,
         "student_name": f"{student.first_name} {student.last_name}"
     }
 
+
+async def get_current_student(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> Principal:
+    # Solo la primera solicitud del worker espera la carga; luego se sincroniza en segundo plano
+    await revocations.revocation_list.refresh()
+    principal = principals.lookup(token)
+    if principal is not None:
+        return principal
+
+    payload = _decode(token)
+    student_id: str = payload["sub"]
+    if principals.is_revoked(student_id, payload.get("iat", 0), payload.get("jti")):
+        raise _credentials_exception()
+
+    principal = None
+    if principals.AUTH_MODE == "stateless":
+        principal = Principal.from_claims(payload)
+    if principal is None:
+        # Modo database o token antiguo sin claims: se consulta la tabla students
+        student, campus = await _student_with_campus(db, student_id)
+        if student is None:
+            raise _credentials_exception()
+        principal = Principal.from_student(student, campus)
+
+    principal = dataclasses.replace(principal, jti=payload.get("jti"), expires_at=payload["exp"])
+    principals.remember(payload, token, principal)
+    return principal
+
+
+@router.post("/login", response_model=LoginResponse)
+async def login(login_data: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
+    """Endpoint de login con ID de estudiante y contraseña"""
+    # Antes de cualquier consulta o bcrypt: un intento rechazado no cuesta CPU
+    # ForwardedClientMiddleware ya reemplazó la IP del proxy por la del cliente
+    client_ip = request.client.host if request.client else None
+    retry_after = await login_throttle.retry_after(client_ip, login_data.student_id)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Demasiados intentos de inicio de sesión, intenta nuevamente en {retry_after} segundos",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    student, campus = await _student_with_campus(db, login_data.student_id)
+    # La conexión vuelve al pool antes de esperar a bcrypt: el login no hace más consultas
+    await db.close()
+    
+    try:
+        password_ok = student is not None and await verify_password(
+            login_data.password, student.password_hash
+        )
+    except PasswordPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servicio de autenticación saturado, intenta nuevamente en unos segundos",
+            headers={"Retry-After": str(PASSWORD_POOL_RETRY_AFTER)},
+        )
+    
+    if not password_ok:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="ID de estudiante o contraseña incorrectos",
+        )
+    
+    refresh_token = refresh_tokens.issue(db, student.id)
+    await db.commit()
+    await login_throttle.succeeded(client_ip, login_data.student_id)
+    return _token_response(student, campus, refresh_token)
+
+
+@router.post("/refresh", response_model=LoginResponse)
+async def refresh(refresh_data: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """Nuevo token de acceso a cambio del token de renovación, que se reemplaza por otro"""
+    rotated = await refresh_tokens.rotate(db, refresh_data.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de renovación inválido o expirado",
+        )
+    student_id, refresh_token = rotated
+
+    # Los claims se releen: un cambio de rol o de sede se refleja en la siguiente renovación
+    student, campus = await _student_with_campus(db, student_id)
+    if student is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de renovación inválido o expirado",
+        )
+    return _token_response(student, campus, refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoca el token de acceso y, si se envía, la familia del token de renovación"""
+    # El token ya se validó en get_current_student: se revoca con sus claims, sin decodificarlo otra vez
+    if current_student.jti is not None:
+        revocations.revoke_token(db, current_student.jti, current_student.expires_at)
+    if logout_data is not None and logout_data.refresh_token:
+        await refresh_tokens.revoke(db, logout_data.refresh_token)
+    await db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from app.schemas import SlowQueriesResponse
+from app.routers.auth import get_current_student
+from app.slow_queries import slow_query_log
+from app.serialization import json_response
+from app.principals import Principal
+
+router = APIRouter()
+
+
+@router.get("/slow-queries", response_model=SlowQueriesResponse)
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000, description="Cantidad máxima, las más recientes primero"),
+    current_student: Principal = Depends(get_current_student),
+):
+    """Últimas consultas lentas de este worker con su plan de ejecución (administradores)"""
+    if current_student.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para consultar los diagnósticos"
+        )
+    return json_response({
+        "enabled": slow_query_log.enabled,
+        "threshold_ms": slow_query_log.threshold * 1000,
+        "queries": slow_query_log.entries(limit),
+    })
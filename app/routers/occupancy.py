@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, time
+from typing import Optional
+from app.database import get_read_db
+from app.schemas import AvailabilityResponse, ConflictsResponse
+from app.routers.auth import get_current_student
+from app.routers.schedule import SCHEDULE_BULK_MAX_DAYS, _validate_range
+from app.dimensions import dimension_cache
+from app.occupancy import occupancy_index, COURSE_ID, END, INSTRUCTOR_ID, LOCATION_ID, START
+from app.serialization import json_response
+from app.principals import Principal
+
+router = APIRouter()
+
+
+def _require_staff(principal: Principal):
+    if principal.role not in ("admin", "instructor"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para consultar la ocupación de aulas e instructores"
+        )
+
+
+def _lookup(ids: dict, name: str, detail: str) -> int:
+    key = ids.get(name)
+    if key is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+    return key
+
+
+def _session_payload(session) -> dict:
+    courses, instructors, locations = dimension_cache.tables
+    return {
+        "start_time": session[START],
+        "end_time": session[END],
+        "course_name": courses[session[COURSE_ID]],
+        "instructor_name": instructors[session[INSTRUCTOR_ID]],
+        "location": locations[session[LOCATION_ID]],
+    }
+
+
+@router.get("/availability", response_model=AvailabilityResponse)
+async def get_availability(
+    day: date = Query(..., alias="date", description="Fecha (YYYY-MM-DD)"),
+    start: time = Query(..., description="Hora inicial (HH:MM)"),
+    end: time = Query(..., description="Hora final (HH:MM)"),
+    campus: Optional[str] = Query(None, description="Sede del aula, p. ej. IND"),
+    instructor: Optional[str] = Query(None, description="Instructor cuyas clases en ese horario se quieren ver"),
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Aulas libres en un horario y, opcionalmente, si un instructor ya tiene clase (instructores y administradores)"""
+    _require_staff(current_student)
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La hora final debe ser posterior a la inicial"
+        )
+
+    snapshot = await occupancy_index.current(db)
+    _, _, locations = dimension_cache.tables
+    payload = {
+        "date": day,
+        "start_time": start,
+        "end_time": end,
+        "campus": campus,
+        "free_locations": [locations[key] for key in snapshot.free_locations(day, start, end, campus)],
+    }
+    if instructor is not None:
+        instructor_id = _lookup(snapshot.instructor_ids, instructor, "Instructor no encontrado")
+        payload["instructor_sessions"] = [
+            _session_payload(session) for session in snapshot.instructor_sessions(instructor_id, day, start, end)
+        ]
+    return json_response(payload)
+
+
+@router.get("/conflicts", response_model=ConflictsResponse)
+async def get_conflicts(
+    start_date: date = Query(..., alias="from", description="Fecha inicial (YYYY-MM-DD)"),
+    end_date: date = Query(..., alias="to", description="Fecha final inclusive (YYYY-MM-DD)"),
+    instructor: Optional[str] = Query(None, description="Solo los cruces de este instructor"),
+    location: Optional[str] = Query(None, description="Solo los cruces de esta aula"),
+    limit: int = Query(100, ge=1, le=1000, description="Cantidad máxima de cruces, por fecha y hora de inicio"),
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Instructores con dos clases a la vez y aulas con dos clases a la vez (instructores y administradores)"""
+    _require_staff(current_student)
+    _validate_range(start_date, end_date, SCHEDULE_BULK_MAX_DAYS)
+
+    snapshot = await occupancy_index.current(db)
+    instructor_id = location_id = None
+    if instructor is not None:
+        instructor_id = _lookup(snapshot.instructor_ids, instructor, "Instructor no encontrado")
+    if location is not None:
+        location_id = _lookup(snapshot.location_ids, location, "Aula no encontrada")
+
+    _, instructors, locations = dimension_cache.tables
+    names = {"instructor": instructors, "location": locations}
+    conflicts = [
+        {
+            "kind": kind,
+            "name": names[kind][key],
+            "date": day,
+            "first": _session_payload(first),
+            "second": _session_payload(second),
+        }
+        for kind, key, day, first, second in snapshot.conflicts(
+            start_date, end_date, instructor_id, location_id, limit + 1
+        )
+    ]
+    # Uno de más para saber si hay otros: el rango completo de una sede puede tener miles
+    truncated = len(conflicts) > limit
+    return json_response({
+        "start_date": start_date, "end_date": end_date, "conflicts": conflicts[:limit], "truncated": truncated,
+    })
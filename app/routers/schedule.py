@@ -1,20 +1,275 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from datetime import date
-from app.database import get_db
-from app.models import Student, ScheduleEntry
-from app.schemas import ScheduleResponse, ScheduleEntryResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, timedelta
+import contextlib
+from typing import Literal
+from app.database import get_db, get_read_db, read_session
+from app.models import FeedToken, ScheduleEntry, utcnow
+from app.schemas import (
+    FeedTokenResponse,
+    ScheduleBulkEntryResponse,
+    ScheduleBulkRequest,
+    ScheduleResponse,
+    ScheduleRangeResponse,
+)
 from app.routers.auth import get_current_student
+from app import conditional, feed_tokens, ics, read_cache, schedule_data, snapshots
+from app.serialization import dumps, json_response
+from app.principals import Principal
 
 router = APIRouter()
 
+SCHEDULE_RANGE_MAX_DAYS = 31
+SCHEDULE_BULK_MAX_DAYS = 186  # un semestre
+SCHEDULE_BULK_MAX_STUDENTS = 1000
+SCHEDULE_BULK_CHUNK_ROWS = 1000
+
+BULK_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def _validate_range(start_date, end_date, max_days):
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha final debe ser posterior o igual a la inicial"
+        )
+
+    total_days = (end_date - start_date).days + 1
+    if total_days > max_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango no puede superar {max_days} días"
+        )
+
+
+async def _schedule_version(db, student_id, start_date, end_date):
+    """(cantidad, último updated_at) del rango con un agregado sobre el índice"""
+    return (await db.execute(
+        select(func.count(), func.max(ScheduleEntry.updated_at)).where(
+            ScheduleEntry.student_id == student_id,
+            ScheduleEntry.date >= start_date,
+            ScheduleEntry.date <= end_date
+        )
+    )).one()
+
+
+async def _schedule_rows(db, student_id, start_date, end_date):
+    """Filas del rango desde la caché de lectura; los misses simultáneos hacen una sola consulta"""
+    async def load():
+        rows = (await db.execute(schedule_data.schedule_rows(student_id, start_date, end_date))).all()
+        return [tuple(row) for row in rows]
+
+    rows = await read_cache.schedule_cache.get_or_load(student_id, (start_date, end_date), load)
+    await schedule_data.load_dimensions(db, rows)
+    return rows
+
+
+async def _schedule_response(request, db, student_id, start_date, end_date, build_payload):
+    """304 si el cliente ya tiene esta versión; si no, el payload con sus validadores"""
+    # Hoy y la semana en curso suelen estar ya serializados por el planificador de instantáneas
+    snapshot = snapshots.snapshot_store.get(student_id, start_date, end_date)
+    if snapshot is not None:
+        body, etag, last_modified = snapshot
+        if conditional.is_not_modified(request, etag, last_modified):
+            return conditional.not_modified(etag, last_modified)
+        return Response(
+            content=body, media_type="application/json",
+            headers=conditional.validator_headers(etag, last_modified),
+        )
+
+    rows = await _schedule_rows(db, student_id, start_date, end_date)
+    etag, last_modified = schedule_data.schedule_validators(
+        student_id, start_date, end_date, *schedule_data.rows_version(rows)
+    )
+    if conditional.is_not_modified(request, etag, last_modified):
+        return conditional.not_modified(etag, last_modified)
+    # Filas planas serializadas directo a JSON; response_model solo documenta el esquema
+    return json_response(build_payload(rows), headers=conditional.validator_headers(etag, last_modified))
+
+
+def _bulk_campus_scope(principal: Principal):
+    """Sede a la que se restringe la consulta masiva; None para administradores"""
+    if principal.role == "admin":
+        return None
+    if principal.role == "instructor" and principal.campus:
+        return principal.campus
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="No tienes permiso para consultar horarios de otros estudiantes"
+    )
+
+
+async def _stream_bulk(statement, output_format, start_date, end_date):
+    """Envía las filas por bloques a medida que llegan del cursor: memoria constante"""
+    if output_format == "json":
+        yield b'{"start_date":' + dumps(start_date) + b',"end_date":' + dumps(end_date) + b',"entries":['
+    first = True
+    async with read_session() as db:
+        result = await db.stream(statement.execution_options(yield_per=SCHEDULE_BULK_CHUNK_ROWS))
+        async for rows in result.partitions():
+            await schedule_data.load_dimensions(db, rows)
+            lines = [dumps(schedule_data.bulk_entry_payload(row)) for row in rows]
+            if output_format == "ndjson":
+                yield b"\n".join(lines) + b"\n"
+            else:
+                yield (b"" if first else b",") + b",".join(lines)
+                first = False
+    if output_format == "json":
+        yield b"]}"
+
+
+@router.post(
+    "/bulk",
+    responses={200: {
+        "description": "Una clase por línea (NDJSON) o un objeto JSON con `entries`, enviado por bloques",
+        "content": {
+            "application/x-ndjson": {"schema": ScheduleBulkEntryResponse.model_json_schema()},
+            "application/json": {},
+        },
+    }},
+)
+async def get_schedule_bulk(
+    query: ScheduleBulkRequest,
+    output_format: Literal["ndjson", "json"] = Query("ndjson", alias="format"),
+    current_student: Principal = Depends(get_current_student),
+):
+    """Horario de varios estudiantes, de un curso o de un aula en un rango de fechas (instructores y administradores)"""
+    campus = _bulk_campus_scope(current_student)
+
+    if not (query.student_ids or query.course_name or query.location):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Indica al menos student_ids, course_name o location"
+        )
+    student_ids = sorted(set(query.student_ids or ()))
+    if len(student_ids) > SCHEDULE_BULK_MAX_STUDENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No se pueden consultar más de {SCHEDULE_BULK_MAX_STUDENTS} estudiantes a la vez"
+        )
+    _validate_range(query.start_date, query.end_date, SCHEDULE_BULK_MAX_DAYS)
+
+    statement = schedule_data.bulk_rows(
+        query.start_date, query.end_date, student_ids, query.course_name, query.location, campus
+    )
+    return StreamingResponse(
+        _stream_bulk(statement, output_format, query.start_date, query.end_date),
+        media_type=BULK_MEDIA_TYPES[output_format],
+    )
+
+
+async def _stream_calendar(session, db, statement):
+    """Calendario .ics escrito evento por evento desde un cursor del servidor, en la sesión `db`"""
+    async with session:
+        yield ics.calendar_header("Horario SENATI")
+        result = await db.stream(statement.execution_options(yield_per=SCHEDULE_BULK_CHUNK_ROWS))
+        async for rows in result.partitions():
+            await schedule_data.load_dimensions(db, rows)
+            yield b"".join(ics.event(schedule_data.entry_payload(row), row[-1]) for row in rows)
+        yield ics.CALENDAR_FOOTER
+
+
+@router.get(
+    "/feed/{token}.ics",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/calendar": {}}, "description": "Calendario iCalendar"}},
+)
+async def get_schedule_feed(token: str, request: Request):
+    """Horario en formato iCalendar para suscribirse desde una app de calendario"""
+    student_id = await feed_tokens.resolve(token)
+    if student_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Calendario no encontrado"
+        )
+
+    today = schedule_data.today()
+    start_date = today - timedelta(days=ics.ICS_PAST_DAYS)
+    end_date = today + timedelta(days=ics.ICS_FUTURE_DAYS)
+    # Versión y cuerpo salen de la misma sesión (la misma réplica): el ETag describe lo que se envía.
+    # La sesión se cierra al terminar el stream, o al salir por 304 o por error
+    session = contextlib.AsyncExitStack()
+    db = await session.enter_async_context(read_session())
+    try:
+        # Las apps de calendario consultan cada pocos minutos: casi siempre termina en 304
+        count, last_modified = await _schedule_version(db, student_id, start_date, end_date)
+        # Los nombres del cuerpo salen de la caché de dimensiones: su versión va en el ETag
+        await schedule_data.load_dimensions(db, ())
+        etag, last_modified = schedule_data.schedule_validators(
+            student_id, start_date, end_date, count, last_modified
+        )
+    except BaseException:
+        await session.aclose()
+        raise
+    if conditional.is_not_modified(request, etag, last_modified):
+        await session.aclose()
+        return conditional.not_modified(etag, last_modified)
+
+    return StreamingResponse(
+        _stream_calendar(session, db, schedule_data.schedule_rows(student_id, start_date, end_date)),
+        media_type="text/calendar; charset=utf-8",
+        headers={
+            **conditional.validator_headers(etag, last_modified),
+            "Content-Disposition": 'inline; filename="horario.ics"',
+        },
+        # Si el cliente se va antes de que empiece el stream, el generador no llega a cerrarla
+        background=BackgroundTask(session.aclose),
+    )
+
+
+@router.post("/{student_id}/feed-token", response_model=FeedTokenResponse, status_code=status.HTTP_201_CREATED)
+async def create_feed_token(
+    student_id: str,
+    request: Request,
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_db)
+):
+    """Crear un enlace de suscripción .ics (el token solo se muestra esta vez)"""
+    if current_student.id != student_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para acceder a este horario"
+        )
+
+    token = feed_tokens.new_token()
+    db.add(FeedToken(student_id=student_id, token_hash=feed_tokens.token_hash(token)))
+    await db.commit()
+    return {"token": token, "url": str(request.url_for("get_schedule_feed", token=token))}
+
+
+@router.delete("/{student_id}/feed-token", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_feed_tokens(
+    student_id: str,
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revocar todos los enlaces de suscripción .ics del estudiante"""
+    if current_student.id != student_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para acceder a este horario"
+        )
+
+    await db.execute(
+        update(FeedToken)
+        .where(FeedToken.student_id == student_id, FeedToken.revoked_at.is_(None))
+        .values(revoked_at=utcnow())
+    )
+    await db.commit()
+    feed_tokens.forget_student(student_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 
 @router.get("/{student_id}", response_model=ScheduleResponse)
 async def get_schedule(
     student_id: str,
+    request: Request,
     schedule_date: date = Query(..., description="Fecha del horario (YYYY-MM-DD)"),
-    current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener horario del estudiante para una fecha específica"""
     if current_student.id != student_id:
@@ -23,19 +278,32 @@ async def get_schedule(
             detail="No tienes permiso para acceder a este horario"
         )
     
-    schedule_entries = db.query(ScheduleEntry).filter(
-        ScheduleEntry.student_id == student_id,
-        ScheduleEntry.date == schedule_date
-    ).order_by(ScheduleEntry.start_time).all()
-    
-    if not schedule_entries:
-        return ScheduleResponse(
-            date=schedule_date,
-            entries=[]
-        )
-    
-    return ScheduleResponse(
-        date=schedule_date,
-        entries=[ScheduleEntryResponse.model_validate(entry) for entry in schedule_entries]
+    return await _schedule_response(
+        request, db, student_id, schedule_date, schedule_date,
+        lambda rows: schedule_data.day_payload(schedule_date, rows)
     )
 
+
+@router.get("/{student_id}/range", response_model=ScheduleRangeResponse)
+async def get_schedule_range(
+    student_id: str,
+    request: Request,
+    start_date: date = Query(..., alias="from", description="Fecha inicial (YYYY-MM-DD)"),
+    end_date: date = Query(..., alias="to", description="Fecha final inclusive (YYYY-MM-DD)"),
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Obtener horario del estudiante agrupado por día para un rango de fechas"""
+    if current_student.id != student_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para acceder a este horario"
+        )
+
+    _validate_range(start_date, end_date, SCHEDULE_RANGE_MAX_DAYS)
+
+    # Un solo recorrido del índice (student_id, date, start_time), ya ordenado
+    return await _schedule_response(
+        request, db, student_id, start_date, end_date,
+        lambda rows: schedule_data.range_payload(start_date, end_date, rows)
+    )
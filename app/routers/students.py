@@ -1,18 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from datetime import date, datetime
+from typing import Optional
+from app.database import get_read_db
 from app.models import Student, PersonalData, CareerData
-from app.schemas import PersonalDataResponse, CareerDataResponse
+from app.schemas import (
+    PersonalDataResponse,
+    CareerDataResponse,
+    ScheduleEntryResponse,
+    ScheduleResponse,
+    StudentProfileResponse,
+)
 from app.routers.auth import get_current_student
+from app import conditional, read_cache, schedule_data
+from app.dimensions import dimension_cache
+from app.serialization import json_response
+from app.principals import Principal
 
 router = APIRouter()
 
+PROFILE_SECTIONS = {"personal", "career", "schedule"}
+
+
+def _personal_validators(student_id, student_updated_at, personal_updated_at):
+    etag = conditional.make_etag("personal", student_id, student_updated_at, personal_updated_at)
+    return etag, conditional.latest(student_updated_at, personal_updated_at)
+
 
 @router.get("/{student_id}/personal-data", response_model=PersonalDataResponse)
 async def get_personal_data(
     student_id: str,
-    current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener datos personales del estudiante"""
     if current_student.id != student_id:
@@ -21,36 +44,49 @@ async def get_personal_data(
             detail="No tienes permiso para acceder a estos datos"
         )
     
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if not student:
+    # Una sola consulta: los validadores salen de la misma fila que arma la respuesta,
+    # así que un GET condicional que no coincide no cuesta consultas extra
+    row = (await db.execute(
+        select(
+            Student.id, Student.first_name, Student.last_name, Student.dni, Student.updated_at,
+            PersonalData.id.label("personal_id"), PersonalData.email, PersonalData.phone,
+            PersonalData.address, PersonalData.updated_at.label("personal_updated_at"),
+        )
+        .outerjoin(PersonalData, PersonalData.student_id == Student.id)
+        .where(Student.id == student_id)
+    )).first()
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Estudiante no encontrado"
         )
-    
-    personal_data = db.query(PersonalData).filter(PersonalData.student_id == student_id).first()
-    if not personal_data:
+    if row.personal_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Datos personales no encontrados"
         )
     
+    etag, last_modified = _personal_validators(student_id, row.updated_at, row.personal_updated_at)
+    if conditional.is_not_modified(request, etag, last_modified):
+        return conditional.not_modified(etag, last_modified)
+    conditional.apply_validators(response, etag, last_modified)
     return PersonalDataResponse(
-        first_name=student.first_name,
-        last_name=student.last_name,
-        dni=student.dni,
-        student_id=student.id,
-        email=personal_data.email,
-        phone=personal_data.phone,
-        address=personal_data.address
+        first_name=row.first_name,
+        last_name=row.last_name,
+        dni=row.dni,
+        student_id=row.id,
+        email=row.email,
+        phone=row.phone,
+        address=row.address
     )
 
 
 @router.get("/{student_id}/career-data", response_model=CareerDataResponse)
 async def get_career_data(
     student_id: str,
-    current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener datos de carrera del estudiante"""
     if current_student.id != student_id:
@@ -59,12 +95,113 @@ async def get_career_data(
             detail="No tienes permiso para acceder a estos datos"
         )
     
-    career_data = db.query(CareerData).filter(CareerData.student_id == student_id).first()
+    async def load():
+        row = (await db.execute(
+            select(
+                CareerData.level, CareerData.program, CareerData.school, CareerData.campus,
+                CareerData.updated_at
+            ).where(CareerData.student_id == student_id)
+        )).first()
+        return None if row is None else tuple(row)
+
+    # Desde la caché de lectura: también un GET condicional se responde sin consultar la base
+    career_data = await read_cache.career_cache.get_or_load(student_id, (), load)
     if not career_data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Datos de carrera no encontrados"
         )
     
-    return career_data
+    level, program, school, campus, updated_at = career_data
+    etag = conditional.make_etag("career", student_id, updated_at)
+    if conditional.is_not_modified(request, etag, updated_at):
+        return conditional.not_modified(etag, updated_at)
+    return json_response(
+        {"level": level, "program": program, "school": school, "campus": campus},
+        headers=conditional.validator_headers(etag, updated_at)
+    )
+
 
+@router.get("/{student_id}/profile", response_model=StudentProfileResponse, response_model_exclude_unset=True)
+async def get_profile(
+    student_id: str,
+    request: Request,
+    response: Response,
+    include: str = Query(
+        "personal,career,schedule",
+        description="Secciones separadas por coma: personal, career, schedule"
+    ),
+    schedule_date: Optional[date] = Query(None, description="Fecha del horario (por defecto hoy)"),
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Obtener en una sola respuesta los datos que necesita la pantalla de inicio"""
+    if current_student.id != student_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para acceder a estos datos"
+        )
+
+    sections = {section.strip() for section in include.split(",") if section.strip()}
+    unknown = sections - PROFILE_SECTIONS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Secciones no válidas: {', '.join(sorted(unknown))}"
+        )
+    schedule_date = schedule_date or schedule_data.today()
+
+    # personal y career van en el mismo SELECT (JOIN); el horario en un segundo SELECT de filas planas
+    options = []
+    if "personal" in sections:
+        options.append(joinedload(Student.personal_data))
+    if "career" in sections:
+        options.append(joinedload(Student.career_data))
+
+    student = await db.scalar(select(Student).options(*options).where(Student.id == student_id))
+    if not student:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Estudiante no encontrado"
+        )
+    if "schedule" in sections:
+        entries = (await db.execute(schedule_data.schedule_rows(student_id, schedule_date, schedule_date))).all()
+        await schedule_data.load_dimensions(db, entries)
+
+    # Sin consulta previa de validación: la versión sale de las filas ya cargadas
+    version = ["profile", student_id, sorted(sections), student.updated_at]
+    if "personal" in sections:
+        version.append(student.personal_data and student.personal_data.updated_at)
+    if "career" in sections:
+        version.append(student.career_data and student.career_data.updated_at)
+    if "schedule" in sections:
+        version += [schedule_date, *schedule_data.rows_version(entries), dimension_cache.version]
+    etag = conditional.make_etag(*version)
+    last_modified = conditional.latest(*(v for v in version if isinstance(v, datetime)))
+    if conditional.is_not_modified(request, etag, last_modified):
+        return conditional.not_modified(etag, last_modified)
+    conditional.apply_validators(response, etag, last_modified)
+
+    profile = StudentProfileResponse(
+        student_id=student.id,
+        first_name=student.first_name,
+        last_name=student.last_name,
+    )
+    if "personal" in sections and student.personal_data:
+        profile.personal_data = PersonalDataResponse(
+            first_name=student.first_name,
+            last_name=student.last_name,
+            dni=student.dni,
+            student_id=student.id,
+            email=student.personal_data.email,
+            phone=student.personal_data.phone,
+            address=student.personal_data.address
+        )
+    if "career" in sections and student.career_data:
+        profile.career_data = CareerDataResponse.model_validate(student.career_data)
+    if "schedule" in sections:
+        profile.schedule = ScheduleResponse(
+            date=schedule_date,
+            entries=[ScheduleEntryResponse(**schedule_data.entry_payload(row)) for row in entries]
+        )
+    return profile
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import get_read_db
+from app.schemas import SyncResponse
+from app.routers.auth import get_current_student
+from app import schedule_data, sync_data
+from app.serialization import json_response
+from app.principals import Principal
+
+router = APIRouter()
+
+
+@router.get("/{student_id}", response_model=SyncResponse)
+async def sync_student(
+    student_id: str,
+    cursor: Optional[str] = Query(None, description="Cursor de la sincronización anterior; vacío para una copia completa"),
+    current_student: Principal = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Cambios de horario, datos personales y de carrera desde el cursor indicado"""
+    if current_student.id != student_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para acceder a estos datos"
+        )
+
+    since = None
+    if cursor:
+        try:
+            since = sync_data.decode_cursor(cursor)
+        except sync_data.InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor de sincronización inválido"
+            )
+
+    # El reloj se lee antes que los datos: un cambio confirmado en medio puede llegar
+    # dos veces (el cliente lo aplica de forma idempotente), pero nunca se pierde
+    version = await db.scalar(sync_data.clock_version()) or 0
+    if since is not None and since >= version:
+        # Sin cambios, o una réplica más atrasada que el cursor: se conserva el del cliente
+        return json_response({
+            "cursor": cursor, "full": False, "personal_data": None, "career_data": None,
+            "schedule_entries": [], "deleted": [],
+        })
+
+    profile = (await db.execute(sync_data.profile_row(student_id))).first()
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Estudiante no encontrado"
+        )
+    entries = (await db.execute(sync_data.changed_entries(student_id, since))).all()
+    await schedule_data.load_dimensions(db, entries)
+    deleted = [] if since is None else (await db.execute(sync_data.deletions(student_id, since))).all()
+    return json_response(sync_data.sync_payload(version, since, profile, entries, deleted))
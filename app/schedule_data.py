@@ -0,0 +1,127 @@
+"""
+Consultas de horario que devuelven filas planas, sin construir objetos ORM
+ni modelos Pydantic, y su conversión al formato de ScheduleResponse
+
+Las filas traen los ids de curso, instructor y aula; los nombres salen de la
+caché de dimensiones, que se asegura con `load_dimensions` antes de armar el payload.
+"""
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+
+from app import ics
+from app.conditional import latest, make_etag
+from app.dimensions import dimension_cache
+from app.models import CareerData, Course, Location, ScheduleEntry
+
+ENTRY_COLUMNS = (
+    ScheduleEntry.id,
+    ScheduleEntry.date,
+    ScheduleEntry.start_time,
+    ScheduleEntry.end_time,
+    ScheduleEntry.course_id,
+    ScheduleEntry.instructor_id,
+    ScheduleEntry.location_id,
+    ScheduleEntry.updated_at,
+)
+
+
+def local_now() -> datetime:
+    """Hora local de las sedes, la misma en que están las fechas de schedule_entries"""
+    return datetime.now(ZoneInfo(ics.ICS_TIMEZONE))
+
+
+def today() -> date:
+    """Hoy en las sedes: en un servidor en UTC, date.today() ya es mañana durante la noche en Lima"""
+    return local_now().date()
+
+
+# course_id, instructor_id y location_id son las penúltimas columnas, con o sin student_id delante
+COURSE_ID, INSTRUCTOR_ID, LOCATION_ID = -4, -3, -2
+
+
+async def load_dimensions(db, rows):
+    """Carga en la caché los nombres que faltan para armar el payload de `rows`"""
+    await dimension_cache.ensure(db, (
+        {row[COURSE_ID] for row in rows},
+        {row[INSTRUCTOR_ID] for row in rows},
+        {row[LOCATION_ID] for row in rows},
+    ))
+
+
+def schedule_rows(student_id: str, start_date: date, end_date: date):
+    """SELECT de columnas por el índice (student_id, date, start_time), ya ordenado"""
+    return select(*ENTRY_COLUMNS).where(
+        ScheduleEntry.student_id == student_id,
+        ScheduleEntry.date >= start_date,
+        ScheduleEntry.date <= end_date
+    ).order_by(ScheduleEntry.date, ScheduleEntry.start_time)
+
+
+def bulk_rows(start_date: date, end_date: date, student_ids=None, course_name=None, location=None,
+              campus=None):
+    """Un solo SELECT para varios estudiantes (IN), un curso o un aula, ordenado por estudiante"""
+    statement = select(ScheduleEntry.student_id, *ENTRY_COLUMNS).where(
+        ScheduleEntry.date >= start_date,
+        ScheduleEntry.date <= end_date
+    )
+    if student_ids:
+        statement = statement.where(ScheduleEntry.student_id.in_(student_ids))
+    # El nombre se resuelve a su id en la misma sentencia y se usa el índice (course_id, date)
+    if course_name:
+        statement = statement.where(
+            ScheduleEntry.course_id == select(Course.id).where(Course.name == course_name).scalar_subquery()
+        )
+    if location:
+        statement = statement.where(
+            ScheduleEntry.location_id == select(Location.id).where(Location.name == location).scalar_subquery()
+        )
+    if campus is not None:
+        statement = statement.join(CareerData, CareerData.student_id == ScheduleEntry.student_id).where(
+            CareerData.campus == campus
+        )
+    return statement.order_by(ScheduleEntry.student_id, ScheduleEntry.date, ScheduleEntry.start_time)
+
+
+def entry_payload(row) -> dict:
+    courses, instructors, locations = dimension_cache.tables
+    return {
+        "id": row[0],
+        "date": row[1],
+        "start_time": row[2],
+        "end_time": row[3],
+        "course_name": courses[row[COURSE_ID]],
+        "instructor_name": instructors[row[INSTRUCTOR_ID]],
+        "location": locations[row[LOCATION_ID]],
+    }
+
+
+def bulk_entry_payload(row) -> dict:
+    return {"student_id": row[0], **entry_payload(row[1:])}
+
+
+def day_payload(day: date, rows) -> dict:
+    return {"date": day, "entries": [entry_payload(row) for row in rows]}
+
+
+def range_payload(start_date: date, end_date: date, rows) -> dict:
+    days = {start_date + timedelta(days=offset): [] for offset in range((end_date - start_date).days + 1)}
+    for row in rows:
+        days[row[1]].append(entry_payload(row))
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "days": [{"date": day, "entries": entries} for day, entries in days.items()],
+    }
+
+
+def rows_version(rows):
+    """(cantidad, último updated_at) de las filas, igual al agregado de validación"""
+    return len(rows), latest(*(row[-1] for row in rows))
+
+
+def schedule_validators(student_id: str, start_date: date, end_date: date, count: int, last_modified):
+    """(ETag, Last-Modified) del horario de un rango a partir de su versión y la de los nombres"""
+    etag = make_etag("schedule", student_id, start_date, end_date, count, last_modified, dimension_cache.version)
+    return etag, last_modified
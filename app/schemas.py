@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from datetime import date, time
-from typing import Optional, List
+from typing import Any, Optional, List
 
 class LoginRequest(BaseModel):
     student_id: str
@@ -10,9 +10,19 @@ class LoginRequest(BaseModel):
 class LoginResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    expires_in: int
+    refresh_token: str
     student_id: str
     student_name: str
 
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class PersonalDataResponse(BaseModel):
     first_name: str
     last_name: str
@@ -51,3 +61,100 @@ class ScheduleResponse(BaseModel):
     date: date
     entries: List[ScheduleEntryResponse]
 
+
+class ScheduleRangeResponse(BaseModel):
+    start_date: date
+    end_date: date
+    days: List[ScheduleResponse]
+
+
+class ScheduleBulkRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    student_ids: Optional[List[str]] = None
+    course_name: Optional[str] = None
+    location: Optional[str] = None
+    start_date: date = Field(alias="from")
+    end_date: date = Field(alias="to")
+
+
+class ScheduleBulkEntryResponse(ScheduleEntryResponse):
+    student_id: str
+
+
+class FeedTokenResponse(BaseModel):
+    token: str
+    url: str
+
+
+class SyncDeletion(BaseModel):
+    entity: str
+    id: int
+
+
+class SyncResponse(BaseModel):
+    cursor: str
+    full: bool
+    personal_data: Optional[PersonalDataResponse] = None
+    career_data: Optional[CareerDataResponse] = None
+    schedule_entries: List[ScheduleEntryResponse]
+    deleted: List[SyncDeletion]
+
+
+class StudentProfileResponse(BaseModel):
+    student_id: str
+    first_name: str
+    last_name: str
+    personal_data: Optional[PersonalDataResponse] = None
+    career_data: Optional[CareerDataResponse] = None
+    schedule: Optional[ScheduleResponse] = None
+
+
+class OccupancySession(BaseModel):
+    start_time: time
+    end_time: time
+    course_name: str
+    instructor_name: str
+    location: str
+
+
+class AvailabilityResponse(BaseModel):
+    date: date
+    start_time: time
+    end_time: time
+    campus: Optional[str] = None
+    free_locations: List[str]
+    instructor_sessions: Optional[List[OccupancySession]] = None
+
+
+class OccupancyConflict(BaseModel):
+    kind: str  # instructor | location
+    name: str
+    date: date
+    first: OccupancySession
+    second: OccupancySession
+
+
+class ConflictsResponse(BaseModel):
+    start_date: date
+    end_date: date
+    conflicts: List[OccupancyConflict]
+    truncated: bool = False  # hay más cruces que `limit`
+
+
+class SlowQuery(BaseModel):
+    at: str
+    engine: str
+    duration_ms: float
+    sql: str
+    parameters: Any  # tipos de los parámetros, sin valores
+    route: Optional[str] = None
+    student: Optional[str] = None  # hash del ID de estudiante
+    plan: Optional[str] = None
+    analyzed: bool
+
+
+class SlowQueriesResponse(BaseModel):
+    enabled: bool
+    threshold_ms: float
+    queries: List[SlowQuery]
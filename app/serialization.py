@@ -0,0 +1,24 @@
+"""
+Serialización JSON directa a bytes para las respuestas de alto volumen
+"""
+from fastapi import Response
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: pydantic_core cubre el mismo formato
+    orjson = None
+
+
+def dumps(payload) -> bytes:
+    """Serializa dicts/listas con date y time al mismo JSON que generaría FastAPI"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return to_json(payload)
+
+
+def json_response(payload, headers: dict = None, status_code: int = 200) -> Response:
+    """Respuesta ya serializada: FastAPI no vuelve a validarla contra response_model"""
+    return Response(
+        content=dumps(payload), status_code=status_code, headers=headers, media_type="application/json"
+    )
@@ -0,0 +1,304 @@
+"""
+Punto de entrada de producción: varios workers de uvicorn con la app precargada
+
+El proceso principal reparte DB_MAX_CONNECTIONS entre los pools de la primaria
+de los workers (asíncrono y síncrono) y REPLICA_MAX_CONNECTIONS entre sus pools
+de cada réplica, para que la suma no supere el límite de conexiones de
+PostgreSQL, y los núcleos entre sus pools de bcrypt; importa app.main una sola
+vez, abre el socket y crea WEB_CONCURRENCY workers con fork: los módulos ya
+importados se comparten por copy-on-write y cada worker arranca sin volver a
+importarlos.
+Un worker que termina de forma inesperada se reemplaza; SIGTERM o SIGINT los
+detienen en orden (uvicorn termina las solicitudes en curso). No arranca si
+los pools no caben en esos límites o si falta FORWARDED_ALLOW_IPS.
+
+Sin fork (Windows) o con un solo worker, uvicorn corre en este mismo proceso.
+
+Uso:
+    python -m app.server --workers 4 --port 8000
+"""
+import argparse
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("app.server")
+
+# Conexiones a la primaria para todos los workers juntos (max_connections de PostgreSQL
+# menos las reservadas para migraciones, consola y superusuario); 0: no se reparten
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "90"))
+# Lo mismo para cada réplica de lectura (cada una tiene su propio max_connections)
+REPLICA_MAX_CONNECTIONS = int(os.getenv("REPLICA_MAX_CONNECTIONS", str(DB_MAX_CONNECTIONS)))
+# Proxies de confianza para X-Forwarded-For/-Proto (ver app.forwarding); obligatorio para arrancar
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "")
+WEB_GRACEFUL_TIMEOUT = float(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+# Pausa antes de reemplazar un worker caído: evita un bucle de reinicios si falla al arrancar
+WORKER_RESPAWN_DELAY = 1.0
+
+
+def cpu_count() -> int:
+    """Núcleos que puede usar este proceso (respeta la afinidad de CPU del contenedor)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _enabled(environ, name: str, default: str) -> bool:
+    return environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+def lifespan_connections(environ=os.environ) -> tuple:
+    """Conexiones que las tareas de fondo de cada worker (app.main) pueden tener abiertas a la vez
+
+    (primaria, cada réplica): el reloj de sincronización y las revocaciones usan
+    la primaria; el observador de cambios, el índice de ocupación y las
+    instantáneas leen de una réplica o, si ninguna está disponible, de la
+    primaria; cada réplica además recibe el chequeo de retraso.
+    """
+    reads = (
+        (float(environ.get("READ_CACHE_POLL_SECONDS", "2")) > 0)
+        + (float(environ.get("OCCUPANCY_REFRESH_SECONDS", "60")) > 0)
+        + _enabled(environ, "SNAPSHOT_ENABLED", "true")
+    )
+    return 2 + reads, 1 + reads
+
+
+def _pool_budget(settings: dict, environ, size_var: str, overflow_var: str, defaults: tuple,
+                 share: int, reserved: int = 0) -> int:
+    """Reparte `share` conexiones en fijas y desborde, salvo que el pool se configure explícitamente
+
+    Las fijas son las `reserved` de las tareas de fondo más hasta 5 para las
+    solicitudes. Devuelve cuántas conexiones puede abrir el pool de un worker.
+    """
+    if size_var in environ or overflow_var in environ:
+        return int(environ.get(size_var, defaults[0])) + int(environ.get(overflow_var, defaults[1]))
+    pool_size = min(reserved + 5, share)
+    settings[size_var] = str(pool_size)
+    settings[overflow_var] = str(share - pool_size)
+    return share
+
+
+def worker_settings(workers: int, environ=os.environ, cpus: int = None) -> dict:
+    """Variables de entorno por worker: tamaño de los pools de conexiones y de bcrypt
+
+    ValueError si los pools de todos los workers no caben en DB_MAX_CONNECTIONS
+    o REPLICA_MAX_CONNECTIONS: con más workers que conexiones las solicitudes
+    fallarían al conectarse en lugar de esperar en el pool.
+    """
+    settings = {}
+    primary_reserved, replica_reserved = lifespan_connections(environ)
+    if DB_MAX_CONNECTIONS > 0:
+        # El motor síncrono no atiende solicitudes: una conexión por worker basta
+        sync = _pool_budget(settings, environ, "DB_SYNC_POOL_SIZE", "DB_SYNC_MAX_OVERFLOW", ("1", "2"), 1)
+        # Tareas de fondo más al menos una conexión para las solicitudes
+        needed = sync + primary_reserved + 1
+        if workers * needed > DB_MAX_CONNECTIONS:
+            raise ValueError(
+                f"{workers} workers necesitan al menos {workers * needed} conexiones a la primaria "
+                f"({needed} cada uno) y DB_MAX_CONNECTIONS={DB_MAX_CONNECTIONS}: "
+                f"usa a lo sumo {DB_MAX_CONNECTIONS // needed} workers"
+            )
+        # Para las solicitudes, nunca más que los valores por defecto de database.py (5 fijas + 10 de desborde)
+        share = min(primary_reserved + 15, DB_MAX_CONNECTIONS // workers - sync)
+        primary = _pool_budget(
+            settings, environ, "DB_POOL_SIZE", "DB_MAX_OVERFLOW", ("5", "10"), share, primary_reserved
+        )
+        total = workers * (primary + sync)
+        if total > DB_MAX_CONNECTIONS:
+            raise ValueError(
+                f"{workers} workers abren hasta {total} conexiones a la primaria ({primary} asíncronas + "
+                f"{sync} síncronas cada uno) y DB_MAX_CONNECTIONS={DB_MAX_CONNECTIONS}"
+            )
+    if environ.get("DATABASE_REPLICA_URLS", "").strip() and REPLICA_MAX_CONNECTIONS > 0:
+        # Cada worker tiene un pool por réplica: se reparte el límite de cada una
+        needed = replica_reserved + 1
+        if workers * needed > REPLICA_MAX_CONNECTIONS:
+            raise ValueError(
+                f"{workers} workers necesitan al menos {workers * needed} conexiones a cada réplica "
+                f"y REPLICA_MAX_CONNECTIONS={REPLICA_MAX_CONNECTIONS}: "
+                f"usa a lo sumo {REPLICA_MAX_CONNECTIONS // needed} workers"
+            )
+        share = min(replica_reserved + 15, REPLICA_MAX_CONNECTIONS // workers)
+        replica = _pool_budget(
+            settings, environ, "REPLICA_POOL_SIZE", "REPLICA_MAX_OVERFLOW", ("5", "10"), share, replica_reserved
+        )
+        total = workers * replica
+        if total > REPLICA_MAX_CONNECTIONS:
+            raise ValueError(
+                f"{workers} workers abren hasta {total} conexiones a cada réplica "
+                f"y REPLICA_MAX_CONNECTIONS={REPLICA_MAX_CONNECTIONS}"
+            )
+    if "PASSWORD_POOL_WORKERS" not in environ:
+        settings["PASSWORD_POOL_WORKERS"] = str(max(1, (cpus or cpu_count()) // workers))
+    return settings
+
+
+def _config(app, args):
+    import uvicorn
+
+    return uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        # X-Forwarded-For lo resuelve app.forwarding (el salto de confianza más a la derecha);
+        # con "*" uvicorn tomaría el de la izquierda, que escribe el cliente
+        proxy_headers=False,
+        timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT,
+        log_level=args.log_level,
+    )
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _spawn(app, sock, args) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    # Grupo propio: Ctrl+C llega solo al proceso principal, que detiene a los workers con SIGTERM.
+    # Hasta que uvicorn instale los suyos, las señales no deben ejecutar el manejador del principal
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    import uvicorn
+
+    code = 0
+    try:
+        uvicorn.Server(_config(app, args)).run(sockets=[sock])
+    except BaseException:
+        logger.exception("El worker %d terminó con error", os.getpid())
+        code = 1
+    finally:
+        logging.shutdown()
+        os._exit(code)
+
+
+def serve(args, settings: dict):
+    os.environ.update(settings)
+    shared_dir = None
+    if args.workers > 1 and hasattr(os, "fork") and not os.getenv("SNAPSHOT_DIR"):
+        # Instantáneas de horario construidas por un solo worker y leídas por todos (app.snapshots)
+        memory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        shared_dir = tempfile.mkdtemp(prefix="senati-snapshots-", dir=memory)
+        os.environ["SNAPSHOT_DIR"] = shared_dir
+
+    # Precarga: todo lo que importa la app queda en memoria antes del fork
+    from app.main import app
+
+    if args.workers == 1 or not hasattr(os, "fork"):
+        import uvicorn
+
+        uvicorn.Server(_config(app, args)).run()
+        return
+
+    sock = _bind(args.host, args.port)
+    logger.info(
+        "Escuchando en %s:%d con %d workers (pools por worker: primaria %s + %s, síncrono %s + %s, "
+        "réplicas %s + %s; bcrypt: %s hilos)",
+        args.host, args.port, args.workers,
+        os.getenv("DB_POOL_SIZE", "5"), os.getenv("DB_MAX_OVERFLOW", "10"),
+        os.getenv("DB_SYNC_POOL_SIZE", "1"), os.getenv("DB_SYNC_MAX_OVERFLOW", "2"),
+        os.getenv("REPLICA_POOL_SIZE", "5"), os.getenv("REPLICA_MAX_OVERFLOW", "10"),
+        os.getenv("PASSWORD_POOL_WORKERS", "auto"),
+    )
+    # Los objetos de la precarga no se recorren en el GC de los workers: sus páginas siguen compartidas
+    gc.freeze()
+
+    workers = set()
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            _signal(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    for _ in range(args.workers):
+        workers.add(_spawn(app, sock, args))
+
+    deadline = None
+    while workers:
+        if stopping:
+            deadline = deadline or time.monotonic() + WEB_GRACEFUL_TIMEOUT + 5
+            if time.monotonic() >= deadline:
+                for pid in workers:
+                    _signal(pid, signal.SIGKILL)
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.1)
+                continue
+        else:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+        if pid not in workers:
+            continue
+        workers.discard(pid)
+        if stopping:
+            continue
+        logger.warning("El worker %d terminó (estado %d); se reemplaza", pid, status)
+        time.sleep(WORKER_RESPAWN_DELAY)
+        if not stopping:
+            workers.add(_spawn(app, sock, args))
+    sock.close()
+    if shared_dir:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+
+
+def _signal(pid: int, signum: int):
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de producción de la API con varios workers")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or cpu_count(),
+                        help="Cantidad de workers (por defecto WEB_CONCURRENCY o un worker por núcleo)")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    args = parser.parse_args()
+
+    if not FORWARDED_ALLOW_IPS:
+        # Detrás del router de la plataforma todos los clientes compartirían su IP
+        parser.error(
+            "FORWARDED_ALLOW_IPS no está definido: indica las IPs o redes de los proxies de confianza, "
+            "'*' si toda conexión llega por un único router o 'none' si no hay proxy"
+        )
+    try:
+        settings = worker_settings(args.workers)
+    except ValueError as exc:
+        parser.error(str(exc))
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    serve(args, settings)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Registro de consultas lentas con su plan de ejecución
+
+Opcional (SLOW_QUERY_LOG_ENABLED): sin activarlo no se registra ningún hook en
+los motores y el costo es nulo. Activado, cada sentencia que tarda más de
+SLOW_QUERY_THRESHOLD_MS se guarda en un buffer circular por worker con el SQL
+normalizado, la forma de los parámetros (tipos, nunca valores), la ruta, un
+hash del estudiante y el plan: EXPLAIN en la misma conexión y, para una
+fracción SLOW_QUERY_ANALYZE_RATE de los SELECT en PostgreSQL, EXPLAIN ANALYZE.
+El buffer se consulta en /api/diagnostics/slow-queries y, con
+SLOW_QUERY_LOG_FILE, se escribe además como JSON por línea.
+"""
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from itertools import groupby
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+from app import metrics
+from app.cache import TTLCache
+from app.serialization import dumps
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+SLOW_QUERY_ANALYZE_RATE = float(os.getenv("SLOW_QUERY_ANALYZE_RATE", "0"))
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", "")
+# Durante un pico la misma sentencia es lenta muchas veces: su plan se reutiliza este tiempo
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "60"))
+# Sentencias distintas cuyo plan se conserva (LRU)
+SLOW_QUERY_PLAN_CACHE_SIZE = int(os.getenv("SLOW_QUERY_PLAN_CACHE_SIZE", "500"))
+
+
+def _student_key() -> bytes:
+    """Clave del hash de estudiantes: SLOW_QUERY_HASH_KEY o, si falta, una derivada de SECRET_KEY
+
+    Secreta para que el hash no se revierta probando los IDs, pero distinta de la
+    que firma los JWT.
+    """
+    configured = os.getenv("SLOW_QUERY_HASH_KEY")
+    if configured:
+        return hashlib.blake2b(configured.encode("utf-8"), digest_size=32).digest()
+    secret = os.getenv("SECRET_KEY", "your-secret-key-change-in-production").encode("utf-8")
+    return hashlib.blake2b(b"senati slow-query student hash", key=secret[:64], digest_size=32).digest()
+
+
+_STUDENT_KEY = _student_key()
+
+_PLACEHOLDER = r"(?:\?|\$\d+|%s|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|(?<![\w$.])\d+(?:\.\d+)?\b")
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+
+def normalize(statement: str) -> str:
+    """SQL en una línea, sin literales y con las listas de parámetros (IN) colapsadas"""
+    statement = " ".join(statement.split())
+    statement = _PLACEHOLDER_LIST.sub("(?, ...)", statement)
+    return _LITERAL.sub("?", statement)
+
+
+def _types(values) -> list:
+    # Un IN con 500 IDs se resume como "str x500"
+    result = []
+    for name, group in groupby(type(value).__name__ for value in values):
+        count = sum(1 for _ in group)
+        result.append(name if count == 1 else f"{name} x{count}")
+    return result
+
+
+def parameters_shape(parameters, executemany: bool = False):
+    """Tipos de los parámetros, sin sus valores"""
+    if executemany:
+        return {"rows": len(parameters), "each": parameters_shape(parameters[0]) if parameters else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return _types(parameters or ())
+
+
+def student_hash(student_id: str) -> str:
+    return hashlib.blake2b(student_id.encode("utf-8"), key=_STUDENT_KEY, digest_size=8).hexdigest()
+
+
+class SlowQueryLog:
+    """Buffer circular de las últimas consultas lentas de este worker"""
+
+    def __init__(self, size: int = SLOW_QUERY_BUFFER_SIZE, threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+                 analyze_rate: float = SLOW_QUERY_ANALYZE_RATE, path: str = SLOW_QUERY_LOG_FILE):
+        self.threshold = threshold_ms / 1000
+        self.analyze_rate = analyze_rate
+        self.path = path
+        self.enabled = False
+        self.recorded = {}  # motor -> consultas lentas registradas
+        self._entries = deque(maxlen=size)
+        # SQL normalizado -> plan, acotado en cantidad y en tiempo
+        self._plans = TTLCache(maxsize=SLOW_QUERY_PLAN_CACHE_SIZE, ttl=SLOW_QUERY_EXPLAIN_INTERVAL)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def entries(self, limit: int = None) -> list:
+        """Las más recientes primero"""
+        entries = list(self._entries)[::-1]
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self):
+        self._entries.clear()
+        self._plans.clear()
+
+    def instrument(self, engine, name: str):
+        """Hooks de tiempo sobre un motor (síncrono o asíncrono)"""
+        self.enabled = True
+        self.recorded.setdefault(name, 0)
+        engine = getattr(engine, "sync_engine", engine)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["slow_query_started"].pop()
+            if elapsed >= self.threshold:
+                self.record(conn, name, statement, parameters, executemany, elapsed)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(context):
+            started = context.connection.info.get("slow_query_started") if context.connection else None
+            if started:
+                started.pop()
+
+    def record(self, conn, engine_name, statement, parameters, executemany, elapsed):
+        scope = metrics.current_request()
+        student_id = scope.get("path_params", {}).get("student_id") if scope else None
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "engine": engine_name,
+            "duration_ms": round(elapsed * 1000, 3),
+            "sql": normalize(statement),
+            "parameters": parameters_shape(parameters, executemany),
+            "route": f"{scope['method']} {metrics.route_label(scope)}" if scope else None,
+            "student": student_hash(student_id) if student_id else None,
+            "plan": None,
+            "analyzed": False,
+        }
+        entry["plan"], entry["analyzed"] = self._plan(conn, statement, parameters, executemany, entry["sql"])
+        self._entries.append(entry)
+        self.recorded[engine_name] += 1
+        if self.path:
+            self._write(entry)
+
+    def _plan(self, conn, statement, parameters, executemany, normalized):
+        keyword = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+        if keyword not in _EXPLAINABLE:
+            return None, False
+        dialect = conn.dialect.name
+        analyze = (
+            dialect == "postgresql" and keyword == "select"
+            and self.analyze_rate > 0 and random.random() < self.analyze_rate
+        )
+        cached = self._plans.get(normalized)
+        if not analyze and cached is not None:
+            return cached, False
+
+        if dialect == "postgresql":
+            prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        elif dialect == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN "
+        else:
+            prefix = "EXPLAIN "
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        try:
+            plan = self._explain(conn, dialect, prefix + statement, parameters)
+        except Exception as exc:
+            # El diagnóstico nunca debe romper la solicitud que lo originó
+            logger.warning("No se pudo obtener el plan de una consulta lenta: %s", exc)
+            return None, False
+        self._plans.set(normalized, plan)
+        return plan, analyze
+
+    @staticmethod
+    def _explain(conn, dialect, statement, parameters) -> str:
+        """EXPLAIN por el cursor DBAPI de la misma conexión: misma transacción y sin volver a disparar los hooks"""
+        cursor = conn.connection.dbapi_connection.cursor()
+        savepoint = dialect == "postgresql"
+        try:
+            # En PostgreSQL un error abortaría la transacción de la solicitud
+            if savepoint:
+                cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(statement, parameters)
+                rows = cursor.fetchall()
+            except Exception:
+                if savepoint:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        finally:
+            cursor.close()
+        # PostgreSQL: una línea de texto por fila; SQLite: (id, parent, notused, detail)
+        return "\n".join(str(row[-1]) for row in rows)
+
+    def _write(self, entry):
+        try:
+            with self._lock:
+                if self._file is None:
+                    self._file = open(self.path, "ab")
+                self._file.write(dumps(entry) + b"\n")
+                self._file.flush()
+        except OSError:
+            logger.exception("No se pudo escribir el registro de consultas lentas en %s", self.path)
+
+
+slow_query_log = SlowQueryLog()
+
+
+def instrument_engine(engine, name: str):
+    """Engancha el registro al motor si SLOW_QUERY_LOG_ENABLED; si no, no agrega ningún costo"""
+    if SLOW_QUERY_LOG_ENABLED:
+        slow_query_log.instrument(engine, name)
+
+
+metrics.registry.register(metrics.Counter(
+    "senati_slow_queries_total", "Sentencias que superaron SLOW_QUERY_THRESHOLD_MS", ("engine",),
+    lambda: [((name,), count) for name, count in slow_query_log.recorded.items()]
+))
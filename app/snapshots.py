@@ -0,0 +1,389 @@
+"""
+Instantáneas ya serializadas del horario de hoy y de la semana en curso
+
+Casi todas las consultas de horario piden el día o la semana actuales y llegan
+a la vez (al inicio de cada bloque de clases). Un planificador que corre en el
+lifespan de la aplicación arma, sede por sede y en lotes con pausas para no
+competir con el tráfico, el cuerpo JSON y los validadores de cada estudiante
+para hoy (y, SNAPSHOT_WARMUP_MINUTES antes de medianoche, para mañana) y para
+su semana de lunes a domingo. Los endpoints de horario los sirven tal cual.
+
+Con varios workers (app.server) las instantáneas no se repiten en cada uno:
+viven en un archivo SQLite de SNAPSHOT_DIR que todos leen, y solo el worker
+que tiene el lock del directorio las construye. Si ese worker termina, otro
+toma el lock en su próxima pasada. Con un solo proceso quedan en memoria.
+
+Las instantáneas reciben las mismas invalidaciones que la caché de lectura:
+las escrituras del ORM al confirmarse y los cambios de otros procesos (el
+importador) cuando read_cache.ChangeWatcher ve avanzar el reloj de
+sincronización. En ambos casos se reconstruyen solo los estudiantes afectados.
+Con el archivo compartido, el worker que ve la invalidación borra esas filas
+y la anota: una construcción que consultó la base antes no las vuelve a
+escribir.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from itertools import groupby, islice
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from app import metrics, read_cache, schedule_data
+from app.database import read_session
+from app.dimensions import dimension_cache
+from app.models import CareerData, Student
+from app.serialization import dumps
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin fork no hay workers que compartan el directorio
+    fcntl = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "true").lower() in ("1", "true", "yes")
+SNAPSHOT_WARMUP_MINUTES = float(os.getenv("SNAPSHOT_WARMUP_MINUTES", "15"))
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("SNAPSHOT_CHECK_SECONDS", "30"))
+# Estudiantes por consulta y pausa entre lotes: la construcción cede el event loop al tráfico
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "200"))
+SNAPSHOT_BATCH_PAUSE = float(os.getenv("SNAPSHOT_BATCH_PAUSE", "0.05"))
+# Directorio compartido por los workers (app.server lo crea si falta); vacío: en memoria del worker
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")
+
+
+def week_of(day: date):
+    monday = day - timedelta(days=day.weekday())
+    return monday, monday + timedelta(days=6)
+
+
+def target_days(now: datetime):
+    """Hoy y, en los últimos SNAPSHOT_WARMUP_MINUTES del día, también mañana"""
+    today = now.date()
+    midnight = datetime.combine(today + timedelta(days=1), datetime.min.time(), now.tzinfo)
+    if midnight - now <= timedelta(minutes=SNAPSHOT_WARMUP_MINUTES):
+        return [today, today + timedelta(days=1)]
+    return [today]
+
+
+class MemorySnapshots:
+    """(student_id, desde, hasta) -> (cuerpo JSON, ETag, Last-Modified) en memoria del worker"""
+
+    shared = False
+
+    def __init__(self):
+        self._entries = {}
+        self.size_bytes = 0
+
+    @property
+    def local_bytes(self) -> int:
+        return self.size_bytes
+
+    def lead(self) -> bool:
+        return True
+
+    def get(self, key) -> Optional[tuple]:
+        return self._entries.get(key)
+
+    def put_many(self, items, built_at: float):
+        # Lo invalidado durante la construcción ya lo excluye SnapshotStore._dirty
+        for key, entry in items:
+            previous = self._entries.get(key)
+            if previous is not None:
+                self.size_bytes -= len(previous[0])
+            self._entries[key] = entry
+            self.size_bytes += len(entry[0])
+
+    def drop(self, keep):
+        for key in [key for key in self._entries if not keep(key)]:
+            self.size_bytes -= len(self._entries.pop(key)[0])
+
+    def drop_students(self, student_ids, at: float):
+        if student_ids is None:
+            self.drop(lambda key: False)
+        else:
+            self.drop(lambda key: key[0] not in student_ids)
+
+    def drop_before(self, today: date):
+        self.drop(lambda key: key[2] >= today)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedSnapshots:
+    """Las mismas entradas en un archivo SQLite que leen todos los workers; escribe el que tiene el lock"""
+
+    shared = True
+    # Una sola copia para todos los workers, en el caché de páginas del sistema
+    local_bytes = 0
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, "snapshots.sqlite3")
+        self._conn = None
+        self._pid = None
+        self._lock = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Conexión propia de cada worker: una heredada por fork no se puede usar
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots (student_id TEXT, start_date TEXT, end_date TEXT, "
+                "body BLOB, etag TEXT, last_modified TEXT, PRIMARY KEY (student_id, start_date, end_date)) "
+                "WITHOUT ROWID"
+            )
+            # Última invalidación de cada estudiante ("*": todos), la vea el worker que la vea
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS invalidations (student_id TEXT PRIMARY KEY, at REAL) WITHOUT ROWID"
+            )
+            self._pid, self._lock = os.getpid(), None
+        return self._conn
+
+    def lead(self) -> bool:
+        """True si este worker construye: toma el lock del directorio y lo conserva mientras viva"""
+        if self._lock is not None and self._pid == os.getpid():
+            return True
+        self.conn.execute("SELECT 1")  # conexión de este worker; un lock heredado no cuenta
+        lock = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return False
+        self._lock = lock
+        return True
+
+    def get(self, key) -> Optional[tuple]:
+        row = self.conn.execute(
+            "SELECT body, etag, last_modified FROM snapshots WHERE student_id = ? AND start_date = ? AND end_date = ?",
+            (key[0], key[1].isoformat(), key[2].isoformat()),
+        ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified = row
+        return body, etag, datetime.fromisoformat(last_modified) if last_modified else None
+
+    def put_many(self, items, built_at: float):
+        """Guarda las entradas salvo las de estudiantes invalidados después de `built_at` (por cualquier worker)"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO snapshots SELECT ?, ?, ?, ?, ?, ? WHERE NOT EXISTS ("
+                "SELECT 1 FROM invalidations WHERE student_id IN (?, '*') AND at >= ?)",
+                [
+                    (key[0], key[1].isoformat(), key[2].isoformat(), body, etag,
+                     last_modified.isoformat() if last_modified else None, key[0], built_at)
+                    for key, (body, etag, last_modified) in items
+                ],
+            )
+
+    def drop_students(self, student_ids, at: float):
+        with self.conn:
+            if student_ids is None:
+                self.conn.execute("DELETE FROM snapshots")
+                student_ids = ["*"]
+            else:
+                self.conn.executemany("DELETE FROM snapshots WHERE student_id = ?", [(s,) for s in student_ids])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO invalidations VALUES (?, ?)", [(s, at) for s in student_ids]
+            )
+
+    def drop_before(self, today: date):
+        with self.conn:
+            self.conn.execute("DELETE FROM snapshots WHERE end_date < ?", (today.isoformat(),))
+            # Ninguna construcción dura tanto: las anotaciones más viejas ya no descartan nada
+            self.conn.execute("DELETE FROM invalidations WHERE at < ?", (time.time() - 3600,))
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(os.path.getsize(path) for path in (self.path, self.path + "-wal") if os.path.exists(path))
+
+    def __len__(self):
+        return self.conn.execute("SELECT count(*) FROM snapshots").fetchone()[0]
+
+
+def create_backend(directory: str = SNAPSHOT_DIR):
+    if directory and fcntl is not None:
+        return SharedSnapshots(directory)
+    return MemorySnapshots()
+
+
+class SnapshotStore:
+    """(student_id, desde, hasta) -> (cuerpo JSON, ETag, Last-Modified) sobre un backend en memoria o compartido"""
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else create_backend()
+        self.hits = 0
+        self.builds = 0
+        self.build_seconds = 0.0
+        self.days = set()
+        self._dirty = set()
+        self._dimensions = None  # versión de la caché de dimensiones con que se armaron los cuerpos
+        self._generation = 0  # avanza al descartar todo: una construcción en curso queda obsoleta
+
+    def __len__(self):
+        return len(self.backend)
+
+    @property
+    def size_bytes(self) -> int:
+        return self.backend.size_bytes
+
+    def get(self, student_id: str, start_date: date, end_date: date) -> Optional[tuple]:
+        snapshot = self.backend.get((student_id, start_date, end_date))
+        if snapshot is not None:
+            self.hits += 1
+        return snapshot
+
+    def invalidate(self, student_ids):
+        """Descarta las instantáneas afectadas; el worker que construye las rearma en su próxima pasada"""
+        self.backend.drop_students(None if student_ids is None else set(student_ids), time.time())
+        if student_ids is None:
+            self.days.clear()
+            self._generation += 1
+            return
+        self._dirty |= set(student_ids)
+
+    def discard_before(self, today: date):
+        self.backend.drop_before(today)
+        self.days = {day for day in self.days if day >= today}
+
+    async def build(self, days, student_ids=None):
+        """Instantáneas de cada día de `days` y de su semana, sede por sede y en lotes"""
+        started = time.perf_counter()
+        generation = self._generation
+        async with read_session() as db:
+            statement = select(Student.id, CareerData.campus).outerjoin(
+                CareerData, CareerData.student_id == Student.id
+            ).order_by(CareerData.campus, Student.id)
+            if student_ids is not None:
+                statement = statement.where(Student.id.in_(student_ids))
+            students = (await db.execute(statement)).all()
+
+        weeks = {}
+        for day in days:
+            weeks.setdefault(week_of(day), []).append(day)
+
+        built = 0
+        for _, campus_students in groupby(students, key=lambda row: row[1]):
+            ids = iter([row[0] for row in campus_students])
+            while batch := list(islice(ids, SNAPSHOT_BATCH_SIZE)):
+                async with read_session() as db:
+                    for (monday, sunday), week_days in weeks.items():
+                        # Antes de la consulta: lo invalidado desde aquí no se da por incluido
+                        built_at = time.time()
+                        rows = (await db.execute(schedule_data.bulk_rows(monday, sunday, batch))).all()
+                        await schedule_data.load_dimensions(db, rows)
+                        if generation == self._generation:
+                            self._store_batch(batch, monday, sunday, week_days, rows, built_at)
+                built += len(batch)
+                # Cede el event loop (y la conexión) a las solicitudes en curso
+                await asyncio.sleep(SNAPSHOT_BATCH_PAUSE)
+
+        elapsed = time.perf_counter() - started
+        if student_ids is None and generation == self._generation:
+            self.days.update(days)
+            self.build_seconds = elapsed
+            logger.info(
+                "Instantáneas de horario para %s: %d estudiantes en %.1f s, %.1f MiB (%s)",
+                ", ".join(day.isoformat() for day in days), built, elapsed, self.size_bytes / 2**20,
+                "compartidas entre workers" if self.backend.shared else "en memoria de este worker",
+            )
+        self.builds += 1
+        return built
+
+    def _store_batch(self, batch, monday, sunday, days, rows, built_at: float):
+        by_student = {
+            student_id: [row[1:] for row in student_rows]
+            for student_id, student_rows in groupby(rows, key=lambda row: row[0])
+        }
+        items = []
+        for student_id in batch:
+            # Cambió durante la construcción: se arma de nuevo en la próxima pasada
+            if student_id in self._dirty:
+                continue
+            student_rows = by_student.get(student_id, [])
+            items.append(self._entry(student_id, monday, sunday, student_rows,
+                                     schedule_data.range_payload(monday, sunday, student_rows)))
+            for day in days:
+                day_rows = [row for row in student_rows if row[1] == day]
+                items.append(self._entry(student_id, day, day, day_rows, schedule_data.day_payload(day, day_rows)))
+        self.backend.put_many(items, built_at)
+
+    @staticmethod
+    def _entry(student_id, start_date, end_date, rows, payload):
+        etag, last_modified = schedule_data.schedule_validators(
+            student_id, start_date, end_date, *schedule_data.rows_version(rows)
+        )
+        return (student_id, start_date, end_date), (dumps(payload), etag, last_modified)
+
+    async def tick(self, now: datetime = None):
+        """Una pasada del planificador: días nuevos, nombres renovados y estudiantes pendientes"""
+        if not self.backend.lead():
+            # Otro worker construye; este solo lee del archivo compartido
+            self._dirty.clear()
+            return
+        days = target_days(now or schedule_data.local_now())
+        self.discard_before(days[0])
+
+        async with read_session() as db:
+            # Recarga los nombres si venció su TTL: las instantáneas no pasan por load_dimensions
+            await schedule_data.load_dimensions(db, ())
+        if dimension_cache.version != self._dimensions:
+            # Un curso, instructor o aula renombrado cambia el cuerpo y el ETag de todas
+            if self._dimensions is not None:
+                self.invalidate(None)
+            self._dimensions = dimension_cache.version
+
+        # Lo que se invalide desde aquí queda en _dirty y build() lo salta: va en la próxima pasada
+        dirty, self._dirty = self._dirty, set()
+        pending = [day for day in days if day not in self.days]
+        if pending:
+            await self.build(pending)
+        built = sorted(self.days - set(pending))
+        if dirty and built:
+            await self.build(built, dirty)
+
+
+snapshot_store = SnapshotStore()
+read_cache.on_invalidate(snapshot_store.invalidate)
+
+
+async def run_scheduler(store: SnapshotStore = snapshot_store):
+    """Bucle del lifespan: una pasada cada SNAPSHOT_CHECK_SECONDS hasta que se cancela"""
+    while True:
+        try:
+            await store.tick()
+        except Exception:
+            # Sin instantáneas los endpoints consultan la base como siempre
+            logger.exception("Fallo al construir las instantáneas de horario")
+        await asyncio.sleep(SNAPSHOT_CHECK_SECONDS)
+
+
+metrics.registry.register(metrics.Gauge(
+    "senati_schedule_snapshots", "Instantáneas de horario disponibles", (), lambda: [((), len(snapshot_store))]
+))
+metrics.registry.register(metrics.Gauge(
+    "senati_schedule_snapshot_bytes", "Bytes de las instantáneas (el archivo compartido, si se comparten)", (),
+    lambda: [((), snapshot_store.size_bytes)]
+))
+metrics.registry.register(metrics.Gauge(
+    "senati_schedule_snapshot_worker_bytes", "Bytes de instantáneas en la memoria propia de este worker", (),
+    lambda: [((), snapshot_store.backend.local_bytes)]
+))
+metrics.registry.register(metrics.Gauge(
+    "senati_schedule_snapshot_build_seconds", "Duración de la última construcción completa de instantáneas", (),
+    lambda: [((), snapshot_store.build_seconds)]
+))
+metrics.registry.register(metrics.Counter(
+    "senati_schedule_snapshot_hits_total", "Solicitudes de horario servidas desde una instantánea", (),
+    lambda: [((), snapshot_store.hits)]
+))
@@ -0,0 +1,167 @@
+"""
+Sincronización incremental: cursores opacos, consultas de cambios por estudiante
+sobre los índices (student_id, version) y avance del reloj publicado
+
+En PostgreSQL las versiones salen de una secuencia y una transacción puede
+confirmar después de otra que tomó un número mayor. El cursor entregado a los
+clientes es sync_clock.version, que ClockAdvancer solo sube hasta una versión
+V cuando ya terminaron todas las transacciones que estaban en curso al leer V.
+"""
+import asyncio
+import base64
+import binascii
+import logging
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import (
+    SYNC_VERSION_SEQUENCE, CareerData, PersonalData, ScheduleEntry, Student, SyncClock, SyncTombstone,
+)
+from app.schedule_data import ENTRY_COLUMNS, entry_payload
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CURSOR_PREFIX = "v1:"
+# Cada cuánto publica cada worker las versiones ya confirmadas (solo PostgreSQL)
+SYNC_CLOCK_SECONDS = float(os.getenv("SYNC_CLOCK_SECONDS", "1"))
+
+
+class InvalidCursor(ValueError):
+    """Cursor de sincronización con formato inválido"""
+
+
+def encode_cursor(version: int) -> str:
+    return base64.urlsafe_b64encode(f"{CURSOR_PREFIX}{version}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        if not raw.startswith(CURSOR_PREFIX):
+            raise InvalidCursor(cursor)
+        version = int(raw[len(CURSOR_PREFIX):])
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if version < 0:
+        raise InvalidCursor(cursor)
+    return version
+
+
+def clock_version():
+    return select(SyncClock.version).where(SyncClock.id == 1)
+
+
+def profile_row(student_id: str):
+    """Estudiante, datos personales y de carrera con sus versiones en un solo SELECT"""
+    return (
+        select(
+            Student.id, Student.first_name, Student.last_name, Student.dni, Student.version,
+            PersonalData.email, PersonalData.phone, PersonalData.address, PersonalData.version,
+            CareerData.level, CareerData.program, CareerData.school, CareerData.campus, CareerData.version,
+        )
+        .outerjoin(PersonalData, PersonalData.student_id == Student.id)
+        .outerjoin(CareerData, CareerData.student_id == Student.id)
+        .where(Student.id == student_id)
+    )
+
+
+def changed_entries(student_id: str, since: int = None):
+    statement = select(*ENTRY_COLUMNS).where(ScheduleEntry.student_id == student_id)
+    if since is not None:
+        statement = statement.where(ScheduleEntry.version > since)
+    return statement.order_by(ScheduleEntry.date, ScheduleEntry.start_time)
+
+
+def deletions(student_id: str, since: int):
+    return select(SyncTombstone.entity, SyncTombstone.entity_id).where(
+        SyncTombstone.student_id == student_id,
+        SyncTombstone.version > since
+    ).order_by(SyncTombstone.version)
+
+
+def _changed(since, *versions) -> bool:
+    return since is None or any(version is not None and version > since for version in versions)
+
+
+def sync_payload(version: int, since, profile, entries, deleted) -> dict:
+    (student_id, first_name, last_name, dni, student_version,
+     email, phone, address, personal_version,
+     level, program, school, campus, career_version) = profile
+
+    personal_data = None
+    if personal_version is not None and _changed(since, student_version, personal_version):
+        personal_data = {
+            "student_id": student_id, "first_name": first_name, "last_name": last_name, "dni": dni,
+            "email": email, "phone": phone, "address": address,
+        }
+    career_data = None
+    if career_version is not None and _changed(since, career_version):
+        career_data = {"level": level, "program": program, "school": school, "campus": campus}
+
+    return {
+        "cursor": encode_cursor(version),
+        "full": since is None,
+        "personal_data": personal_data,
+        "career_data": career_data,
+        "schedule_entries": [entry_payload(row) for row in entries],
+        "deleted": [{"entity": entity, "id": entity_id} for entity, entity_id in deleted],
+    }
+
+
+class ClockAdvancer:
+    """Sube sync_clock hasta la última versión de la secuencia sin transacciones pendientes por debajo
+
+    Cada pasada lee la secuencia (V) y, en una sentencia posterior, los ids de
+    las transacciones en curso. Quien tomó un número <= V ya tenía id de
+    transacción (sequence_next_version lo asigna antes de nextval), así que o
+    confirmó o figura en esa lista. V se publica cuando la lista terminó.
+    """
+
+    def __init__(self):
+        self.published = 0
+        self._pending = None  # (versión, "xid,xid,...")
+
+    async def tick(self, conn):
+        if self._pending is None:
+            last_value, is_called = (await conn.execute(text(
+                f"SELECT last_value, is_called FROM {SYNC_VERSION_SEQUENCE}"
+            ))).one()
+            xids = await conn.scalar(text(
+                "SELECT string_agg(xid::text, ',') FROM pg_snapshot_xip(pg_current_snapshot()) AS xid"
+            ))
+            self._pending = (last_value if is_called else last_value - 1, xids or "")
+        version, xids = self._pending
+        if xids and not await conn.scalar(text(
+            "SELECT bool_and(pg_xact_status(xid) IS DISTINCT FROM 'in progress') "
+            "FROM unnest(string_to_array(:xids, ',')::xid8[]) AS xid"
+        ), {"xids": xids}):
+            return
+        # Varios workers publican a la vez: el reloj nunca retrocede
+        await conn.execute(
+            update(SyncClock).where(SyncClock.id == 1, SyncClock.version < version).values(version=version)
+        )
+        await conn.commit()
+        self.published = version
+        self._pending = None
+
+
+clock_advancer = ClockAdvancer()
+
+
+async def run_clock(engine, advancer: ClockAdvancer = clock_advancer):
+    """Bucle del lifespan contra la primaria; no hace nada fuera de PostgreSQL"""
+    if engine.dialect.name != "postgresql":
+        return
+    while True:
+        try:
+            async with engine.connect() as conn:
+                await advancer.tick(conn)
+        except (SQLAlchemyError, OSError):
+            # Los clientes solo ven los cambios más tarde; se reintenta en la próxima pasada
+            logger.exception("Fallo al avanzar el reloj de sincronización")
+        await asyncio.sleep(SYNC_CLOCK_SECONDS)
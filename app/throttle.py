@@ -0,0 +1,220 @@
+"""
+Límite de intentos de login con cubetas de tokens por estudiante y por IP
+
+Se evalúa antes de consultar la base o ejecutar bcrypt, así que un ataque de
+credenciales o una tormenta de reconexiones no consume CPU en hashing. Un
+login correcto devuelve sus tokens: solo los intentos fallidos agotan las
+cubetas. La IP es la del cliente según app.forwarding; mientras no se
+configuren los proxies de confianza (FORWARDED_ALLOW_IPS) todos los clientes
+parecen venir del router y el límite por IP no se aplica. El almacenamiento
+es intercambiable: en memoria por worker (por defecto) o Redis para compartir
+los contadores entre workers.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from app import forwarding, metrics
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LOGIN_THROTTLE_ENABLED = os.getenv("LOGIN_THROTTLE_ENABLED", "true").lower() in ("1", "true", "yes")
+# memory | redis://host:6379/0
+LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")
+LOGIN_THROTTLE_STUDENT_BURST = float(os.getenv("LOGIN_THROTTLE_STUDENT_BURST", "5"))
+LOGIN_THROTTLE_STUDENT_PER_MINUTE = float(os.getenv("LOGIN_THROTTLE_STUDENT_PER_MINUTE", "5"))
+LOGIN_THROTTLE_IP_BURST = float(os.getenv("LOGIN_THROTTLE_IP_BURST", "30"))
+LOGIN_THROTTLE_IP_PER_MINUTE = float(os.getenv("LOGIN_THROTTLE_IP_PER_MINUTE", "30"))
+LOGIN_THROTTLE_SHARDS = int(os.getenv("LOGIN_THROTTLE_SHARDS", "32"))
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "200000"))
+
+# Un student_id arbitrariamente largo no debe inflar la memoria de las cubetas
+MAX_KEY_LENGTH = 64
+
+throttled = metrics.registry.register(metrics.Counter(
+    "senati_login_throttled_total", "Intentos de login rechazados antes de bcrypt", ("scope",)
+))
+
+
+class BucketStore:
+    """Backend de cubetas: `take` consume un token y devuelve 0, o los segundos hasta el próximo
+
+    `refund` devuelve el token de un intento que resultó correcto. Sin
+    almacenamiento propio admite todos los intentos; MemoryBucketStore y
+    RedisBucketStore guardan las cubetas.
+    """
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        return 0.0
+
+    async def refund(self, key: str, burst: float):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryBucketStore(BucketStore):
+    """Cubetas en memoria repartidas en shards con su propio lock y expulsión LRU"""
+
+    def __init__(self, shards: int = LOGIN_THROTTLE_SHARDS, max_keys: int = LOGIN_THROTTLE_MAX_KEYS):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(max(1, shards))]
+        self._max_per_shard = max(1, max_keys // len(self._shards))
+
+    def take_now(self, key: str, rate: float, burst: float, now: float = None) -> float:
+        now = time.monotonic() if now is None else now
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            state = buckets.get(key)
+            if state is None:
+                tokens = burst
+            else:
+                tokens = min(burst, state[0] + (now - state[1]) * rate)
+                buckets.move_to_end(key)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            buckets[key] = (tokens, now)
+            while len(buckets) > self._max_per_shard:
+                buckets.popitem(last=False)
+            return wait
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        return self.take_now(key, rate, burst)
+
+    def refund_now(self, key: str, burst: float):
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            state = buckets.get(key)
+            if state is not None:
+                buckets[key] = (min(burst, state[0] + 1), state[1])
+
+    async def refund(self, key: str, burst: float):
+        self.refund_now(key, burst)
+
+    def clear(self):
+        for lock, buckets in self._shards:
+            with lock:
+                buckets.clear()
+
+    def __len__(self):
+        return sum(len(buckets) for _, buckets in self._shards)
+
+
+class RedisBucketStore(BucketStore):
+    """Cubetas compartidas entre workers; la recarga y el consumo son atómicos en un script Lua"""
+
+    SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = burst
+if state[1] then
+  tokens = math.min(burst, tonumber(state[1]) + (now - tonumber(state[2])) * rate)
+end
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+    REFUND_SCRIPT = """
+local tokens = redis.call('HGET', KEYS[1], 'tokens')
+if tokens then
+  redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[1]), tonumber(tokens) + 1))
+end
+return 0
+"""
+
+    def __init__(self, url: str, prefix: str = "senati:login:"):
+        # redis es opcional: solo se necesita con LOGIN_THROTTLE_BACKEND=redis://...
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "LOGIN_THROTTLE_BACKEND usa Redis pero el paquete redis no está instalado: "
+                "pip install -r requirements-redis.txt"
+            ) from exc
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+        self._refund = self._client.register_script(self.REFUND_SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        return float(await self._script(keys=[self.prefix + key], args=[rate, burst]))
+
+    async def refund(self, key: str, burst: float):
+        await self._refund(keys=[self.prefix + key], args=[burst])
+
+
+def create_store(backend: str = LOGIN_THROTTLE_BACKEND) -> BucketStore:
+    if backend.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBucketStore(backend)
+    return MemoryBucketStore()
+
+
+class LoginThrottle:
+    """Cubeta por IP y por student_id; la IP se evalúa primero para no gastar la del estudiante"""
+
+    def __init__(self, store: BucketStore, enabled: bool = LOGIN_THROTTLE_ENABLED):
+        self.store = store
+        self.enabled = enabled
+        self.limits = {
+            "ip": (LOGIN_THROTTLE_IP_PER_MINUTE / 60, LOGIN_THROTTLE_IP_BURST),
+            "student": (LOGIN_THROTTLE_STUDENT_PER_MINUTE / 60, LOGIN_THROTTLE_STUDENT_BURST),
+        }
+        if enabled and not forwarding.trusted_proxies.configured:
+            logger.warning(
+                "FORWARDED_ALLOW_IPS no está definido: el límite de login por IP queda desactivado "
+                "(detrás de un proxy todos los clientes compartirían su IP)"
+            )
+
+    def _keys(self, client_ip: str, student_id: str):
+        # Sin proxies de confianza configurados la IP puede ser la del router: no se limita por ella
+        if forwarding.trusted_proxies.configured:
+            yield "ip", f"ip:{(client_ip or 'unknown')[:MAX_KEY_LENGTH]}"
+        yield "student", f"student:{student_id[:MAX_KEY_LENGTH]}"
+
+    async def retry_after(self, client_ip: str, student_id: str) -> int:
+        """0 si el intento se admite; si no, los segundos a esperar (para Retry-After)"""
+        if not self.enabled:
+            return 0
+        for scope, key in self._keys(client_ip, student_id):
+            rate, burst = self.limits[scope]
+            try:
+                wait = await self.store.take(key, rate, burst)
+            except Exception:
+                # Si el backend compartido falla se deja pasar: el pool de bcrypt sigue acotado
+                logger.exception("Fallo del backend de límite de login")
+                return 0
+            if wait > 0:
+                throttled.inc(scope)
+                return max(1, math.ceil(wait))
+        return 0
+
+    async def succeeded(self, client_ip: str, student_id: str):
+        """Devuelve los tokens de un login correcto: una sede entera puede entrar a la vez por la misma IP"""
+        if not self.enabled:
+            return
+        for scope, key in self._keys(client_ip, student_id):
+            try:
+                await self.store.refund(key, self.limits[scope][1])
+            except Exception:
+                logger.exception("Fallo del backend de límite de login")
+                return
+
+
+login_throttle = LoginThrottle(create_store())
@@ -0,0 +1,3 @@
+"""
+Benchmarks y generación de datos sintéticos para la API SENATI
+"""
@@ -0,0 +1,187 @@
+"""
+Benchmark: solicitudes concurrentes por worker con sesión síncrona vs asíncrona
+
+Compara la implementación anterior (Session síncrona dentro de handlers async,
+que bloquea el event loop durante cada consulta) con la actual (AsyncSession).
+Para que la diferencia sea visible con SQLite se simula la latencia de red de
+la base de datos con un retardo por sentencia en el hilo que la ejecuta.
+
+Uso:
+    python benchmarks/bench_async_db.py --requests 400 --concurrency 50 --latency-ms 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, time as dtime
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Query, status
+from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import Base, SessionLocal, async_engine, engine
+from app.main import app
+from app.models import Course, Instructor, Location, ScheduleEntry, Student
+from app.routers.auth import ALGORITHM, SECRET_KEY, create_access_token, oauth2_scheme
+from app.schemas import ScheduleEntryResponse, ScheduleResponse
+
+SCHEDULE_DATE = date(2024, 1, 28)
+
+
+def add_latency(bench_engine, seconds):
+    """Simula la latencia de red retrasando cada sentencia en el hilo del driver"""
+    def delay(statement):
+        time.sleep(seconds)
+
+    @event.listens_for(bench_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if hasattr(dbapi_connection, "run_async"):
+            dbapi_connection.run_async(lambda conn: conn.set_trace_callback(delay))
+        else:
+            dbapi_connection.set_trace_callback(delay)
+
+
+def seed(students):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        course = Course(name="DESARROLLO HUMANO")
+        instructor = Instructor(name="OLAZA GARIBAY, JENNY ROSARIO")
+        location = Location(name="IND - TORRE C 60TC - 504")
+        for i in range(students):
+            student_id = f"{i:09d}"
+            db.add(Student(
+                id=student_id,
+                password_hash="x",
+                first_name="Bench",
+                last_name=f"Student {i}",
+                dni=f"{i:08d}",
+            ))
+            for hour in (7, 10, 14):
+                db.add(ScheduleEntry(
+                    student_id=student_id,
+                    date=SCHEDULE_DATE,
+                    start_time=dtime(hour, 0),
+                    end_time=dtime(hour + 2, 0),
+                    course=course,
+                    instructor=instructor,
+                    location=location,
+                ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_legacy_app():
+    """Réplica de la ruta de horario antes del cambio (Session síncrona)"""
+    legacy = FastAPI()
+
+    def get_sync_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def get_current_student_sync(token: str = Depends(oauth2_scheme), db: Session = Depends(get_sync_db)):
+        try:
+            student_id = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        except JWTError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        student = db.query(Student).filter(Student.id == student_id).first()
+        if student is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        return student
+
+    @legacy.get("/api/schedule/{student_id}", response_model=ScheduleResponse)
+    async def get_schedule(
+        student_id: str,
+        schedule_date: date = Query(...),
+        current_student: Student = Depends(get_current_student_sync),
+        db: Session = Depends(get_sync_db)
+    ):
+        entries = db.query(ScheduleEntry).filter(
+            ScheduleEntry.student_id == student_id,
+            ScheduleEntry.date == schedule_date
+        ).order_by(ScheduleEntry.start_time).all()
+        return ScheduleResponse(
+            date=schedule_date,
+            entries=[
+                ScheduleEntryResponse(
+                    id=entry.id, date=entry.date, start_time=entry.start_time, end_time=entry.end_time,
+                    course_name=entry.course.name, instructor_name=entry.instructor.name,
+                    location=entry.location.name,
+                )
+                for entry in entries
+            ]
+        )
+
+    return legacy
+
+
+async def run(target_app, total, concurrency, students):
+    transport = httpx.ASGITransport(app=target_app)
+    tokens = [create_access_token({"sub": f"{i:09d}"}) for i in range(students)]
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(n):
+            student = n % students
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(
+                    f"/api/schedule/{student:09d}",
+                    params={"schedule_date": SCHEDULE_DATE.isoformat()},
+                    headers={"Authorization": f"Bearer {tokens[student]}"},
+                )
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(n) for n in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    seed(args.students)
+    if args.latency_ms and engine.dialect.name == "sqlite":
+        add_latency(engine, args.latency_ms / 1000)
+        add_latency(async_engine.sync_engine, args.latency_ms / 1000)
+
+    for name, target in (("sync Session (antes)", build_legacy_app()), ("AsyncSession (ahora)", app)):
+        result = asyncio.run(run(target, args.requests, args.concurrency, args.students))
+        print(
+            f"{name:<22} {result['rps']:8.1f} req/s  "
+            f"p50={result['p50_ms']:7.1f} ms  p95={result['p95_ms']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
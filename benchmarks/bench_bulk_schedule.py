@@ -0,0 +1,116 @@
+"""
+Benchmark: horario de una sección con N llamadas individuales vs una consulta masiva
+
+Genera un dataset sintético y compara armar el horario de un rango para N
+estudiantes con N GET /api/schedule/{id}/range (cada uno con su token)
+contra un único POST /api/schedule/bulk en NDJSON. Mide también el pico de
+memoria del stream masivo para mostrar que no crece con el tamaño del resultado.
+
+Uso:
+    python benchmarks/bench_bulk_schedule.py --students 500 --days 7 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks.dataset import TERM_START, generate, student_id
+from app.database import async_engine
+from app.main import app
+from app.routers import schedule
+from app.routers.auth import create_access_token
+
+statements = [0]
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements[0] += 1
+
+
+def auth(**claims):
+    return {"Authorization": f"Bearer {create_access_token(claims)}"}
+
+
+async def single_calls(http, ids, start, end, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    params = {"from": start.isoformat(), "to": end.isoformat()}
+
+    async def fetch(sid):
+        async with semaphore:
+            response = await http.get(f"/api/schedule/{sid}/range", params=params,
+                                      headers=auth(sub=sid, name="Bench"))
+            return sum(len(day["entries"]) for day in response.json()["days"])
+
+    return sum(await asyncio.gather(*(fetch(sid) for sid in ids)))
+
+
+async def bulk_call(http, ids, start, end):
+    body = {"student_ids": ids, "from": start.isoformat(), "to": end.isoformat()}
+    response = await http.post("/api/schedule/bulk", json=body, headers=auth(sub="admin", name="Bench", role="admin"))
+    return response.content.count(b"\n")
+
+
+async def stream_peak(start, end, ids):
+    """Pico de memoria (KiB) de recorrer el stream masivo sin acumular la respuesta"""
+    statement = schedule.schedule_data.bulk_rows(start, end, ids)
+    tracemalloc.start()
+    total = 0
+    async for chunk in schedule._stream_bulk(statement, "ndjson", start, end):
+        total += len(chunk)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return total, peak / 1024
+
+
+async def run(args):
+    ids = [student_id(index) for index in range(args.students)]
+    start = TERM_START
+    end = TERM_START + timedelta(days=args.days - 1)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for name, call in (
+            ("individual", lambda: single_calls(http, ids, start, end, args.concurrency)),
+            ("masiva", lambda: bulk_call(http, ids, start, end)),
+        ):
+            statements[0] = 0
+            started = time.perf_counter()
+            rows = await call()
+            elapsed = time.perf_counter() - started
+            print(f"{name:>10}: {elapsed * 1000:8.1f} ms  {rows} clases  {statements[0]} sentencias SQL")
+
+    for count in sorted({max(1, args.students // 10), args.students}):
+        size, peak = await stream_peak(start, TERM_START + timedelta(days=args.weeks * 7 - 1), ids[:count])
+        print(f"stream de {count:>5} estudiantes: {size / 1024:9.1f} KiB enviados, pico {peak:7.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--days", type=int, default=7, help="días del rango consultado")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--skip-generate", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_generate:
+        generate(args.students, args.weeks, bcrypt_rounds=4)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark: CPU por solicitud vs bytes ahorrados al comprimir las respuestas
+
+Primero comprime cuerpos reales de la API (datos de carrera, semana, mes,
+consulta masiva de una sección) con cada codificación y nivel, y reporta la
+razón de compresión y los µs de CPU por cuerpo. Luego mide de punta a punta,
+con la aplicación en el mismo proceso, el tiempo de CPU por solicitud de la
+semana sin comprimir, comprimiendo cada vez y reutilizando la caché por ETag.
+
+Uso:
+    python benchmarks/bench_compression.py --students 200 --requests 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+import zlib
+from datetime import timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+
+from benchmarks.dataset import SECTION_SIZE, TERM_START, generate, student_id
+from app import compression
+from app.main import app
+from app.routers.auth import create_access_token
+
+
+def auth(sid, role="student"):
+    return {"Authorization": f"Bearer {create_access_token({'sub': sid, 'name': 'Bench', 'role': role})}"}
+
+
+async def sample_bodies(http):
+    """Cuerpos sin comprimir de las respuestas más frecuentes"""
+    sid = student_id(0)
+    monday = TERM_START
+    week = {"from": monday.isoformat(), "to": (monday + timedelta(days=6)).isoformat()}
+    month = {"from": monday.isoformat(), "to": (monday + timedelta(days=30)).isoformat()}
+    identity = {"Accept-Encoding": "identity"}
+    section = [student_id(index) for index in range(SECTION_SIZE)]
+    requests = {
+        "carrera": http.get(f"/api/students/{sid}/career-data", headers={**auth(sid), **identity}),
+        "semana": http.get(f"/api/schedule/{sid}/range", params=week, headers={**auth(sid), **identity}),
+        "mes": http.get(f"/api/schedule/{sid}/range", params=month, headers={**auth(sid), **identity}),
+        "sección x semana": http.post(
+            "/api/schedule/bulk", json={"student_ids": section, **week},
+            headers={**auth("admin", "admin"), **identity},
+        ),
+    }
+    return {name: (await request).content for name, request in requests.items()}
+
+
+def encoders():
+    configs = [(f"gzip-{level}", lambda data, level=level: zlib.compress(data, level, wbits=31)) for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        configs += [
+            (f"br-{quality}", lambda data, quality=quality: compression.brotli.compress(data, quality=quality))
+            for quality in (1, 4, 11)
+        ]
+    return configs
+
+
+def codec_table(bodies, repeat):
+    print(f"{'cuerpo':<18} {'bytes':>8}  " + "  ".join(f"{name:>16}" for name, _ in encoders()))
+    for body_name, body in bodies.items():
+        cells = []
+        for _, fn in encoders():
+            number = max(1, 2_000_000 // max(len(body), 1) // 10)
+            seconds = min(timeit.repeat(lambda: fn(body), number=number, repeat=repeat)) / number
+            cells.append(f"{len(fn(body)):>6} B {seconds * 1e6:>6.0f} µs")
+        print(f"{body_name:<18} {len(body):>8}  " + "  ".join(cells))
+
+
+async def end_to_end(http, students, requests, seed):
+    """(µs de CPU por solicitud, bytes promedio en la red) por modo"""
+    modes = [("sin comprimir", "identity", False), ("gzip sin caché", "gzip", False), ("gzip con caché", "gzip", True)]
+    if compression.brotli is not None:
+        modes += [("br sin caché", "br", False), ("br con caché", "br", True)]
+
+    results = {}
+    for name, accept_encoding, use_cache in modes:
+        rng = random.Random(seed)
+        compression.compressed_cache.clear()
+        cpu, wire = 0.0, 0
+        for _ in range(requests):
+            # Pocos estudiantes y semanas: los mismos horarios se piden muchas veces, como en producción
+            sid = student_id(rng.randrange(students))
+            monday = TERM_START + timedelta(weeks=rng.randrange(2))
+            params = {"from": monday.isoformat(), "to": (monday + timedelta(days=6)).isoformat()}
+            if not use_cache:
+                compression.compressed_cache.clear()
+            started = time.process_time()
+            response = await http.get(
+                f"/api/schedule/{sid}/range", params=params,
+                headers={**auth(sid), "Accept-Encoding": accept_encoding},
+            )
+            cpu += time.process_time() - started
+            assert response.status_code == 200, response.text
+            wire += int(response.headers["content-length"])
+        results[name] = (cpu / requests * 1e6, wire / requests)
+    return results
+
+
+async def run(args):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        bodies = await sample_bodies(http)
+        codec_table(bodies, args.repeat)
+        print()
+        results = await end_to_end(http, min(args.students, 20), args.requests, args.seed)
+    base_cpu, base_bytes = results["sin comprimir"]
+    for name, (cpu, wire) in results.items():
+        print(
+            f"{name:<16} {cpu:7.0f} µs CPU/solicitud ({cpu - base_cpu:+5.0f})  "
+            f"{wire:7.0f} bytes/solicitud ({(1 - wire / base_bytes) * 100:4.1f}% menos)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.students, weeks=5, bcrypt_rounds=4, seed=args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
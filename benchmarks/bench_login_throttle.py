@@ -0,0 +1,129 @@
+"""
+Prueba de carga: ataque de credenciales contra /api/auth/login con y sin límite de intentos
+
+Unas pocas IPs envían contraseñas incorrectas contra estudiantes reales a
+tasa fija (sin esperar respuestas ni respetar Retry-After) mientras usuarios
+legítimos inician sesión cada pocos segundos desde otras IPs. Para cada fase
+reporta el tiempo de CPU gastado en bcrypt, los códigos de respuesta y la
+latencia de los usuarios legítimos.
+
+Uso:
+    python benchmarks/bench_login_throttle.py --rate 200 --ips 3 --duration 15
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+
+from benchmarks.dataset import DEFAULT_PASSWORD, generate, student_id
+from app import passwords
+from app.main import app
+from app.throttle import login_throttle
+
+
+def client_for(ip):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app, client=(ip, 40000)), base_url="http://bench")
+
+
+LEGIT_STUDENTS = 10
+
+
+async def attack_phase(students, rate, ips, duration, seed):
+    rng = random.Random(seed)
+    statuses = Counter()
+    legit = []
+    clients = [client_for(f"203.0.113.{index + 1}") for index in range(ips)]
+    deadline = time.perf_counter() + duration
+
+    async def attempt(http):
+        body = {"student_id": student_id(rng.randrange(LEGIT_STUDENTS, students)), "password": "incorrecta"}
+        response = await http.post("/api/auth/login", json=body)
+        statuses[response.status_code] += 1
+
+    async def attack():
+        # Tasa fija: el atacante no espera respuestas ni respeta Retry-After
+        pending = set()
+        sent = 0
+        started = time.perf_counter()
+        while time.perf_counter() < deadline:
+            task = asyncio.create_task(attempt(clients[sent % len(clients)]))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            sent += 1
+            await asyncio.sleep(max(0.0, started + sent / rate - time.perf_counter()))
+        await asyncio.gather(*pending)
+
+    async def legitimate(index):
+        http = client_for(f"198.51.100.{index + 1}")
+        body = {"student_id": student_id(index), "password": DEFAULT_PASSWORD}
+        await asyncio.sleep(index * 0.2)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await http.post("/api/auth/login", json=body)
+            legit.append((time.perf_counter() - started, response.status_code))
+            await asyncio.sleep(15)
+        await http.aclose()
+
+    operations, hash_seconds = passwords.pool.operations, passwords.pool.hash_seconds
+    wall_started = time.perf_counter()
+    await asyncio.gather(attack(), *(legitimate(index) for index in range(LEGIT_STUDENTS)))
+    wall = time.perf_counter() - wall_started
+
+    for http in clients:
+        await http.aclose()
+    latencies = sorted(latency for latency, _ in legit)
+    return {
+        "wall_s": wall,
+        "bcrypt": passwords.pool.operations - operations,
+        "bcrypt_cpu_s": passwords.pool.hash_seconds - hash_seconds,
+        "statuses": dict(sorted(statuses.items())),
+        "legit_ok": sum(1 for _, code in legit if code == 200),
+        "legit_total": len(legit),
+        "legit_p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+    }
+
+
+async def run(args):
+    for enabled in (False, True):
+        login_throttle.enabled = enabled
+        login_throttle.store.clear()
+        result = await attack_phase(args.students, args.rate, args.ips, args.duration, args.seed)
+        legit_p50 = f"{result['legit_p50_ms']:.0f}" if result["legit_p50_ms"] is not None else "-"
+        print(
+            f"límite {'activado ' if enabled else 'desactivado'}: "
+            f"bcrypt {result['bcrypt']} ({result['bcrypt_cpu_s']:.1f} s de CPU en {result['wall_s']:.1f} s), "
+            f"respuestas del ataque {result['statuses']}, "
+            f"usuarios legítimos {result['legit_ok']}/{result['legit_total']} OK, p50 {legit_p50} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=200, help="intentos de ataque por segundo")
+    parser.add_argument("--ips", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.students, weeks=1, bcrypt_rounds=args.bcrypt_rounds, seed=args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark: índice de ocupación vs recorrido de schedule_entries
+
+Genera un periodo completo de la sede y compara, para franjas al azar, las dos
+preguntas del índice: "qué aulas de la sede están libres" y "con qué clases se
+cruza un instructor en la semana". Base: la consulta SQL directa sobre
+schedule_entries en cada pregunta. Índice: la búsqueda en memoria y la
+solicitud HTTP completa. Al final cambia de aula las clases de un día y compara
+la actualización del índice (solo ese día) con la construcción completa.
+
+Uso:
+    python benchmarks/bench_occupancy.py --students 2000 --weeks 18 --samples 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import time as dtime, timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+from sqlalchemy import select, update
+
+from benchmarks.dataset import INSTRUCTORS, SLOTS, TERM_START, generate
+from app.database import AsyncSessionLocal, engine
+from app.dimensions import dimension_cache
+from app.main import app
+from app.models import Instructor, Location, ScheduleEntry
+from app.occupancy import occupancy_index
+from app.routers.auth import create_access_token
+
+
+def queries(weeks, samples, seed):
+    """(día, inicio, fin, instructor, lunes de la semana) al azar dentro del periodo"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(samples):
+        monday = TERM_START + timedelta(weeks=rng.randrange(weeks))
+        start, end = rng.choice(SLOTS)
+        start = dtime(start.hour, rng.choice((0, 30)))
+        result.append((monday + timedelta(days=rng.randrange(6)), start, end, rng.choice(INSTRUCTORS), monday))
+    return result
+
+
+def naive(samples, campus):
+    """Las mismas respuestas consultando schedule_entries en cada pregunta"""
+    free_times, conflict_times, answers = [], [], []
+    with engine.connect() as conn:
+        rooms = list(conn.execute(
+            select(Location.name).where(Location.campus == campus).order_by(Location.name)
+        ).scalars())
+        for day, start, end, instructor, monday in samples:
+            started = time.perf_counter()
+            busy = set(conn.execute(
+                select(Location.name).distinct()
+                .join(ScheduleEntry, ScheduleEntry.location_id == Location.id)
+                .where(ScheduleEntry.date == day, ScheduleEntry.start_time < end, ScheduleEntry.end_time > start)
+            ).scalars())
+            free = [name for name in rooms if name not in busy]
+            free_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            sessions = conn.execute(
+                select(ScheduleEntry.date, ScheduleEntry.start_time, ScheduleEntry.end_time,
+                       ScheduleEntry.location_id, ScheduleEntry.course_id).distinct()
+                .join(Instructor, ScheduleEntry.instructor_id == Instructor.id)
+                .where(Instructor.name == instructor, ScheduleEntry.date.between(monday, monday + timedelta(days=6)))
+                .order_by(ScheduleEntry.date, ScheduleEntry.start_time)
+            ).all()
+            conflicts = sum(
+                1 for index, first in enumerate(sessions) for second in sessions[index + 1:]
+                if second.date == first.date and second.start_time < first.end_time
+            )
+            conflict_times.append(time.perf_counter() - started)
+            answers.append((free, conflicts))
+    return free_times, conflict_times, answers
+
+
+async def indexed(samples, campus):
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        snapshot = await occupancy_index.current(db)
+        build = time.perf_counter() - started
+    _, _, locations = dimension_cache.tables
+    free_times, conflict_times, answers = [], [], []
+    for day, start, end, instructor, monday in samples:
+        started = time.perf_counter()
+        free = [locations[key] for key in snapshot.free_locations(day, start, end, campus)]
+        free_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        conflicts = len(snapshot.conflicts(monday, monday + timedelta(days=6), snapshot.instructor_ids[instructor]))
+        conflict_times.append(time.perf_counter() - started)
+        answers.append((free, conflicts))
+    return build, snapshot.sessions, free_times, conflict_times, answers
+
+
+async def http_latencies(samples, campus):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin', 'name': 'Bench', 'role': 'admin'})}"}
+    availability, conflicts = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for day, start, end, instructor, monday in samples:
+            params = {"date": day.isoformat(), "start": start.isoformat(), "end": end.isoformat(), "campus": campus}
+            started = time.perf_counter()
+            response = await http.get("/api/occupancy/availability", params=params, headers=headers)
+            availability.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+
+            params = {"from": monday.isoformat(), "to": (monday + timedelta(days=6)).isoformat(), "instructor": instructor}
+            started = time.perf_counter()
+            response = await http.get("/api/occupancy/conflicts", params=params, headers=headers)
+            conflicts.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+    return availability, conflicts
+
+
+async def run(samples, campus):
+    return *await indexed(samples, campus), *await http_latencies(samples, campus)
+
+
+def move_day(day):
+    """Pasa las clases de un día a la primera aula; la versión de las filas avanza como en una escritura real"""
+    with engine.begin() as conn:
+        room = conn.execute(select(Location.id).order_by(Location.id).limit(1)).scalar()
+        return conn.execute(
+            update(ScheduleEntry).where(ScheduleEntry.date == day).values(location_id=room)
+        ).rowcount
+
+
+async def update_time():
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        await occupancy_index.refresh(db)
+        return time.perf_counter() - started
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    print(
+        f"{name:<40} p50={statistics.median(samples) * 1e6:9.1f} µs  "
+        f"p95={samples[int(len(samples) * 0.95) - 1] * 1e6:9.1f} µs"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--weeks", type=int, default=18)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--campus", default="IND")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    _, entries = generate(args.students, args.weeks, bcrypt_rounds=4, seed=args.seed)
+    samples = queries(args.weeks, args.samples, args.seed)
+
+    naive_free, naive_conflicts, expected = naive(samples, args.campus)
+    build, sessions, index_free, index_conflicts, answers, http_free, http_conflicts = asyncio.run(
+        run(samples, args.campus)
+    )
+    assert answers == expected, "el índice y el recorrido no coinciden"
+
+    print(f"{entries} clases, {sessions} sesiones distintas; índice construido en {build * 1000:.0f} ms")
+    report("aulas libres: recorrido SQL", naive_free)
+    report("aulas libres: índice", index_free)
+    report("aulas libres: GET /availability", http_free)
+    report("cruces del instructor: SQL", naive_conflicts)
+    report("cruces del instructor: índice", index_conflicts)
+    report("cruces del instructor: GET /conflicts", http_conflicts)
+
+    moved = move_day(samples[0][0])
+    updated = asyncio.run(update_time())
+    assert occupancy_index.updates == 1, "se esperaba una actualización por días, no una construcción completa"
+    print(f"actualización tras cambiar {moved} clases de un día: {updated * 1000:.1f} ms "
+          f"(construcción completa: {build * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
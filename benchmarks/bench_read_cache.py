@@ -0,0 +1,108 @@
+"""
+Benchmark: tormenta de refrescos del horario con y sin la caché de lectura
+
+Simula el inicio de un bloque de clases: cada estudiante de una sección
+refresca la semana y sus datos de carrera varias veces a la vez. Reporta las
+sentencias SQL ejecutadas, los hits/misses/misses agrupados de la caché y la
+latencia p50/p95 por solicitud, primero con la caché desactivada y luego
+activada.
+
+Uso:
+    python benchmarks/bench_read_cache.py --students 100 --refreshes 5 --rounds 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks.dataset import TERM_START, generate, student_id
+from app import read_cache
+from app.database import async_engine
+from app.main import app
+from app.routers.auth import create_access_token
+
+statements = 0
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+
+
+async def timed(http, url, params, headers, latencies):
+    started = time.perf_counter()
+    response = await http.get(url, params=params, headers=headers)
+    latencies.append(time.perf_counter() - started)
+    assert response.status_code == 200, response.text
+
+
+async def storm(http, students, refreshes, rounds):
+    """Latencias de `rounds` tormentas: cada estudiante pide `refreshes` veces semana y carrera a la vez"""
+    latencies = []
+    params = {"from": TERM_START.isoformat(), "to": (TERM_START + timedelta(days=6)).isoformat()}
+    for _ in range(rounds):
+        requests = []
+        for index in range(students):
+            sid = student_id(index)
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': sid, 'name': 'Bench'})}"}
+            for _ in range(refreshes):
+                requests.append(timed(http, f"/api/schedule/{sid}/range", params, headers, latencies))
+                requests.append(timed(http, f"/api/students/{sid}/career-data", None, headers, latencies))
+        await asyncio.gather(*requests)
+    return latencies
+
+
+async def run(args):
+    global statements
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        # Calienta la caché de dimensiones y el pool para que ambos modos partan igual
+        await storm(http, 1, 1, 1)
+        for enabled in (False, True):
+            read_cache.invalidate_all()
+            for cache in read_cache.CACHES:
+                cache.enabled = enabled
+                cache.hits = cache.misses = cache.coalesced = 0
+            statements = 0
+            latencies = sorted(await storm(http, args.students, args.refreshes, args.rounds))
+            hits = sum(cache.hits for cache in read_cache.CACHES)
+            misses = sum(cache.misses for cache in read_cache.CACHES)
+            coalesced = sum(cache.coalesced for cache in read_cache.CACHES)
+            print(
+                f"{'con caché' if enabled else 'sin caché':<10} {len(latencies):6d} solicitudes  "
+                f"{statements:6d} sentencias SQL ({statements / len(latencies):.2f}/solicitud)  "
+                f"hits={hits} misses={misses} agrupados={coalesced}  "
+                f"p50={statistics.median(latencies) * 1000:7.2f} ms  "
+                f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:7.2f} ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--refreshes", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.students, weeks=2, bcrypt_rounds=4, seed=args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
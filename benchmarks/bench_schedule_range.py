@@ -0,0 +1,145 @@
+"""
+Benchmark: vista semanal con 7 llamadas por día vs una llamada de rango
+
+Genera una tabla schedule_entries con millones de filas y compara el tiempo
+de armar una semana con GET /api/schedule/{id}?schedule_date=... (7 veces)
+contra un único GET /api/schedule/{id}/range?from=...&to=...
+
+Uso:
+    python benchmarks/bench_schedule_range.py --rows 2000000 --weeks 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, time as dtime, timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+from sqlalchemy import insert, text
+
+from app.database import Base, engine
+from app.main import app
+from app.models import Course, Instructor, Location, ScheduleEntry, Student
+from app.routers.auth import create_access_token
+
+TERM_START = date(2024, 3, 4)
+TERM_DAYS = 120
+SLOTS = [(dtime(7, 0), dtime(10, 0)), (dtime(10, 15), dtime(13, 15)),
+         (dtime(14, 0), dtime(15, 30)), (dtime(15, 45), dtime(17, 15))]
+CHUNK = 50_000
+
+
+def seed(rows):
+    """Inserta estudiantes con 4 clases por día hábil hasta llegar a ~rows filas"""
+    Base.metadata.create_all(bind=engine)
+    weekdays = [TERM_START + timedelta(days=d) for d in range(TERM_DAYS)
+                if (TERM_START + timedelta(days=d)).weekday() < 5]
+    per_student = len(weekdays) * len(SLOTS)
+    students = max(1, rows // per_student)
+
+    with engine.begin() as conn:
+        course_id = conn.execute(insert(Course).values(name="DESARROLLO HUMANO")).inserted_primary_key[0]
+        instructor_id = conn.execute(
+            insert(Instructor).values(name="OLAZA GARIBAY, JENNY ROSARIO")
+        ).inserted_primary_key[0]
+        location_id = conn.execute(insert(Location).values(name="IND - TORRE C 60TC - 504")).inserted_primary_key[0]
+        conn.execute(insert(Student), [
+            {"id": f"{i:09d}", "password_hash": "x", "first_name": "Bench",
+             "last_name": str(i), "dni": f"{i:08d}"}
+            for i in range(students)
+        ])
+        batch = []
+        for i in range(students):
+            for day in weekdays:
+                for start, end in SLOTS:
+                    batch.append({
+                        "student_id": f"{i:09d}", "date": day, "start_time": start, "end_time": end,
+                        "course_id": course_id, "instructor_id": instructor_id, "location_id": location_id,
+                    })
+                    if len(batch) >= CHUNK:
+                        conn.execute(insert(ScheduleEntry), batch)
+                        batch.clear()
+        if batch:
+            conn.execute(insert(ScheduleEntry), batch)
+    return students, students * per_student
+
+
+def explain():
+    with engine.connect() as conn:
+        if engine.dialect.name != "sqlite":
+            return
+        plan = conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM schedule_entries "
+            "WHERE student_id = '000000001' AND date BETWEEN '2024-03-04' AND '2024-03-10' "
+            "ORDER BY date, start_time"
+        )).all()
+        for row in plan:
+            print("  plan:", row[-1])
+
+
+async def run(students, weeks):
+    transport = httpx.ASGITransport(app=app)
+    per_day, ranged = [], []
+    rng = random.Random(42)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(weeks):
+            student_id = f"{rng.randrange(students):09d}"
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': student_id, 'name': 'Bench'})}"}
+            monday = TERM_START + timedelta(weeks=rng.randrange(TERM_DAYS // 7))
+
+            start = time.perf_counter()
+            for offset in range(7):
+                response = await client.get(
+                    f"/api/schedule/{student_id}",
+                    params={"schedule_date": (monday + timedelta(days=offset)).isoformat()},
+                    headers=headers,
+                )
+                assert response.status_code == 200, response.text
+            per_day.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            response = await client.get(
+                f"/api/schedule/{student_id}/range",
+                params={"from": monday.isoformat(), "to": (monday + timedelta(days=6)).isoformat()},
+                headers=headers,
+            )
+            assert response.status_code == 200, response.text
+            ranged.append(time.perf_counter() - start)
+
+    return per_day, ranged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--weeks", type=int, default=200, help="semanas consultadas")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    students, rows = seed(args.rows)
+    print(f"{rows} filas para {students} estudiantes en {time.perf_counter() - started:.1f} s")
+    explain()
+
+    per_day, ranged = asyncio.run(run(students, args.weeks))
+    for name, samples in (("7 x por día", per_day), ("1 x rango", ranged)):
+        samples.sort()
+        print(
+            f"{name:<12} p50={statistics.median(samples) * 1000:7.2f} ms  "
+            f"p95={samples[int(len(samples) * 0.95) - 1] * 1000:7.2f} ms por semana"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Microbenchmark: costo por fila de serializar un horario
+
+Compara el pipeline anterior (objeto ORM -> ScheduleEntryResponse.model_validate
+-> ScheduleResponse -> revalidación y serialización de response_model ->
+json.dumps de JSONResponse) con el actual (fila plana -> dict -> JSON en bytes).
+No usa base de datos: mide solo la CPU de armar la respuesta.
+
+Uso:
+    python benchmarks/bench_serialization.py --rows 10 100 1000
+"""
+import argparse
+import json
+import sys
+import timeit
+from datetime import date, datetime, time as dtime
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from pydantic import TypeAdapter
+
+from app.dimensions import dimension_cache
+from app.models import Course, Instructor, Location, ScheduleEntry
+from app.schedule_data import day_payload
+from app.schemas import ScheduleEntryResponse, ScheduleResponse
+from app.serialization import dumps
+
+DAY = date(2024, 1, 28)
+UPDATED_AT = datetime(2024, 1, 1, 8, 0)
+NAMES = ("SEMINARIO COMPLEMENT PRÁCT I", "GARCIA FORTUNA, MOISES EDUARDO", "IND - TORRE B 60TB - 200")
+
+
+def make_row(index):
+    return (index, DAY, dtime(7 + index % 10, 0), dtime(8 + index % 10, 30), 1, 1, 1, UPDATED_AT)
+
+
+def make_entity(row):
+    entry_id, day, start, end, _, _, _, updated_at = row
+    course, instructor, location = NAMES
+    return ScheduleEntry(
+        id=entry_id, student_id="001234567", date=day, start_time=start, end_time=end,
+        course=Course(id=1, name=course), instructor=Instructor(id=1, name=instructor),
+        location=Location(id=1, name=location), updated_at=updated_at,
+    )
+
+
+def legacy_entry(entry):
+    return ScheduleEntryResponse(
+        id=entry.id, date=entry.date, start_time=entry.start_time, end_time=entry.end_time,
+        course_name=entry.course.name, instructor_name=entry.instructor.name, location=entry.location.name,
+    )
+
+
+response_adapter = TypeAdapter(ScheduleResponse)
+
+
+def legacy(entities):
+    model = ScheduleResponse(
+        date=DAY, entries=[legacy_entry(entry) for entry in entities]
+    )
+    # Lo que hace FastAPI con response_model antes de JSONResponse
+    content = response_adapter.dump_python(response_adapter.validate_python(model), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast(rows):
+    return dumps(day_payload(DAY, rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    dimension_cache.store((dimension, 1, name) for dimension, name in enumerate(NAMES))
+    for count in args.rows:
+        rows = [make_row(index) for index in range(count)]
+        entities = [make_entity(row) for row in rows]
+        assert json.loads(legacy(entities)) == json.loads(fast(rows))
+
+        number = max(1, 20_000 // count)
+        results = {}
+        for name, fn, data in (("anterior", legacy, entities), ("actual", fast, rows)):
+            best = min(timeit.repeat(lambda: fn(data), number=number, repeat=args.repeat))
+            results[name] = best / number / count * 1e6
+        print(
+            f"{count:>6} filas: anterior {results['anterior']:6.2f} µs/fila  "
+            f"actual {results['actual']:6.2f} µs/fila  "
+            f"({results['anterior'] / results['actual']:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: costo por sentencia del registro de consultas lentas
+
+Ejecuta la misma consulta del horario (SELECT por el índice de estudiante y
+fecha) con tres motores sobre la misma base:
+- sin registro: lo que cuesta con SLOW_QUERY_LOG_ENABLED=false (no hay hooks)
+- activado, bajo el umbral: solo los dos hooks de tiempo
+- activado, sobre el umbral: cada sentencia se registra (el plan se reutiliza
+  durante SLOW_QUERY_EXPLAIN_INTERVAL, salvo la primera que ejecuta EXPLAIN)
+
+Uso:
+    python benchmarks/bench_slow_queries.py --students 200 --statements 5000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+from sqlalchemy import create_engine
+
+from benchmarks.dataset import TERM_START, generate, student_id
+from app import schedule_data
+from app.database import engine as app_engine
+from app.slow_queries import SlowQueryLog
+
+
+def measure(engine, students, statements):
+    samples = []
+    with engine.connect() as conn:
+        for index in range(statements):
+            statement = schedule_data.schedule_rows(
+                student_id(index % students), TERM_START, TERM_START + timedelta(days=6)
+            )
+            started = time.perf_counter()
+            conn.execute(statement).all()
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--statements", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.students, weeks=2, bcrypt_rounds=4, seed=args.seed)
+
+    url = app_engine.url.render_as_string(hide_password=False)
+    below, above = SlowQueryLog(threshold_ms=1e6, path=""), SlowQueryLog(threshold_ms=0, path="")
+    engines = {"sin registro": create_engine(url)}
+    engines["activado, bajo el umbral"] = create_engine(url)
+    below.instrument(engines["activado, bajo el umbral"], "bench")
+    engines["activado, sobre el umbral"] = create_engine(url)
+    above.instrument(engines["activado, sobre el umbral"], "bench")
+
+    for engine in engines.values():
+        measure(engine, args.students, 200)
+    for name, engine in engines.items():
+        samples = sorted(measure(engine, args.students, args.statements))
+        print(
+            f"{name:<28} p50={statistics.median(samples) * 1e6:7.1f} µs  "
+            f"p95={samples[int(len(samples) * 0.95) - 1] * 1e6:7.1f} µs"
+        )
+    print(f"consultas en el buffer: {len(above.entries())} (las más antiguas se descartan)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: horario de hoy y de la semana desde instantáneas vs consulta en vivo
+
+Construye las instantáneas de un día del periodo para todos los estudiantes y
+reporta el tiempo de construcción, la memoria de los cuerpos JSON (con
+SNAPSHOT_DIR, el archivo compartido por los workers) y cuánto se alargan,
+mientras tanto, las solicitudes en vivo que llegan en paralelo. Después
+compara la latencia de GET /api/schedule/{id} y /range (semana) en tres
+casos: consulta en vivo sin caché, desde la caché de lectura y desde la
+instantánea.
+
+Uso:
+    python benchmarks/bench_snapshots.py --students 2000 --requests 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, time as dtime, timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+
+from benchmarks.dataset import TERM_START, generate, student_id
+from app import read_cache
+from app.main import app
+from app.routers.auth import create_access_token
+from app.schedule_data import local_now
+from app.snapshots import snapshot_store, week_of
+
+DAY = TERM_START + timedelta(days=2)
+MONDAY, SUNDAY = week_of(DAY)
+
+
+def requests_for(students, count, seed):
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        sid = student_id(rng.randrange(students))
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': sid, 'name': 'Bench'})}"}
+        if rng.random() < 0.5:
+            result.append((f"/api/schedule/{sid}", {"schedule_date": DAY.isoformat()}, headers))
+        else:
+            result.append((f"/api/schedule/{sid}/range", {"from": MONDAY.isoformat(), "to": SUNDAY.isoformat()}, headers))
+    return result
+
+
+async def latencies(http, requests, clear_cache=False):
+    samples = []
+    for url, params, headers in requests:
+        if clear_cache:
+            read_cache.backend.clear()
+        started = time.perf_counter()
+        response = await http.get(url, params=params, headers=headers)
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+    return samples
+
+
+async def during_build(http, requests, now):
+    """Latencias de solicitudes en vivo mientras el planificador construye las instantáneas"""
+    build = asyncio.create_task(snapshot_store.tick(now))
+    samples = []
+    while not build.done():
+        samples += await latencies(http, requests[:10], clear_cache=True)
+    await build
+    return samples
+
+
+def other_day(requests):
+    """Las mismas solicitudes para el día siguiente, que no tiene instantánea"""
+    following = (DAY + timedelta(days=1)).isoformat()
+    return [(url, {"schedule_date": following}, headers) for url, params, headers in requests if "schedule_date" in params]
+
+
+async def run(requests):
+    now = datetime.combine(DAY, dtime(12), local_now().tzinfo)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+        await latencies(http, requests[:20])
+        results = {"en vivo, sin caché": await latencies(http, requests, clear_cache=True)}
+        await latencies(http, requests)
+        results["caché de lectura"] = await latencies(http, requests)
+        live = other_day(requests)
+        results["en vivo, otro día"] = await latencies(http, live, clear_cache=True)
+        results["en vivo, otro día, durante la construcción"] = await during_build(http, live, now)
+        hits = snapshot_store.hits
+        results["instantánea"] = await latencies(http, requests)
+        assert snapshot_store.hits - hits == len(requests), "no todas las solicitudes salieron de la instantánea"
+    return results
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    print(
+        f"{name:<44} p50={statistics.median(samples) * 1000:7.2f} ms  "
+        f"p95={samples[int(len(samples) * 0.95) - 1] * 1000:7.2f} ms  (n={len(samples)})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--weeks", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    _, entries = generate(args.students, args.weeks, bcrypt_rounds=4, seed=args.seed)
+    results = asyncio.run(run(requests_for(args.students, args.requests, args.seed)))
+
+    print(
+        f"{entries} clases; {len(snapshot_store)} instantáneas de {args.students} estudiantes construidas en "
+        f"{snapshot_store.build_seconds:.2f} s, {snapshot_store.size_bytes / 2**20:.1f} MiB "
+        f"({snapshot_store.size_bytes / max(len(snapshot_store), 1) / 1024:.1f} KiB por instantánea; "
+        f"{snapshot_store.backend.local_bytes / 2**20:.1f} MiB en memoria de cada worker)"
+    )
+    for name, samples in results.items():
+        report(name, samples)
+
+
+if __name__ == "__main__":
+    main()
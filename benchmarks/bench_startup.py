@@ -0,0 +1,90 @@
+"""
+Benchmark de arranque: tiempo desde el import de la aplicación hasta la primera respuesta
+
+Cada repetición corre en un proceso nuevo (sin módulos en caché) que importa
+app.main y atiende GET /health por ASGI; opcionalmente también lanza uvicorn
+y consulta /health por HTTP hasta que responde. Reporta la mediana.
+
+Uso:
+    python benchmarks/bench_startup.py --repeat 10
+    python benchmarks/bench_startup.py --uvicorn --port 8765
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+
+IN_PROCESS = r"""
+import asyncio, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def first_response():
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get("/health")
+        assert response.status_code == 200, response.status_code
+
+asyncio.run(first_response())
+print(imported - started, time.perf_counter() - started)
+"""
+
+
+def run_in_process(env):
+    output = subprocess.check_output([sys.executable, "-c", IN_PROCESS], cwd=root_dir, env=env, text=True)
+    import_seconds, total_seconds = map(float, output.split())
+    return import_seconds, total_seconds
+
+
+def run_uvicorn(env, port, timeout=30.0):
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=root_dir, env=env,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError("uvicorn no respondió a tiempo")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--uvicorn", action="store_true", help="medir también uvicorn por HTTP")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=str(root_dir))
+    imports, totals = [], []
+    for _ in range(args.repeat):
+        import_seconds, total_seconds = run_in_process(env)
+        imports.append(import_seconds)
+        totals.append(total_seconds)
+    print(f"import de app.main:      mediana {statistics.median(imports) * 1000:7.1f} ms")
+    print(f"import + primera /health: mediana {statistics.median(totals) * 1000:7.1f} ms")
+
+    if args.uvicorn:
+        boots = [run_uvicorn(env, args.port) for _ in range(args.repeat)]
+        print(f"uvicorn hasta /health:    mediana {statistics.median(boots) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
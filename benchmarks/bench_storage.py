@@ -0,0 +1,122 @@
+"""
+Benchmark: tamaño en disco de schedule_entries (tabla e índices) y latencia de lectura
+
+Genera el dataset sintético con el importador y reporta los bytes de cada
+tabla y de sus índices, los bytes por clase y la latencia de una semana por
+estudiante (GET /range) y de una semana de un aula (POST /bulk). Sirve para
+comparar esquemas: se ejecuta igual antes y después de una migración.
+
+Uso:
+    python benchmarks/bench_storage.py --students 2000 --weeks 18
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+from sqlalchemy import text
+
+from benchmarks.dataset import LOCATIONS, TERM_START, generate, student_id
+from app.database import engine
+from app.main import app
+from app.routers.auth import create_access_token
+
+TABLES = ("schedule_entries", "courses", "instructors", "locations")
+
+
+def table_sizes():
+    """{tabla: (bytes de la tabla, bytes de sus índices)} de las tablas que existan"""
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.execute(text(
+                "SELECT m.tbl_name, m.type, SUM(d.pgsize) FROM dbstat d "
+                "JOIN sqlite_master m ON m.name = d.name GROUP BY m.tbl_name, m.type"
+            )).all()
+            sizes = {}
+            for table, kind, size in rows:
+                data, indexes = sizes.get(table, (0, 0))
+                sizes[table] = (data + size, indexes) if kind == "table" else (data, indexes + size)
+        else:
+            rows = conn.execute(text(
+                "SELECT relname, pg_table_size(oid), pg_indexes_size(oid) FROM pg_class "
+                "WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+            )).all()
+            sizes = {table: (data, indexes) for table, data, indexes in rows}
+        return {table: sizes[table] for table in TABLES if table in sizes}
+
+
+def compact():
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("VACUUM")
+        else:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.exec_driver_sql("VACUUM ANALYZE")
+
+
+async def latencies(students, weeks, samples, seed):
+    rng = random.Random(seed)
+    admin = {"Authorization": f"Bearer {create_access_token({'sub': 'admin', 'name': 'Bench', 'role': 'admin'})}"}
+    ranged, bulk = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for _ in range(samples):
+            sid = student_id(rng.randrange(students))
+            monday = TERM_START + timedelta(weeks=rng.randrange(weeks))
+            params = {"from": monday.isoformat(), "to": (monday + timedelta(days=6)).isoformat()}
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': sid, 'name': 'Bench'})}"}
+
+            started = time.perf_counter()
+            response = await http.get(f"/api/schedule/{sid}/range", params=params, headers=headers)
+            ranged.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+
+            body = {"location": rng.choice(LOCATIONS), **params}
+            started = time.perf_counter()
+            response = await http.post("/api/schedule/bulk", json=body, headers=admin)
+            bulk.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+    return ranged, bulk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--weeks", type=int, default=18)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    _, entries = generate(args.students, args.weeks, bcrypt_rounds=4, seed=args.seed)
+    compact()
+
+    total = 0
+    for table, (data, indexes) in table_sizes().items():
+        total += data + indexes
+        print(f"{table:<18} tabla {data / 2**20:8.2f} MiB  índices {indexes / 2**20:8.2f} MiB")
+    print(f"{'total':<18} {total / 2**20:.2f} MiB, {total / entries:.0f} bytes por clase")
+
+    ranged, bulk = asyncio.run(latencies(args.students, args.weeks, args.samples, args.seed))
+    for name, samples in (("semana (range)", ranged), ("aula x semana (bulk)", bulk)):
+        samples.sort()
+        print(
+            f"{name:<22} p50={statistics.median(samples) * 1000:7.2f} ms  "
+            f"p95={samples[int(len(samples) * 0.95) - 1] * 1000:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
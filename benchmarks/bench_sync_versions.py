@@ -0,0 +1,123 @@
+"""
+Benchmark: escrituras concurrentes con versiones del reloj de una fila o de la secuencia
+
+Cada escritor actualiza los datos personales de su propio estudiante en
+transacciones que duran --hold-ms (el trabajo de una solicitud antes del
+commit). Con el reloj de una fila la versión bloquea esa fila hasta el commit
+y los escritores quedan en fila aunque no compartan datos; con la secuencia de
+PostgreSQL solo esperan su propia fila. Reporta transacciones por segundo y
+latencias de cada modo, y cuánto tarda el reloj publicado en alcanzar la última
+versión (el costo de la secuencia: los clientes ven el cambio una pasada después).
+
+En SQLite solo existe el reloj de una fila. Para comparar se usa PostgreSQL:
+    DATABASE_URL=postgresql://... python benchmarks/bench_sync_versions.py --writers 16 --transactions 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.dataset import generate, student_id
+from app import models, sync_data
+from app.database import async_engine, engine as app_engine
+from app.models import PersonalData, SyncClock
+
+
+def run_writers(engine, writers, transactions, hold):
+    Session = sessionmaker(bind=engine)
+    latencies = []
+    lock = threading.Lock()
+
+    def writer(index):
+        for number in range(transactions):
+            started = time.perf_counter()
+            with Session() as session:
+                session.execute(
+                    update(PersonalData).where(PersonalData.student_id == student_id(index))
+                    .values(phone=f"9{number:08d}")
+                    .execution_options(synchronize_session=False)
+                )
+                # La versión ya se tomó (onupdate): el resto de la transacción la retiene
+                time.sleep(hold)
+                session.commit()
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, sorted(latencies)
+
+
+async def publish_lag(target: int):
+    """Segundos hasta que el reloj publicado alcanza `target`, la última versión de la secuencia"""
+    advancer = sync_data.ClockAdvancer()
+    started = time.perf_counter()
+    while advancer.published < target:
+        async with async_engine.connect() as conn:
+            await advancer.tick(conn)
+    return time.perf_counter() - started
+
+
+def align_sequence(engine):
+    """La secuencia continúa desde donde dejó el reloj (el modo reloj lo avanza por su cuenta)"""
+    sequence = models.SYNC_VERSION_SEQUENCE
+    with engine.begin() as conn:
+        clock = conn.execute(select(SyncClock.version)).scalar() or 1
+        return conn.exec_driver_sql(
+            f"SELECT setval('{sequence}', GREATEST({clock}, (SELECT last_value FROM {sequence})))"
+        ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--transactions", type=int, default=50)
+    parser.add_argument("--hold-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    generate(args.writers, weeks=1, bcrypt_rounds=4)
+    url = app_engine.url.render_as_string(hide_password=False)
+    engine = create_engine(url, pool_size=args.writers, max_overflow=0)
+
+    modes = {"reloj de una fila": models.clock_next_version}
+    if engine.dialect.name == "postgresql":
+        modes["secuencia"] = models.sequence_next_version
+    else:
+        print("SQLite: solo hay reloj de una fila (la secuencia requiere PostgreSQL)")
+
+    total = args.writers * args.transactions
+    print(f"{args.writers} escritores x {args.transactions} transacciones, {args.hold_ms} ms antes del commit")
+    for label, next_version in modes.items():
+        if next_version is models.sequence_next_version:
+            align_sequence(engine)
+        models.next_version = next_version
+        elapsed, latencies = run_writers(engine, args.writers, args.transactions, args.hold_ms / 1000)
+        p50 = statistics.median(latencies) * 1000
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+        print(f"  {label:<18} {total / elapsed:8.0f} tx/s   p50 {p50:7.1f} ms   p95 {p95:7.1f} ms")
+        if next_version is models.sequence_next_version:
+            lag = asyncio.run(publish_lag(align_sequence(engine)))
+            print(f"  {'':<18} reloj publicado al día en {lag * 1000:.1f} ms")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
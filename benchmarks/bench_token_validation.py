@@ -0,0 +1,112 @@
+"""
+Benchmark: costo de validar el token de acceso en cada solicitud
+
+Compara, por validación:
+- decode + SELECT: firma y expiración del JWT más la consulta del estudiante,
+  lo que hacía get_current_student para detectar un token revocado
+- decode + filtro: firma del JWT más la lista de revocaciones en memoria
+  (filtro de Bloom y conjunto exacto), sin base de datos
+- caché + filtro: el principal ya validado en caché más la lista de revocaciones
+
+La lista se llena con --revoked jti revocados para mostrar que el costo no
+depende de su tamaño. También reporta la tasa de falsos positivos del filtro.
+
+Uso:
+    python benchmarks/bench_token_validation.py --students 200 --validations 2000 --revoked 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+from benchmarks.dataset import generate, student_id
+from app import principals, revocations
+from app.database import AsyncSessionLocal
+from app.principals import Principal
+from app.routers.auth import _decode, _student_with_campus, create_access_token
+
+
+def fill(revocation_list, count):
+    expires_at = time.time() + 3600
+    for _ in range(count):
+        revocation_list.add_jti(uuid.uuid4().hex, expires_at)
+
+
+def false_positive_rate(revocation_list, probes=100_000):
+    hits = sum(1 for _ in range(probes) if uuid.uuid4().hex in revocation_list.bloom)
+    return hits / probes
+
+
+async def measure(tokens, validations, seed):
+    rng = random.Random(seed)
+    samples = {"decode + SELECT": [], "decode + filtro": [], "caché + filtro": []}
+    revocation_list = revocations.revocation_list
+    async with AsyncSessionLocal() as db:
+        for _ in range(validations):
+            token = rng.choice(tokens)
+
+            started = time.perf_counter()
+            payload = _decode(token)
+            student, _ = await _student_with_campus(db, payload["sub"])
+            samples["decode + SELECT"].append(time.perf_counter() - started)
+            assert student is not None
+
+            started = time.perf_counter()
+            payload = _decode(token)
+            revoked = revocation_list.is_revoked(payload["sub"], payload["iat"], payload["jti"])
+            samples["decode + filtro"].append(time.perf_counter() - started)
+            assert not revoked
+
+            principals.remember(payload, token, Principal.from_claims(payload))
+            started = time.perf_counter()
+            principal = principals.lookup(token)
+            samples["caché + filtro"].append(time.perf_counter() - started)
+            assert principal is not None
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--validations", type=int, default=2000)
+    parser.add_argument("--revoked", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.students, weeks=1, bcrypt_rounds=4, seed=args.seed)
+    tokens = [
+        create_access_token({"sub": student_id(index), "name": "Bench", "role": "student"})
+        for index in range(args.students)
+    ]
+
+    started = time.perf_counter()
+    fill(revocations.revocation_list, args.revoked)
+    print(
+        f"{args.revoked} jti revocados en {time.perf_counter() - started:.2f} s; filtro de "
+        f"{len(revocations.revocation_list.bloom.bits) / 1024:.0f} KiB, "
+        f"falsos positivos {false_positive_rate(revocations.revocation_list) * 100:.2f}%"
+    )
+
+    samples = asyncio.run(measure(tokens, args.validations, args.seed))
+    for name, values in samples.items():
+        values.sort()
+        print(
+            f"{name:<18} p50={statistics.median(values) * 1e6:8.1f} µs  "
+            f"p95={values[int(len(values) * 0.95) - 1] * 1e6:8.1f} µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
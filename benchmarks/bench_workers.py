@@ -0,0 +1,157 @@
+"""
+Benchmark: throughput de app.server con distinta cantidad de workers
+
+Levanta `python -m app.server --workers N` sobre una base SQLite con el
+dataset sintético y lo carga durante --duration segundos desde varios
+procesos cliente con conexiones concurrentes, pidiendo la semana de horario
+de estudiantes al azar. Reporta solicitudes por segundo, p50/p95, respuestas
+503 del límite de concurrencia y la aceleración respecto de un worker. La
+escala depende de los núcleos libres: los procesos cliente compiten por la
+misma CPU que los workers.
+
+Uso:
+    python benchmarks/bench_workers.py --workers 1 2 4 --clients 64 --duration 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="senati_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+
+from benchmarks.dataset import TERM_START, generate, student_id
+from app.routers.auth import create_access_token
+from app.server import cpu_count
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, extra_env: dict):
+    env = {**os.environ, "SNAPSHOT_ENABLED": "false", **extra_env}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--workers", str(workers), "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=root_dir, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code in (200, 503):
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("el servidor no respondió a /health")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def _client_loop(http, students, deadline, rng, latencies, statuses):
+    while time.monotonic() < deadline:
+        sid = student_id(rng.randrange(students))
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': sid, 'name': 'Bench'})}"}
+        params = {"from": TERM_START.isoformat(), "to": (TERM_START + timedelta(days=6)).isoformat()}
+        started = time.perf_counter()
+        response = await http.get(f"/api/schedule/{sid}/range", params=params, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def _client_process(port, connections, students, duration, seed):
+    rng = random.Random(seed)
+    latencies, statuses = [], {}
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as http:
+        deadline = time.monotonic() + duration
+        await asyncio.gather(*[
+            _client_loop(http, students, deadline, rng, latencies, statuses) for _ in range(connections)
+        ])
+    return latencies, statuses
+
+
+def client_process(arguments):
+    return asyncio.run(_client_process(*arguments))
+
+
+def load(port, clients, processes, students, duration):
+    per_process = max(1, clients // processes)
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(client_process, [
+            (port, per_process, students, duration, seed) for seed in range(processes)
+        ])
+    latencies, statuses = [], {}
+    for process_latencies, process_statuses in results:
+        latencies += process_latencies
+        for code, count in process_statuses.items():
+            statuses[code] = statuses.get(code, 0) + count
+    return sorted(latencies), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=64, help="Conexiones concurrentes en total")
+    parser.add_argument("--client-processes", type=int, default=max(1, cpu_count() // 2))
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency-limit", type=int, default=None,
+                        help="CONCURRENCY_LIMIT por worker (por defecto el de la app)")
+    parser.add_argument("--queue-limit", type=int, default=None,
+                        help="CONCURRENCY_QUEUE_LIMIT por worker (por defecto el de la app)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.students, weeks=2, bcrypt_rounds=4, seed=args.seed)
+    extra_env = {"READ_CACHE_ENABLED": "false"}
+    if args.concurrency_limit is not None:
+        extra_env["CONCURRENCY_LIMIT"] = str(args.concurrency_limit)
+    if args.queue_limit is not None:
+        extra_env["CONCURRENCY_QUEUE_LIMIT"] = str(args.queue_limit)
+
+    print(f"{cpu_count()} núcleos, {args.clients} conexiones desde {args.client_processes} procesos cliente")
+    baseline = None
+    for workers in args.workers:
+        port = free_port()
+        server = start_server(workers, port, extra_env)
+        try:
+            latencies, statuses = load(port, args.clients, args.client_processes, args.students, args.duration)
+        finally:
+            stop_server(server)
+        throughput = statuses.get(200, 0) / args.duration
+        baseline = baseline or throughput
+        print(
+            f"{workers:>2} workers: {throughput:8.1f} req/s  "
+            f"p50={statistics.median(latencies) * 1000:7.1f} ms  "
+            f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f} ms  "
+            f"503={statuses.get(503, 0):<6} x{throughput / baseline:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Generador de datos sintéticos con el esquema de app/models.py
+
+Crea N estudiantes agrupados en secciones que comparten horario (mismos cursos,
+instructores y aulas), con datos personales, de carrera y un periodo completo
+de clases. Escribe con el importador masivo, en SQLite o PostgreSQL según
+DATABASE_URL.
+
+Uso:
+    python -m benchmarks.dataset --students 5000 --weeks 18
+"""
+import argparse
+import random
+import time
+from datetime import date, time as dtime, timedelta
+
+import bcrypt
+
+DEFAULT_PASSWORD = "password123"
+TERM_START = date(2024, 3, 4)
+SECTION_SIZE = 25
+
+PROGRAMS = [
+    ("Profesional Técnico", "Desarrollo de Software", "Tecnologías de la información"),
+    ("Profesional Técnico", "Redes y Comunicaciones", "Tecnologías de la información"),
+    ("Profesional Técnico", "Mecatrónica Industrial", "Electrotecnia"),
+    ("Técnico Operativo", "Mecánica Automotriz", "Automotores"),
+    ("Profesional Técnico", "Administración Industrial", "Administración"),
+]
+CAMPUSES = ["IND-ETI", "IND-ELE", "SUR-AUT", "NOR-ADM"]
+COURSES = [
+    "SEMINARIO COMPLEMENT PRÁCT I", "DESARROLLO HUMANO", "MATEMÁTICA APLICADA",
+    "PROGRAMACIÓN ORIENTADA A OBJETOS", "BASE DE DATOS", "INGLÉS TÉCNICO",
+    "REDES DE COMPUTADORAS", "SEGURIDAD Y SALUD OCUPACIONAL", "FÍSICA Y QUÍMICA",
+    "DIBUJO TÉCNICO", "ELECTRICIDAD INDUSTRIAL", "GESTIÓN DE PROYECTOS",
+]
+INSTRUCTORS = [
+    "GARCIA FORTUNA, MOISES EDUARDO", "OLAZA GARIBAY, JENNY ROSARIO", "QUISPE MAMANI, ROSA ELENA",
+    "FLORES HUAMÁN, CARLOS ALBERTO", "RAMOS CHÁVEZ, LUIS MIGUEL", "TORRES VEGA, ANA LUCÍA",
+    "MENDOZA RÍOS, JORGE ANTONIO", "CASTILLO PAREDES, MARÍA JOSÉ",
+]
+LOCATION_CAMPUS = "IND"
+LOCATIONS = [
+    f"{LOCATION_CAMPUS} - TORRE {tower} 60T{tower} - {room}" for tower in "ABC" for room in (200, 201, 305, 504)
+]
+SLOTS = [
+    (dtime(7, 0), dtime(10, 0)),
+    (dtime(10, 15), dtime(13, 15)),
+    (dtime(14, 0), dtime(15, 30)),
+    (dtime(15, 45), dtime(17, 15)),
+]
+FIRST_NAMES = ["Juan Carlos", "María", "Luis", "Rosa", "José", "Ana", "Carlos", "Lucía", "Jorge", "Elena"]
+LAST_NAMES = ["Flores García", "Quispe Mamani", "Huamán Torres", "Ramos Vega", "Chávez Ríos", "Paredes Soto"]
+
+
+def student_id(index: int) -> str:
+    return f"{index:09d}"
+
+
+def student_records(students: int, password_hash: str, seed: int = 42):
+    """Registros para `import_students` (estudiante + datos personales + carrera)"""
+    rng = random.Random(seed)
+    for index in range(students):
+        level, program, school = PROGRAMS[(index // SECTION_SIZE) % len(PROGRAMS)]
+        yield {
+            "id": student_id(index),
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "dni": f"{40000000 + index:08d}",
+            "password_hash": password_hash,
+            "email": f"{index:07d}@senati.pe",
+            "phone": f"9{rng.randrange(10**8):08d}",
+            "address": f"Avenida {rng.choice(LAST_NAMES).split()[0]} {rng.randrange(100, 2000)}",
+            "level": level,
+            "program": program,
+            "school": school,
+            "campus": CAMPUSES[(index // SECTION_SIZE) % len(CAMPUSES)],
+        }
+
+
+def _section_timetable(section: int, rng: random.Random):
+    """Plantilla semanal de una sección: {día de la semana: [(slot, curso, instructor, aula)]}"""
+    timetable = {}
+    for weekday in range(5):
+        blocks = []
+        for slot in rng.sample(SLOTS, rng.randint(2, 4)):
+            course_index = rng.randrange(len(COURSES))
+            blocks.append((
+                slot,
+                COURSES[course_index],
+                INSTRUCTORS[(course_index + section) % len(INSTRUCTORS)],
+                LOCATIONS[(section + weekday) % len(LOCATIONS)],
+            ))
+        timetable[weekday] = sorted(blocks)
+    return timetable
+
+
+def schedule_records(students: int, weeks: int, term_start: date = TERM_START, seed: int = 42):
+    """Registros para `import_schedule`, ordenados por estudiante y fecha"""
+    rng = random.Random(seed)
+    sections = (students + SECTION_SIZE - 1) // SECTION_SIZE
+    timetables = [_section_timetable(section, rng) for section in range(sections)]
+    days = [term_start + timedelta(days=offset) for offset in range(weeks * 7)]
+
+    for index in range(students):
+        timetable = timetables[index // SECTION_SIZE]
+        for day in days:
+            for (start, end), course, instructor, location in timetable.get(day.weekday(), []):
+                yield {
+                    "student_id": student_id(index),
+                    "date": day.isoformat(),
+                    "start_time": start.isoformat(),
+                    "end_time": end.isoformat(),
+                    "course_name": course,
+                    "instructor_name": instructor,
+                    "location": location,
+                    "location_campus": LOCATION_CAMPUS,
+                }
+
+
+def generate(students: int, weeks: int = 18, password: str = DEFAULT_PASSWORD,
+             bcrypt_rounds: int = 12, seed: int = 42, report=print):
+    """Migra el esquema (si falta) y carga el dataset en la base de DATABASE_URL"""
+    from app import migrations
+    from app.database import engine
+    from app.importer import import_schedule, import_students
+
+    migrations.upgrade(engine, report=lambda message: None)
+    password_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(bcrypt_rounds)).decode("utf-8")
+    quiet = lambda message: None
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        total_students = import_students(conn, student_records(students, password_hash, seed), report=quiet)
+        total_entries, _ = import_schedule(conn, schedule_records(students, weeks, seed=seed), report=quiet)
+    report(
+        f"Dataset: {total_students} estudiantes, {total_entries} clases "
+        f"en {time.perf_counter() - started:.1f} s"
+    )
+    return total_students, total_entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un dataset sintético en DATABASE_URL")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--weeks", type=int, default=18)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    generate(args.students, args.weeks, bcrypt_rounds=args.bcrypt_rounds, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
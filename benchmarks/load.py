@@ -0,0 +1,232 @@
+"""
+Benchmark de carga reproducible de la API en el mismo proceso
+
+Genera (opcionalmente) un dataset sintético, levanta la aplicación con
+httpx.ASGITransport y la ejercita con muchos clientes concurrentes que
+mezclan login, datos personales, datos de carrera y horario. Reporta por
+endpoint p50/p95/p99, throughput y consultas SQL por solicitud en JSON, y
+puede compararse contra un resultado anterior para detectar regresiones.
+
+Uso:
+    python -m benchmarks.load --students 500 --clients 50 --requests 5000 --output actual.json
+    python -m benchmarks.load --students 500 --baseline anterior.json
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+SCENARIOS = {
+    "login": 0.05,
+    "personal-data": 0.25,
+    "career-data": 0.20,
+    "schedule": 0.50,
+}
+
+_request_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def install_query_counter(engine):
+    """Cuenta las sentencias SQL que ejecuta cada solicitud del benchmark"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        stats = _request_stats.get()
+        if stats is not None:
+            stats["queries"] += 1
+
+
+def summarize(samples, elapsed):
+    endpoints = {}
+    for name in SCENARIOS:
+        rows = [sample for sample in samples if sample["endpoint"] == name]
+        if not rows:
+            continue
+        latencies = sorted(sample["latency"] for sample in rows)
+        endpoints[name] = {
+            "requests": len(rows),
+            "errors": sum(1 for sample in rows if sample["status"] >= 400),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "throughput_rps": round(len(rows) / elapsed, 1),
+            "queries_per_request": round(sum(sample["queries"] for sample in rows) / len(rows), 3),
+        }
+    latencies = sorted(sample["latency"] for sample in samples)
+    return {
+        "endpoints": endpoints,
+        "total": {
+            "requests": len(samples),
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(samples) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        },
+    }
+
+
+async def drive(app, students, clients, total_requests, weeks, password, seed):
+    import httpx
+    from benchmarks.dataset import TERM_START, student_id
+
+    transport = httpx.ASGITransport(app=app)
+    samples = []
+    issued = 0
+    names = list(SCENARIOS)
+    weights = list(SCENARIOS.values())
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        async def call(endpoint, method, url, **kwargs):
+            stats = {"queries": 0}
+            token = _request_stats.set(stats)
+            start = time.perf_counter()
+            try:
+                response = await http.request(method, url, **kwargs)
+            finally:
+                _request_stats.reset(token)
+            samples.append({
+                "endpoint": endpoint,
+                "latency": time.perf_counter() - start,
+                "status": response.status_code,
+                "queries": stats["queries"],
+            })
+            return response
+
+        async def client(client_index):
+            nonlocal issued
+            rng = random.Random(seed + client_index)
+            sid = student_id(rng.randrange(students))
+            credentials = {"student_id": sid, "password": password}
+            response = await call("login", "POST", "/api/auth/login", json=credentials)
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            while issued < total_requests:
+                issued += 1
+                scenario = rng.choices(names, weights)[0]
+                if scenario == "login":
+                    await call("login", "POST", "/api/auth/login", json=credentials)
+                elif scenario == "personal-data":
+                    await call(scenario, "GET", f"/api/students/{sid}/personal-data", headers=headers)
+                elif scenario == "career-data":
+                    await call(scenario, "GET", f"/api/students/{sid}/career-data", headers=headers)
+                else:
+                    day = TERM_START + timedelta(days=rng.randrange(weeks * 7))
+                    await call(
+                        scenario, "GET", f"/api/schedule/{sid}",
+                        params={"schedule_date": day.isoformat()}, headers=headers,
+                    )
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(index) for index in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return samples, elapsed
+
+
+def compare(result, baseline, tolerance):
+    """Lista de regresiones frente a un resultado anterior"""
+    regressions = []
+    for name, current in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if previous is None:
+            continue
+        if current["queries_per_request"] > previous["queries_per_request"]:
+            regressions.append(
+                f"{name}: consultas/solicitud {previous['queries_per_request']} -> {current['queries_per_request']}"
+            )
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de carga de la API SENATI")
+    parser.add_argument("--database-url", default=None,
+                        help="por defecto, una base SQLite temporal con dataset nuevo")
+    parser.add_argument("--skip-generate", action="store_true", help="usar los datos existentes")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--weeks", type=int, default=18)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="archivo JSON de resultados")
+    parser.add_argument("--baseline", default=None, help="JSON anterior contra el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="aumento de p95 tolerado")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        db_file = os.path.join(tempfile.mkdtemp(prefix="senati_load_"), "load.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+
+    # La aplicación lee DATABASE_URL al importarse. Todos los clientes comparten IP y
+    # repiten login: el límite de intentos se mide en benchmarks/bench_login_throttle.py
+    os.environ.setdefault("LOGIN_THROTTLE_ENABLED", "false")
+    from benchmarks.dataset import DEFAULT_PASSWORD, generate
+    if not args.skip_generate:
+        generate(args.students, args.weeks, bcrypt_rounds=args.bcrypt_rounds, seed=args.seed,
+                 report=lambda message: print(message, file=sys.stderr))
+
+    from app.database import async_engine
+    from app.main import app
+    install_query_counter(async_engine.sync_engine)
+
+    samples, elapsed = asyncio.run(drive(
+        app, args.students, args.clients, args.requests, args.weeks, DEFAULT_PASSWORD, args.seed
+    ))
+    result = {
+        "revision": git_revision(),
+        "config": {
+            "database": async_engine.dialect.name,
+            "students": args.students,
+            "clients": args.clients,
+            "requests": args.requests,
+            "seed": args.seed,
+        },
+        **summarize(samples, elapsed),
+    }
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(result, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESIÓN {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
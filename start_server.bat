@@ -1,6 +1,7 @@
 @echo off
 cd /d "%~dp0"
 call .venv\Scripts\activate
+python -m app.migrate
 python -m uvicorn app.main:app --reload
 pause
 
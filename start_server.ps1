@@ -1,4 +1,5 @@
 Set-Location $PSScriptRoot
 & .\.venv\Scripts\Activate.ps1
+python -m app.migrate
 python -m uvicorn app.main:app --reload
 
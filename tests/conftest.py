@@ -0,0 +1,126 @@
+"""
+Entorno de pruebas: SQLite en memoria con el dataset sintético y un registro
+de las sentencias SQL que ejecuta cada solicitud
+"""
+import os
+
+# Antes de importar la app: los módulos leen su configuración al importarse.
+# La base en memoria es compartida para que el motor síncrono (migraciones,
+# dataset) y el asíncrono (endpoints) vean los mismos datos.
+os.environ["DATABASE_URL"] = "sqlite:///file:senati_tests?mode=memory&cache=shared&uri=true"
+os.environ["SNAPSHOT_ENABLED"] = "false"
+# Sin tareas de fondo que consulten la base entre las mediciones de las pruebas
+os.environ["READ_CACHE_POLL_SECONDS"] = "0"
+os.environ["OCCUPANCY_REFRESH_SECONDS"] = "0"
+
+import contextlib
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import database
+from benchmarks.dataset import generate
+
+STUDENTS = 50
+WEEKS = 2
+
+
+class _CountingCursor:
+    """Cursor que anota cuántas filas se leen de él (también con cursores del servidor)"""
+
+    def __init__(self, cursor, statement):
+        self._cursor = cursor
+        self._statement = statement
+
+    def _count(self, rows):
+        self._statement["rows"] += len(rows)
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._statement["rows"] += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        return self._count(self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchall(self):
+        return self._count(self._cursor.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class QueryLog:
+    """Sentencias ejecutadas por los dos motores mientras `record()` está activo"""
+
+    def __init__(self, *engines):
+        self.statements = []
+        self._active = False
+        for engine in engines:
+            event.listen(engine, "after_cursor_execute", self._after)
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        if not self._active:
+            return
+        entry = {"sql": statement, "parameters": parameters, "rows": 0}
+        self.statements.append(entry)
+        if context is not None and cursor is not None and cursor.description is not None:
+            context.cursor = _CountingCursor(cursor, entry)
+
+    @contextlib.contextmanager
+    def record(self):
+        self.statements = []
+        self._active = True
+        try:
+            yield self
+        finally:
+            self._active = False
+
+    def __len__(self):
+        return len(self.statements)
+
+    @property
+    def rows(self) -> int:
+        return sum(entry["rows"] for entry in self.statements)
+
+    def dump(self) -> str:
+        return "\n".join(
+            f"  {index}. [{entry['rows']} filas] {' '.join(entry['sql'].split())}  -- {entry['parameters']!r}"
+            for index, entry in enumerate(self.statements, 1)
+        )
+
+
+@pytest.fixture(scope="session")
+def seeded():
+    # La base en memoria vive mientras haya una conexión abierta
+    keeper = database.engine.connect()
+    generate(STUDENTS, WEEKS, bcrypt_rounds=4, report=lambda message: None)
+    yield
+    keeper.close()
+
+
+@pytest.fixture(scope="session")
+def client(seeded):
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def sql(seeded):
+    return QueryLog(database.engine, database.async_engine.sync_engine)
+
+
+@pytest.fixture(scope="session")
+def bearer():
+    """Cabecera Authorization con un token de acceso válido para el estudiante y rol indicados"""
+    from app.routers.auth import create_access_token
+
+    def headers(subject, role="student"):
+        token = create_access_token({"sub": subject, "name": "Pruebas", "role": role})
+        return {"Authorization": f"Bearer {token}"}
+    return headers
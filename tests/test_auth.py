@@ -0,0 +1,100 @@
+"""
+Tokens de renovación rotativos y revocación de tokens de acceso: reutilización
+de un token ya rotado, cierre de sesión y cambio de contraseña
+"""
+import bcrypt
+import pytest
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models import Student
+from app.throttle import MemoryBucketStore, login_throttle
+from benchmarks.dataset import DEFAULT_PASSWORD, student_id
+
+
+@pytest.fixture(autouse=True)
+def fresh_throttle(monkeypatch):
+    # Todas las pruebas comparten la IP del cliente de pruebas
+    monkeypatch.setattr(login_throttle, "store", MemoryBucketStore())
+
+
+def _login(client, subject, password=DEFAULT_PASSWORD):
+    response = client.post("/api/auth/login", json={"student_id": subject, "password": password})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _refresh(client, refresh_token):
+    return client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def _authorized(client, subject, tokens) -> bool:
+    response = client.get(
+        f"/api/students/{subject}/career-data", headers={"Authorization": f"Bearer {tokens['access_token']}"}
+    )
+    assert response.status_code in (200, 401), response.text
+    return response.status_code == 200
+
+
+def test_refresh_rotates_and_reuse_closes_every_session(client):
+    subject = student_id(40)
+    first = _login(client, subject)
+    other_device = _login(client, subject)
+
+    second = _refresh(client, first["refresh_token"])
+    assert second.status_code == 200, second.text
+    second = second.json()
+    assert second["refresh_token"] != first["refresh_token"]
+    assert _authorized(client, subject, second)
+
+    # El token ya rotado vuelve a aparecer: se revocan todas las sesiones del estudiante
+    assert _refresh(client, first["refresh_token"]).status_code == 401
+    assert _refresh(client, second["refresh_token"]).status_code == 401
+    assert _refresh(client, other_device["refresh_token"]).status_code == 401
+    assert not _authorized(client, subject, second)
+    assert not _authorized(client, subject, other_device)
+
+    assert _authorized(client, subject, _login(client, subject))
+
+
+def test_logout_revokes_the_access_token_and_its_family(client):
+    subject = student_id(41)
+    tokens = _login(client, subject)
+    assert _authorized(client, subject, tokens)
+
+    response = client.post(
+        "/api/auth/logout", json={"refresh_token": tokens["refresh_token"]},
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert response.status_code == 204
+    assert not _authorized(client, subject, tokens)
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401
+
+
+def test_password_change_revokes_issued_tokens(client):
+    subject = student_id(42)
+    tokens = _login(client, subject)
+    assert _authorized(client, subject, tokens)
+
+    with SessionLocal() as session:
+        student = session.scalar(select(Student).where(Student.id == subject))
+        student.password_hash = bcrypt.hashpw(b"nueva-clave", bcrypt.gensalt(4)).decode("utf-8")
+        session.commit()
+
+    assert not _authorized(client, subject, tokens)
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401
+    assert _authorized(client, subject, _login(client, subject, "nueva-clave"))
+
+
+def test_rolled_back_password_change_revokes_nothing(client):
+    subject = student_id(43)
+    tokens = _login(client, subject)
+
+    with SessionLocal() as session:
+        student = session.scalar(select(Student).where(Student.id == subject))
+        student.password_hash = bcrypt.hashpw(b"nueva-clave", bcrypt.gensalt(4)).decode("utf-8")
+        session.flush()
+        session.rollback()
+
+    assert _authorized(client, subject, tokens)
+    assert _refresh(client, tokens["refresh_token"]).status_code == 200
@@ -0,0 +1,51 @@
+"""
+Compresión negociada: br / gzip según Accept-Encoding, umbral de tamaño y Vary
+"""
+from datetime import timedelta
+
+import pytest
+
+from app.compression import negotiate
+from benchmarks.dataset import TERM_START, student_id
+
+STUDENT = student_id(13)
+RANGE = {"from": TERM_START.isoformat(), "to": (TERM_START + timedelta(days=13)).isoformat()}
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("identity", None),
+    ("", None),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def _range(client, bearer, accept):
+    return client.get(
+        f"/api/schedule/{STUDENT}/range", params=RANGE, headers={**bearer(STUDENT), "Accept-Encoding": accept}
+    )
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_schedule_is_compressed(client, bearer, encoding):
+    plain = _range(client, bearer, "identity")
+    assert "content-encoding" not in plain.headers
+    assert len(plain.content) > 1024
+
+    compressed = _range(client, bearer, encoding)
+    assert compressed.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert int(compressed.headers["content-length"]) < len(plain.content)
+    # httpx descomprime: el cuerpo y el ETag son los mismos que sin comprimir
+    assert compressed.json() == plain.json()
+    assert compressed.headers["etag"] == plain.headers["etag"]
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get("/", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,85 @@
+"""
+Límite de solicitudes simultáneas: 503 con la cola llena o al vencer la espera,
+sin llegar a la aplicación
+"""
+import asyncio
+
+from app.concurrency import CONCURRENCY_RETRY_AFTER, ConcurrencyLimiter, ConcurrencyLimitMiddleware
+
+
+class _BlockingApp:
+    """Aplicación ASGI que no responde hasta que se libera `gate`"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await self.gate.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _request(middleware, path="/api/schedule/today"):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware({"type": "http", "method": "GET", "path": path, "headers": []}, receive, send)
+    start = messages[0]
+    return start["status"], dict(start["headers"])
+
+
+def test_full_queue_is_rejected_without_reaching_the_app():
+    async def scenario():
+        app = _BlockingApp()
+        limiter = ConcurrencyLimiter(limit=1, queue_limit=0, timeout=5)
+        middleware = ConcurrencyLimitMiddleware(app, limiter)
+
+        running = asyncio.create_task(_request(middleware))
+        await asyncio.sleep(0)
+        status, headers = await _request(middleware)
+        assert status == 503
+        assert headers[b"retry-after"] == str(CONCURRENCY_RETRY_AFTER).encode()
+        assert app.calls == 1 and limiter.rejected == {"queue_full": 1, "timeout": 0}
+
+        # Las rutas exentas pasan aunque no haya lugar
+        health = asyncio.create_task(_request(middleware, "/health"))
+        await asyncio.sleep(0)
+        assert app.calls == 2
+
+        app.gate.set()
+        assert (await running)[0] == 200 and (await health)[0] == 200
+        assert limiter.active == 0
+        assert (await _request(middleware))[0] == 200
+
+    asyncio.run(scenario())
+
+
+def test_queued_request_times_out():
+    async def scenario():
+        app = _BlockingApp()
+        limiter = ConcurrencyLimiter(limit=1, queue_limit=1, timeout=0.05)
+        middleware = ConcurrencyLimitMiddleware(app, limiter)
+
+        running = asyncio.create_task(_request(middleware))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(_request(middleware))
+        await asyncio.sleep(0)
+        assert limiter.queued == 1 and limiter.saturated
+
+        status, _ = await waiting
+        assert status == 503
+        assert app.calls == 1 and limiter.rejected == {"queue_full": 0, "timeout": 1}
+        assert limiter.queued == 0 and not limiter.saturated
+
+        app.gate.set()
+        assert (await running)[0] == 200
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,85 @@
+"""
+GET condicionales: 304 con If-None-Match / If-Modified-Since y ETag que
+cambia cuando cambian los datos o los nombres mostrados
+"""
+from datetime import timedelta
+
+from sqlalchemy import select, update
+
+from app import read_cache
+from app.database import engine
+from app.dimensions import dimension_cache
+from app.models import Course, ScheduleEntry
+from benchmarks.dataset import TERM_START, student_id
+
+STUDENT = student_id(7)
+WEEK = {"from": TERM_START.isoformat(), "to": (TERM_START + timedelta(days=6)).isoformat()}
+
+
+def _range(client, bearer, **headers):
+    return client.get(f"/api/schedule/{STUDENT}/range", params=WEEK, headers={**bearer(STUDENT), **headers})
+
+
+def test_schedule_if_none_match_returns_304(client, bearer):
+    first = _range(client, bearer)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = _range(client, bearer, **{"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    assert _range(client, bearer, **{"If-None-Match": '"otra-version"'}).status_code == 200
+
+
+def test_schedule_if_modified_since_returns_304(client, bearer):
+    first = _range(client, bearer)
+    again = _range(client, bearer, **{"If-Modified-Since": first.headers["last-modified"]})
+    assert again.status_code == 304
+
+
+def test_career_data_304_from_cache(client, bearer):
+    url = f"/api/students/{STUDENT}/career-data"
+    first = client.get(url, headers=bearer(STUDENT))
+    assert first.status_code == 200
+    again = client.get(url, headers={**bearer(STUDENT), "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_personal_data_validators_come_from_the_loaded_row(client, bearer, sql):
+    url = f"/api/students/{STUDENT}/personal-data"
+    first = client.get(url, headers=bearer(STUDENT))
+    assert first.status_code == 200
+
+    # Coincida o no el validador, la respuesta sale de una sola consulta
+    with sql.record():
+        hit = client.get(url, headers={**bearer(STUDENT), "If-None-Match": first.headers["etag"]})
+    assert hit.status_code == 304 and len(sql) == 1, sql.dump()
+    with sql.record():
+        miss = client.get(url, headers={**bearer(STUDENT), "If-None-Match": '"otra-version"'})
+    assert miss.status_code == 200 and len(sql) == 1, sql.dump()
+    assert miss.headers["etag"] == first.headers["etag"] and miss.json() == first.json()
+
+
+def test_renamed_course_changes_schedule_etag(client, bearer):
+    first = _range(client, bearer)
+    etag = first.headers["etag"]
+    with engine.begin() as conn:
+        course_id = conn.scalar(
+            select(ScheduleEntry.course_id).where(ScheduleEntry.student_id == STUDENT).limit(1)
+        )
+        original = conn.scalar(select(Course.name).where(Course.id == course_id))
+        conn.execute(update(Course).where(Course.id == course_id).values(name=original + " (R)"))
+    try:
+        # Como al vencer DIMENSION_CACHE_TTL en el worker
+        dimension_cache.clear()
+        read_cache.invalidate_all()
+        renamed = _range(client, bearer, **{"If-None-Match": etag})
+        assert renamed.status_code == 200
+        assert renamed.headers["etag"] != etag
+        assert original + " (R)" in renamed.text
+    finally:
+        with engine.begin() as conn:
+            conn.execute(update(Course).where(Course.id == course_id).values(name=original))
+        dimension_cache.clear()
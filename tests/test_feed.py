@@ -0,0 +1,24 @@
+"""
+Calendario .ics: cuerpo por streaming y 304 con el ETag de la misma sesión
+"""
+from benchmarks.dataset import student_id
+
+STUDENT = student_id(12)
+
+
+def test_feed_streams_and_revalidates(client, bearer):
+    created = client.post(f"/api/schedule/{STUDENT}/feed-token", headers=bearer(STUDENT))
+    assert created.status_code == 201, created.text
+    url = created.json()["url"]
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers["content-type"].startswith("text/calendar")
+    assert first.text.startswith("BEGIN:VCALENDAR") and first.text.rstrip().endswith("END:VCALENDAR")
+
+    again = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    assert client.delete(f"/api/schedule/{STUDENT}/feed-token", headers=bearer(STUDENT)).status_code == 204
+    assert client.get(url).status_code == 404
@@ -0,0 +1,85 @@
+"""
+Importador masivo: volver a importar el mismo archivo no cambia nada, un
+archivo distinto solo toca las clases que cambiaron y los workers lo ven sin
+esperar el TTL de su caché
+"""
+import asyncio
+
+from sqlalchemy import select
+
+from app import read_cache
+from app.database import engine
+from app.importer import import_schedule, import_students
+from app.models import ScheduleEntry, Student, SyncTombstone
+
+STUDENT = "imp000001"
+QUIET = lambda message: None
+
+STUDENTS = [{
+    "id": STUDENT, "first_name": "Rosa", "last_name": "Quispe Mamani", "dni": "79000001",
+    "password_hash": "x", "email": "imp000001@senati.pe", "phone": "", "address": "",
+    "level": "Profesional Técnico", "program": "Desarrollo de Software",
+    "school": "Tecnologías de la información", "campus": "IND-ETI",
+}]
+
+
+def _schedule(*locations):
+    return [
+        {
+            "student_id": STUDENT, "date": f"2024-05-0{day}", "start_time": "07:00", "end_time": "10:00",
+            "course_name": "BASE DE DATOS", "instructor_name": "TORRES VEGA, ANA LUCÍA", "location": location,
+        }
+        for day, location in enumerate(locations, start=1)
+    ]
+
+
+def _state():
+    with engine.connect() as conn:
+        student = conn.execute(select(Student.version).where(Student.id == STUDENT)).one()
+        entries = conn.execute(
+            select(ScheduleEntry.id, ScheduleEntry.version, ScheduleEntry.location_id)
+            .where(ScheduleEntry.student_id == STUDENT).order_by(ScheduleEntry.date)
+        ).all()
+        tombstones = conn.execute(
+            select(SyncTombstone.entity_id).where(SyncTombstone.student_id == STUDENT)
+        ).scalars().all()
+    return student, entries, tombstones
+
+
+def _import(students, schedule):
+    with engine.begin() as conn:
+        import_students(conn, students, report=QUIET)
+        return import_schedule(conn, schedule, report=QUIET)
+
+
+def test_reimport_is_idempotent(seeded):
+    rooms = ("IND - TORRE A 60TA - 200", "IND - TORRE A 60TA - 201", "IND - TORRE B 60TB - 305")
+    assert _import(STUDENTS, _schedule(*rooms)) == (3, 0)
+    before = _state()
+
+    assert _import(STUDENTS, _schedule(*rooms)) == (3, 0)
+    assert _state() == before
+
+    # Solo la clase que cambió de aula se reemplaza (con tombstone); las otras conservan id y versión
+    total, deleted = _import(STUDENTS, _schedule(rooms[0], rooms[2], rooms[2]))
+    assert (total, deleted) == (3, 1)
+    _, entries, tombstones = _state()
+    _, old_entries, _ = before
+    assert entries[0] == old_entries[0] and entries[2] == old_entries[2]
+    assert entries[1][0] != old_entries[1][0]
+    assert tombstones == [old_entries[1][0]]
+
+
+def test_workers_see_imports_through_the_clock(client, bearer):
+    _import(STUDENTS, [])
+    url = f"/api/students/{STUDENT}/career-data"
+    assert client.get(url, headers=bearer(STUDENT)).json()["campus"] == "IND-ETI"
+
+    # El importador escribe con Core desde otro proceso: ningún evento del ORM invalida la caché
+    watcher = read_cache.ChangeWatcher()
+    asyncio.run(watcher.tick())
+    _import([{**STUDENTS[0], "campus": "IND-MEC"}], [])
+    assert client.get(url, headers=bearer(STUDENT)).json()["campus"] == "IND-ETI"
+
+    assert STUDENT in asyncio.run(watcher.tick())
+    assert client.get(url, headers=bearer(STUDENT)).json()["campus"] == "IND-MEC"
@@ -0,0 +1,32 @@
+"""
+Instrumentación de los pools de conexiones
+"""
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from app import metrics
+
+
+def _checkouts(name):
+    series = metrics.db_checkout_wait._series.get((name,))
+    return series[2] if series is not None else 0
+
+
+def test_checkout_wait_survives_dispose(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=metrics.timed_pool_class(QueuePool, "test-pool"), pool_size=1
+    )
+    metrics.instrument_engine(engine, "test-pool")
+    assert type(engine.pool).__name__ == "QueuePool"
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert _checkouts("test-pool") == 1
+
+    # dispose() crea un pool nuevo de la misma clase: la medición sigue activa
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert _checkouts("test-pool") == 2
+    assert 'senati_db_pool_size{engine="test-pool"} 1' in metrics.registry.render()
+    engine.dispose()
@@ -0,0 +1,102 @@
+"""
+Ocupación de aulas e instructores: aulas libres por sede, cruces con límite y
+actualización del índice solo con los días que cambiaron
+"""
+import asyncio
+from datetime import time, timedelta
+
+from sqlalchemy import select
+
+from app.database import SessionLocal, read_session
+from app.models import Instructor, Location, ScheduleEntry
+from app.occupancy import occupancy_index
+from benchmarks.dataset import TERM_START, student_id
+
+STUDENT = student_id(30)
+DAY = TERM_START + timedelta(days=1)
+ADMIN = ("admin", "admin")
+
+
+def _refresh():
+    async def refresh():
+        async with read_session() as db:
+            await occupancy_index.refresh(db)
+    asyncio.run(refresh())
+
+
+def _conflicts(client, bearer, **params):
+    params = {"from": TERM_START.isoformat(), "to": (TERM_START + timedelta(days=13)).isoformat(), **params}
+    response = client.get("/api/occupancy/conflicts", params=params, headers=bearer(*ADMIN))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_free_rooms_by_campus(client, bearer):
+    params = {"date": DAY.isoformat(), "start": "07:30", "end": "09:00"}
+    with SessionLocal() as session:
+        rooms = set(session.scalars(select(Location.name).where(Location.campus == "IND")))
+        busy = set(session.scalars(
+            select(Location.name).join(ScheduleEntry, ScheduleEntry.location_id == Location.id).where(
+                ScheduleEntry.date == DAY,
+                ScheduleEntry.start_time < time(9, 0),
+                ScheduleEntry.end_time > time(7, 30),
+            )
+        ))
+    assert busy and rooms - busy
+
+    response = client.get("/api/occupancy/availability", params={**params, "campus": "IND"}, headers=bearer(*ADMIN))
+    assert response.status_code == 200, response.text
+    assert response.json()["free_locations"] == sorted(rooms - busy)
+
+    response = client.get("/api/occupancy/availability", params={**params, "campus": "SUR"}, headers=bearer(*ADMIN))
+    assert response.json()["free_locations"] == []
+
+    response = client.get("/api/occupancy/availability", params=params, headers=bearer(STUDENT))
+    assert response.status_code == 403
+
+
+def test_conflicts_follow_changes_and_limit(client, bearer):
+    # Índice ya armado: los cambios siguientes se aplican como actualización por días
+    client.get("/api/occupancy/conflicts", params={"from": DAY.isoformat(), "to": DAY.isoformat()},
+               headers=bearer(*ADMIN))
+    with SessionLocal() as session:
+        first = session.scalars(
+            select(ScheduleEntry).where(ScheduleEntry.student_id == STUDENT)
+            .order_by(ScheduleEntry.date, ScheduleEntry.start_time)
+        ).first()
+        instructor = session.scalar(select(Instructor.name).where(Instructor.id == first.instructor_id))
+        other_room = session.scalar(select(Location.id).where(Location.id != first.location_id))
+        # Otra clase del mismo instructor, media hora después y en otra aula, en dos días distintos
+        overlapping = [
+            ScheduleEntry(
+                student_id=STUDENT, date=first.date + timedelta(days=offset),
+                start_time=first.start_time.replace(minute=30), end_time=first.end_time,
+                course_id=first.course_id, instructor_id=first.instructor_id, location_id=other_room,
+                updated_at=first.updated_at,
+            )
+            for offset in (0, 7)
+        ]
+        days = [entry.date.isoformat() for entry in overlapping]
+        session.add_all(overlapping)
+        session.commit()
+        added = [entry.id for entry in overlapping]
+
+    builds = occupancy_index.builds
+    _refresh()
+    assert occupancy_index.builds == builds and occupancy_index.updates >= 1
+
+    conflicts = _conflicts(client, bearer, instructor=instructor)
+    assert conflicts["truncated"] is False
+    assert [conflict["date"] for conflict in conflicts["conflicts"]] == days
+    assert all(conflict["kind"] == "instructor" for conflict in conflicts["conflicts"])
+
+    limited = _conflicts(client, bearer, instructor=instructor, limit=1)
+    assert limited["conflicts"] == conflicts["conflicts"][:1] and limited["truncated"] is True
+
+    # Los borrados llegan por sus tombstones
+    with SessionLocal() as session:
+        for entry in session.scalars(select(ScheduleEntry).where(ScheduleEntry.id.in_(added))):
+            session.delete(entry)
+        session.commit()
+    _refresh()
+    assert _conflicts(client, bearer, instructor=instructor)["conflicts"] == []
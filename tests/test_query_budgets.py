@@ -0,0 +1,188 @@
+"""
+Presupuesto de consultas SQL por endpoint
+
+Cada ruta de app/routers declara cuántas sentencias puede ejecutar y cuántas
+filas puede leer en una solicitud típica contra el dataset sintético. Un N+1
+(por ejemplo, recorrer student.schedule_entries con carga perezosa en una
+respuesta nueva) supera el presupuesto y la prueba falla mostrando el SQL.
+Las cachés de lectura se vacían antes de medir: el presupuesto es el del
+camino que consulta la base. Las cachés de catálogos (dimensiones, índice de
+ocupación, revocaciones) se calientan antes, como en un worker en marcha.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+import pytest
+
+from app import read_cache
+from benchmarks.dataset import DEFAULT_PASSWORD, INSTRUCTORS, TERM_START, student_id
+
+STUDENT = student_id(3)
+DAY = TERM_START + timedelta(days=2)
+WEEK_END = TERM_START + timedelta(days=6)
+
+
+def login(client, subject=STUDENT):
+    response = client.post("/api/auth/login", json={"student_id": subject, "password": DEFAULT_PASSWORD})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@dataclass
+class Budget:
+    queries: int
+    rows: int
+    status_code: int
+    prepare: Callable  # (client, bearer) -> argumentos de client.request; puede preparar datos sin medirlos
+
+
+BUDGETS = {}
+
+
+def budget(method, path, queries, rows, status_code=200):
+    def register(prepare):
+        BUDGETS[(method, path)] = Budget(queries, rows, status_code, prepare)
+        return prepare
+    return register
+
+
+@budget("POST", "/api/auth/login", queries=2, rows=1)
+def _login(client, bearer):
+    return {"url": "/api/auth/login", "json": {"student_id": student_id(4), "password": DEFAULT_PASSWORD}}
+
+
+@budget("POST", "/api/auth/refresh", queries=3, rows=2)
+def _refresh(client, bearer):
+    return {"url": "/api/auth/refresh", "json": {"refresh_token": login(client, student_id(5))["refresh_token"]}}
+
+
+@budget("POST", "/api/auth/logout", queries=3, rows=1, status_code=204)
+def _logout(client, bearer):
+    tokens = login(client, student_id(6))
+    return {
+        "url": "/api/auth/logout",
+        "json": {"refresh_token": tokens["refresh_token"]},
+        "headers": {"Authorization": f"Bearer {tokens['access_token']}"},
+    }
+
+
+@budget("GET", "/api/students/{student_id}/personal-data", queries=1, rows=1)
+def _personal_data(client, bearer):
+    return {"url": f"/api/students/{STUDENT}/personal-data", "headers": bearer(STUDENT)}
+
+
+@budget("GET", "/api/students/{student_id}/career-data", queries=1, rows=1)
+def _career_data(client, bearer):
+    return {"url": f"/api/students/{STUDENT}/career-data", "headers": bearer(STUDENT)}
+
+
+@budget("GET", "/api/students/{student_id}/profile", queries=2, rows=8)
+def _profile(client, bearer):
+    return {"url": f"/api/students/{STUDENT}/profile", "params": {"schedule_date": DAY.isoformat()}, "headers": bearer(STUDENT)}
+
+
+@budget("POST", "/api/schedule/bulk", queries=1, rows=15)
+def _bulk(client, bearer):
+    return {
+        "url": "/api/schedule/bulk",
+        "json": {"student_ids": [student_id(index) for index in range(3)], "from": DAY.isoformat(), "to": DAY.isoformat()},
+        "headers": bearer("admin", "admin"),
+    }
+
+
+@budget("GET", "/api/schedule/feed/{token}.ics", queries=3, rows=5)
+def _feed(client, bearer):
+    response = client.post(f"/api/schedule/{STUDENT}/feed-token", headers=bearer(STUDENT))
+    assert response.status_code == 201, response.text
+    return {"url": response.json()["url"]}
+
+
+@budget("POST", "/api/schedule/{student_id}/feed-token", queries=1, rows=0, status_code=201)
+def _create_feed_token(client, bearer):
+    return {"url": f"/api/schedule/{STUDENT}/feed-token", "headers": bearer(STUDENT)}
+
+
+@budget("DELETE", "/api/schedule/{student_id}/feed-token", queries=1, rows=0, status_code=204)
+def _revoke_feed_tokens(client, bearer):
+    return {"url": f"/api/schedule/{STUDENT}/feed-token", "headers": bearer(STUDENT)}
+
+
+@budget("GET", "/api/schedule/{student_id}", queries=1, rows=6)
+def _schedule_day(client, bearer):
+    return {"url": f"/api/schedule/{STUDENT}", "params": {"schedule_date": DAY.isoformat()}, "headers": bearer(STUDENT)}
+
+
+@budget("GET", "/api/schedule/{student_id}/range", queries=1, rows=24)
+def _schedule_range(client, bearer):
+    return {
+        "url": f"/api/schedule/{STUDENT}/range",
+        "params": {"from": TERM_START.isoformat(), "to": WEEK_END.isoformat()},
+        "headers": bearer(STUDENT),
+    }
+
+
+@budget("GET", "/api/sync/{student_id}", queries=3, rows=40)
+def _sync(client, bearer):
+    return {"url": f"/api/sync/{STUDENT}", "headers": bearer(STUDENT)}
+
+
+@budget("GET", "/api/occupancy/availability", queries=0, rows=0)
+def _availability(client, bearer):
+    return {
+        "url": "/api/occupancy/availability",
+        "params": {"date": DAY.isoformat(), "start": "07:00", "end": "10:00", "campus": "IND"},
+        "headers": bearer("admin", "admin"),
+    }
+
+
+@budget("GET", "/api/occupancy/conflicts", queries=0, rows=0)
+def _conflicts(client, bearer):
+    return {
+        "url": "/api/occupancy/conflicts",
+        "params": {"from": TERM_START.isoformat(), "to": WEEK_END.isoformat(), "instructor": INSTRUCTORS[0]},
+        "headers": bearer("admin", "admin"),
+    }
+
+
+@budget("GET", "/api/diagnostics/slow-queries", queries=0, rows=0)
+def _slow_queries(client, bearer):
+    return {"url": "/api/diagnostics/slow-queries", "headers": bearer("admin", "admin")}
+
+
+@pytest.fixture(scope="module")
+def warm(client, bearer):
+    """Carga las cachés de catálogos como lo haría el tráfico normal del worker"""
+    for route in (("GET", "/api/schedule/{student_id}/range"), ("GET", "/api/occupancy/availability")):
+        response = client.get(**BUDGETS[route].prepare(client, bearer))
+        assert response.status_code == 200, response.text
+    return client
+
+
+def test_every_route_has_a_budget(client):
+    routes = {
+        (method.upper(), path)
+        for path, operations in client.app.openapi()["paths"].items() if path.startswith("/api/")
+        for method in operations
+    }
+    assert not routes - set(BUDGETS), f"Rutas sin presupuesto de consultas: {sorted(routes - set(BUDGETS))}"
+    assert not set(BUDGETS) - routes, f"Presupuestos de rutas que ya no existen: {sorted(set(BUDGETS) - routes)}"
+
+
+@pytest.mark.parametrize("route", sorted(BUDGETS), ids=lambda route: f"{route[0]} {route[1]}")
+def test_query_budget(warm, sql, bearer, route):
+    method, path = route
+    spec = BUDGETS[route]
+    request = spec.prepare(warm, bearer)
+    read_cache.invalidate_all()
+
+    with sql.record():
+        response = warm.request(method, **request)
+
+    assert response.status_code == spec.status_code, response.text
+    assert len(sql) <= spec.queries, (
+        f"{method} {path} ejecutó {len(sql)} sentencias (presupuesto: {spec.queries}):\n{sql.dump()}"
+    )
+    assert sql.rows <= spec.rows, (
+        f"{method} {path} leyó {sql.rows} filas (presupuesto: {spec.rows}):\n{sql.dump()}"
+    )
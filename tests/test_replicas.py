@@ -0,0 +1,115 @@
+"""
+Lecturas en réplicas: round-robin, respaldo en la primaria y estado en /health
+
+Cada réplica es un archivo SQLite; la primaria es la base en memoria de las
+pruebas. PRAGMA database_list dice de qué archivo se leyó.
+"""
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app import database
+
+
+def _replica(tmp_path, name):
+    path = tmp_path / f"{name}.db"
+    path.touch()
+    return database.Replica(name, f"sqlite:///{path}"), str(path)
+
+
+async def _file(db):
+    return (await db.execute(text("PRAGMA database_list"))).all()[0][2]
+
+
+async def _origin():
+    async with database.read_session() as db:
+        return await _file(db)
+
+
+async def _primary():
+    async with database.AsyncSessionLocal() as db:
+        return await _file(db)
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    created = []
+    monkeypatch.setattr(database, "replicas", created)
+    yield created
+    for replica in created:
+        asyncio.run(replica.engine.dispose())
+
+
+def _checked(replica, lag=None):
+    # Recién chequeada: read_session no agenda otro chequeo en segundo plano
+    replica.lag = lag
+    replica.checked_at = time.monotonic()
+
+
+def test_reads_alternate_between_replica_files(seeded, replicas, tmp_path):
+    first, first_path = _replica(tmp_path, "replica0")
+    second, second_path = _replica(tmp_path, "replica1")
+    replicas += [first, second]
+
+    async def scenario():
+        await database.refresh_replicas(force=True)
+        return [await _origin() for _ in range(4)]
+
+    origins = asyncio.run(scenario())
+    assert sorted(origins) == sorted([first_path, second_path] * 2)
+    assert origins[0] != origins[1]
+
+
+def test_down_replica_falls_back_to_the_primary(seeded, replicas, tmp_path):
+    # El directorio no existe: SQLite no puede abrir el archivo
+    down = database.Replica("replica0", f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    _checked(down)
+    replicas.append(down)
+
+    assert asyncio.run(_origin()) == asyncio.run(_primary())
+    assert not down.available and down.error == "OperationalError"
+    assert database.choose_replica() is None
+
+
+def test_lagging_replica_is_skipped(seeded, replicas, tmp_path):
+    lagging, _ = _replica(tmp_path, "replica0")
+    current, current_path = _replica(tmp_path, "replica1")
+    _checked(lagging, lag=database.REPLICA_MAX_LAG_SECONDS + 1)
+    _checked(current, lag=0.0)
+    replicas += [lagging, current]
+
+    assert [asyncio.run(_origin()) for _ in range(3)] == [current_path] * 3
+
+    # Todas atrasadas: se lee de la primaria
+    _checked(current, lag=database.REPLICA_MAX_LAG_SECONDS + 1)
+    assert asyncio.run(_origin()) == asyncio.run(_primary())
+
+
+def test_health_reports_replica_pool_and_lag(client, replicas, tmp_path):
+    lagging, _ = _replica(tmp_path, "replica0")
+    _checked(lagging, lag=30.0)
+    replicas.append(lagging)
+
+    response = client.get("/health")
+    assert response.status_code == 200
+    body = response.json()["database"]
+    assert "class" in body["primary"]
+    assert body["replicas"] == [{
+        "name": "replica0",
+        "available": True,
+        "usable": False,
+        "lag_seconds": 30.0,
+        "error": None,
+        "pool": {
+            "class": "AsyncAdaptedQueuePool",
+            "size": database.REPLICA_POOL_SIZE,
+            "checked_in": 0,
+            "checked_out": 0,
+            "overflow": -database.REPLICA_POOL_SIZE,
+            "max_overflow": database.REPLICA_MAX_OVERFLOW,
+            "saturated": False,
+        },
+    }]
+    assert 'senati_db_replica_lag_seconds{replica="replica0"} 30.0' in client.get("/metrics").text
@@ -0,0 +1,34 @@
+"""
+Reparto de DB_MAX_CONNECTIONS entre los pools de los workers
+"""
+import pytest
+
+from app import server
+
+
+def test_pools_reserve_lifespan_connections():
+    primary_reserved, replica_reserved = server.lifespan_connections({})
+    settings = server.worker_settings(4, {"DATABASE_REPLICA_URLS": "postgresql://replica/senati"}, cpus=8)
+
+    # Las tareas de fondo tienen conexiones fijas propias además de las de las solicitudes
+    assert int(settings["DB_POOL_SIZE"]) >= primary_reserved + 1
+    assert int(settings["REPLICA_POOL_SIZE"]) >= replica_reserved + 1
+    primary = int(settings["DB_POOL_SIZE"]) + int(settings["DB_MAX_OVERFLOW"])
+    sync = int(settings["DB_SYNC_POOL_SIZE"]) + int(settings["DB_SYNC_MAX_OVERFLOW"])
+    assert 4 * (primary + sync) <= server.DB_MAX_CONNECTIONS
+    assert 4 * (int(settings["REPLICA_POOL_SIZE"]) + int(settings["REPLICA_MAX_OVERFLOW"])) \
+        <= server.REPLICA_MAX_CONNECTIONS
+    assert settings["PASSWORD_POOL_WORKERS"] == "2"
+
+
+def test_too_many_workers_are_refused():
+    with pytest.raises(ValueError, match="a lo sumo"):
+        server.worker_settings(server.DB_MAX_CONNECTIONS, {}, cpus=8)
+
+
+def test_explicit_pools_over_the_limit_are_refused():
+    with pytest.raises(ValueError, match="DB_MAX_CONNECTIONS"):
+        server.worker_settings(4, {"DB_POOL_SIZE": "40"}, cpus=8)
+    # Sin tareas de fondo no hace falta reservarles conexiones
+    quiet = {"READ_CACHE_POLL_SECONDS": "0", "OCCUPANCY_REFRESH_SECONDS": "0", "SNAPSHOT_ENABLED": "false"}
+    assert server.lifespan_connections(quiet) == (2, 1)
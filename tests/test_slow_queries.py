@@ -0,0 +1,27 @@
+"""
+Registro de consultas lentas: planes acotados y hash de estudiantes con una clave propia
+"""
+import hashlib
+import os
+
+from app import slow_queries
+from app.database import engine
+from app.slow_queries import SlowQueryLog, student_hash
+
+
+def test_plans_are_bounded(seeded, monkeypatch):
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_PLAN_CACHE_SIZE", 2)
+    log = SlowQueryLog()
+    with engine.connect() as conn:
+        for table in ("students", "courses", "locations"):
+            statement = f"SELECT id FROM {table}"
+            plan, analyzed = log._plan(conn, statement, (), False, statement)
+            assert plan and not analyzed
+    assert len(log._plans) == 2
+
+
+def test_student_hash_does_not_reuse_the_jwt_secret():
+    secret = os.getenv("SECRET_KEY", "your-secret-key-change-in-production").encode("utf-8")[:64]
+    with_jwt_secret = hashlib.blake2b(b"i00000001", key=secret, digest_size=8).hexdigest()
+    assert student_hash("i00000001") != with_jwt_secret
+    assert student_hash("i00000001") == student_hash("i00000001") != student_hash("i00000002")
@@ -0,0 +1,52 @@
+"""
+Instantáneas de horario compartidas entre workers y "hoy" en la hora de las sedes
+"""
+import asyncio
+import time
+from datetime import datetime, time as dtime, timedelta
+
+from app import schedule_data
+from app.snapshots import SharedSnapshots, SnapshotStore, week_of
+from benchmarks.dataset import TERM_START, student_id
+
+STUDENT = student_id(25)
+DAY = TERM_START + timedelta(days=2)
+
+
+def test_one_worker_builds_and_every_worker_reads(seeded, tmp_path):
+    builder = SnapshotStore(SharedSnapshots(str(tmp_path)))
+    reader = SnapshotStore(SharedSnapshots(str(tmp_path)))
+    now = datetime.combine(DAY, dtime(12), schedule_data.local_now().tzinfo)
+
+    asyncio.run(builder.tick(now))
+    asyncio.run(reader.tick(now))
+    assert builder.builds == 1 and reader.builds == 0
+
+    snapshot = reader.get(STUDENT, DAY, DAY)
+    assert snapshot is not None and snapshot == builder.get(STUDENT, DAY, DAY)
+    assert reader.get(STUDENT, *week_of(DAY)) is not None
+    # El lector no guarda copia propia
+    assert reader.backend.local_bytes == 0 and reader.size_bytes > 0
+
+    # Un cambio visto solo por el lector: una construcción que consultó antes no lo pisa
+    consulted = time.time()
+    reader.invalidate([STUDENT])
+    assert builder.get(STUDENT, DAY, DAY) is None
+    builder.backend.put_many([((STUDENT, DAY, DAY), snapshot)], consulted)
+    assert reader.get(STUDENT, DAY, DAY) is None
+
+    # El constructor se entera por su observador de cambios y lo rearma
+    builder.invalidate([STUDENT])
+    asyncio.run(builder.tick(now))
+    assert reader.get(STUDENT, DAY, DAY) == snapshot
+
+
+def test_default_dates_follow_the_campus_clock(client, bearer, monkeypatch):
+    # 23:30 en Lima ya es el día siguiente en un servidor en UTC
+    late = datetime.combine(DAY, dtime(23, 30), schedule_data.local_now().tzinfo)
+    monkeypatch.setattr(schedule_data, "local_now", lambda: late)
+
+    response = client.get(f"/api/students/{STUDENT}/profile", params={"include": "schedule"},
+                          headers=bearer(STUDENT))
+    assert response.status_code == 200, response.text
+    assert response.json()["schedule"]["date"] == DAY.isoformat()
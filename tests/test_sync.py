@@ -0,0 +1,94 @@
+"""
+Sincronización incremental: cursor, cambios desde el cursor, tombstones y una
+versión por flush
+"""
+from sqlalchemy import bindparam, select, update
+
+from app import database, sync_data
+from app.database import SessionLocal
+from app.models import PersonalData, ScheduleEntry, utcnow
+from benchmarks.dataset import student_id
+
+STUDENT = student_id(11)
+
+
+def _sync(client, bearer, cursor=None):
+    params = {"cursor": cursor} if cursor else {}
+    response = client.get(f"/api/sync/{STUDENT}", params=params, headers=bearer(STUDENT))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_full_then_unchanged(client, bearer):
+    full = _sync(client, bearer)
+    assert full["full"] is True
+    assert full["schedule_entries"] and full["personal_data"] and full["career_data"]
+
+    again = _sync(client, bearer, full["cursor"])
+    assert again == {
+        "cursor": full["cursor"], "full": False, "personal_data": None, "career_data": None,
+        "schedule_entries": [], "deleted": [],
+    }
+
+
+def test_changes_and_tombstones_since_cursor(client, bearer):
+    cursor = _sync(client, bearer)["cursor"]
+
+    with SessionLocal() as session:
+        entries = session.scalars(
+            select(ScheduleEntry).where(ScheduleEntry.student_id == STUDENT).order_by(ScheduleEntry.id).limit(2)
+        ).all()
+        changed, removed = entries
+        changed.end_time = changed.end_time.replace(minute=(changed.end_time.minute + 5) % 60)
+        removed_id = removed.id
+        session.delete(removed)
+        session.commit()
+        changed_id = changed.id
+
+    delta = _sync(client, bearer, cursor)
+    assert delta["full"] is False
+    assert [entry["id"] for entry in delta["schedule_entries"]] == [changed_id]
+    assert delta["deleted"] == [{"entity": "schedule_entries", "id": removed_id}]
+    assert delta["personal_data"] is None and delta["career_data"] is None
+    assert sync_data.decode_cursor(delta["cursor"]) > sync_data.decode_cursor(cursor)
+
+    with SessionLocal() as session:
+        personal = session.scalar(select(PersonalData).where(PersonalData.student_id == STUDENT))
+        personal.phone = "900000011"
+        session.commit()
+    latest = _sync(client, bearer, delta["cursor"])
+    assert latest["personal_data"]["phone"] == "900000011"
+    assert latest["schedule_entries"] == [] and latest["deleted"] == []
+
+
+def test_invalid_cursor(client, bearer):
+    response = client.get(f"/api/sync/{STUDENT}", params={"cursor": "no-es-un-cursor"}, headers=bearer(STUDENT))
+    assert response.status_code == 400
+
+
+def test_one_version_per_flush(seeded, sql):
+    with SessionLocal() as session:
+        entries = session.scalars(
+            select(ScheduleEntry).where(ScheduleEntry.student_id == STUDENT).order_by(ScheduleEntry.id).limit(3)
+        ).all()
+        personal = session.scalar(select(PersonalData).where(PersonalData.student_id == STUDENT))
+        with sql.record():
+            for entry in entries:
+                entry.end_time = entry.end_time.replace(minute=(entry.end_time.minute + 1) % 60)
+            personal.address = "Av. Alfredo Mendiola 3520"
+            session.delete(entries[0])
+            session.flush()
+        session.commit()
+        versions = {entry.version for entry in entries[1:]} | {personal.version}
+
+    clock = [entry for entry in sql.statements if "sync_clock" in entry["sql"]]
+    assert len(clock) == 1, sql.dump()
+    assert len(versions) == 1
+
+    # Sentencias Core con executemany: una versión por sentencia
+    with database.engine.begin() as conn, sql.record():
+        conn.execute(
+            update(ScheduleEntry.__table__).where(ScheduleEntry.id == bindparam("entry_id")),
+            [{"entry_id": entry.id, "updated_at": utcnow()} for entry in entries[1:]],
+        )
+    assert sum("sync_clock" in entry["sql"] for entry in sql.statements) == 1, sql.dump()
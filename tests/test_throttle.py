@@ -0,0 +1,108 @@
+"""
+Límite de intentos de login: 429 antes de bcrypt, recarga de las cubetas e IP
+del cliente detrás de un proxy
+"""
+import asyncio
+
+import pytest
+
+from app import forwarding, passwords
+from app.throttle import BucketStore, MemoryBucketStore, RedisBucketStore, login_throttle
+from benchmarks.dataset import DEFAULT_PASSWORD, student_id
+
+
+def test_bucket_refills_at_rate():
+    store = MemoryBucketStore(shards=4)
+    # Ráfaga de 2 y un token por segundo
+    assert store.take_now("student:1", rate=1.0, burst=2, now=0.0) == 0
+    assert store.take_now("student:1", rate=1.0, burst=2, now=0.0) == 0
+    assert store.take_now("student:1", rate=1.0, burst=2, now=0.0) == pytest.approx(1.0)
+    assert store.take_now("student:1", rate=1.0, burst=2, now=0.5) == pytest.approx(0.5)
+    assert store.take_now("student:1", rate=1.0, burst=2, now=1.0) == 0
+    # Otra clave tiene su propia cubeta
+    assert store.take_now("student:2", rate=1.0, burst=2, now=1.0) == 0
+
+
+def test_refund_returns_a_token_up_to_the_burst():
+    store = MemoryBucketStore(shards=1)
+    assert store.take_now("ip:x", rate=1.0, burst=1, now=0.0) == 0
+    store.refund_now("ip:x", burst=1)
+    store.refund_now("ip:x", burst=1)
+    assert store.take_now("ip:x", rate=1.0, burst=1, now=0.0) == 0
+    assert store.take_now("ip:x", rate=1.0, burst=1, now=0.0) == pytest.approx(1.0)
+
+
+def test_forwarded_client_skips_trusted_hops():
+    proxies = forwarding.TrustedProxies("10.0.0.0/8, 127.0.0.1")
+    # Lo que el cliente escribe a la izquierda no cuenta
+    assert proxies.client("10.1.2.3", "6.6.6.6, 200.1.1.1, 10.9.9.9") == "200.1.1.1"
+    assert proxies.client("200.1.1.1", "6.6.6.6") == "200.1.1.1"
+    assert forwarding.TrustedProxies("*").client("10.1.2.3", "6.6.6.6, 200.1.1.1") == "200.1.1.1"
+    assert not forwarding.TrustedProxies("").configured
+    assert "10.1.2.3" not in forwarding.TrustedProxies("none")
+
+
+def test_base_store_admits_everything():
+    assert asyncio.run(BucketStore().take("ip:x", rate=0.001, burst=1)) == 0
+
+
+def test_redis_backend_reports_missing_package():
+    try:
+        import redis  # noqa: F401
+    except ImportError:
+        with pytest.raises(RuntimeError, match="requirements-redis.txt"):
+            RedisBucketStore("redis://localhost:6379/0")
+    else:
+        pytest.skip("redis está instalado")
+
+
+def test_login_returns_429_before_bcrypt(client, monkeypatch):
+    monkeypatch.setattr(login_throttle, "store", MemoryBucketStore())
+    monkeypatch.setitem(login_throttle.limits, "student", (1 / 60, 2))
+    body = {"student_id": student_id(20), "password": "incorrecta"}
+
+    assert [client.post("/api/auth/login", json=body).status_code for _ in range(2)] == [401, 401]
+    hashed = passwords.pool.stats()["hash_seconds_total"]
+
+    throttled = client.post("/api/auth/login", json=body)
+    assert throttled.status_code == 429
+    assert int(throttled.headers["retry-after"]) >= 1
+    assert passwords.pool.stats()["hash_seconds_total"] == hashed
+
+    # Otro estudiante desde la misma IP sigue pudiendo intentar
+    other = client.post("/api/auth/login", json={"student_id": student_id(21), "password": "incorrecta"})
+    assert other.status_code == 401
+
+
+def test_students_behind_one_proxy(client, monkeypatch):
+    # El cliente de pruebas conecta como "testclient": hace de router de la plataforma
+    monkeypatch.setattr(forwarding, "trusted_proxies", forwarding.TrustedProxies("testclient"))
+    monkeypatch.setattr(login_throttle, "store", MemoryBucketStore())
+    monkeypatch.setitem(login_throttle.limits, "ip", (1 / 60, 3))
+
+    def login(subject, ip, password=DEFAULT_PASSWORD):
+        return client.post(
+            "/api/auth/login", json={"student_id": subject, "password": password},
+            headers={"X-Forwarded-For": f"6.6.6.6, {ip}"},
+        ).status_code
+
+    # Toda una sede entra por la misma IP pública: los logins correctos no agotan su cubeta
+    assert [login(student_id(index), "200.1.1.1") for index in range(10)] == [200] * 10
+
+    # Los fallidos sí, y solo para esa IP: los demás clientes detrás del router siguen entrando
+    assert [login(student_id(10), "200.1.1.2", "incorrecta") for _ in range(4)] == [401, 401, 401, 429]
+    assert login(student_id(11), "200.1.1.2") == 429
+    assert login(student_id(11), "200.1.1.3") == 200
+    assert login(student_id(12), "200.1.1.1") == 200
+
+
+def test_ip_limit_needs_trusted_proxies(client, monkeypatch):
+    monkeypatch.setattr(forwarding, "trusted_proxies", forwarding.TrustedProxies(""))
+    monkeypatch.setattr(login_throttle, "store", MemoryBucketStore())
+    monkeypatch.setitem(login_throttle.limits, "ip", (1 / 60, 1))
+    body = {"password": "incorrecta"}
+
+    # Sin proxies configurados todos parecen venir del router: no se limita por IP
+    statuses = [client.post("/api/auth/login", json={**body, "student_id": student_id(index)}).status_code
+                for index in range(13, 16)]
+    assert statuses == [401, 401, 401]